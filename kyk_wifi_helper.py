@@ -4,20 +4,76 @@
 #
 from __future__ import annotations
 
+import argparse
+import atexit
+import bisect
+import concurrent.futures
+import contextvars
+import functools
+import hashlib
+import hmac
+import heapq
+import html
+import importlib.util
+import inspect
 import itertools
+import json
 import logging
+import logging.handlers
+import math
+import mmap
 import os
+import queue
+import random
+import re
+import select
 import signal  # Ctrl+C sinyalini yakalamak icin
+import socket
+import struct
 import sys
+import tempfile
+import threading
 import time
-from dataclasses import dataclass
+import urllib.parse
+import weakref
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-
-import requests
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv  # Guvenli giris bilgileri (.env dosyasi) icin
-import xml.etree.ElementTree as ET  # XML analiz etmek icin alternatif
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+def lazy_import(name: str, optional: bool = False):
+    """Return module `name` whose code only runs on first attribute access (importlib LazyLoader).
+
+    A missing module still raises ImportError here, or returns None when `optional`.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# Agir kutuphaneler ilk kullanimda yuklenir; boylece --logout gibi tek seferlik komutlar
+# ve derlenmis .exe daha hizli acilir.
+if TYPE_CHECKING:
+    # Tip denetleyicileri ve PyInstaller bu importlari gorerek modulleri tanir/pakete dahil eder.
+    import bs4
+    import dotenv
+    import httpx
+    import requests
+else:
+    requests = lazy_import("requests")
+    bs4 = lazy_import("bs4")
+    dotenv = lazy_import("dotenv") # Guvenli giris bilgileri (.env dosyasi) icin
+    httpx = lazy_import("httpx", optional=True) # Istege bagli: asenkron (asyncio) portal istemcisi icin
 
 # --- Base Path Detection --- #
 # Determine the base path depending on whether the script is running as a bundled executable or a standard Python script.
@@ -51,8 +107,12 @@ PATHS = detect_paths()
 # Define absolute paths for runtime files relative to the base path (exe/script location)
 DOTENV_PATH = PATHS.base_path / ".env"
 SESSION_FILE_PATH = PATHS.base_path / "session_info.txt"
+SESSION_STORE_PATH = PATHS.base_path / "session_store.json"
+KEEPALIVE_PROFILE_PATH = PATHS.base_path / "keepalive_profile.json"
 FIRST_RUN_MARKER_PATH = PATHS.base_path / ".ilk_calistirma_tamam"
 LOG_FILE_PATH = PATHS.base_path / "kyk_login.log"
+ACCOUNTS_FILE_PATH = PATHS.base_path / "accounts.txt"
+CONTROL_TOKEN_PATH = PATHS.base_path / "control_token.txt"
 # Define README path relative to the determined project root
 README_PATH = PATHS.project_root / "README.md"
 
@@ -93,20 +153,121 @@ DEBUG_MODE = False
 # Ctrl+C yakalandiginda bu True olur.
 exit_requested = False
 
+# --- Bekleme Animasyonu Ayari ---
+# Servis (daemon) modunda konsola animasyon yazilmaz.
+SPINNER_ENABLED = True
+
 # --- Signal Handler ---
 def signal_handler(sig, frame):
-    """Handles SIGINT (Ctrl+C) signals."""
+    """Handles SIGINT (Ctrl+C) and SIGTERM signals."""
     global exit_requested
     if not exit_requested: # Prevent multiple messages if signal is sent repeatedly
-        # Use basic print here as logger might be busy or shutdown initiated
-        print(f"\n{Y}{BR}Ctrl+C detected!{RS}{Y} Attempting graceful shutdown...{RS}")
-        logging.info("SIGINT received, setting exit_requested flag.")
+        if sig == getattr(signal, "SIGTERM", None):
+            logging.info("SIGTERM received, setting exit_requested flag.")
+        else:
+            # Use basic print here as logger might be busy or shutdown initiated
+            print(f"\n{Y}{BR}Ctrl+C detected!{RS}{Y} Attempting graceful shutdown...{RS}")
+            logging.info("SIGINT received, setting exit_requested flag.")
         exit_requested = True
 
+# --- Olay Tabanli Uyandirma --- #
+# Bekleme sirasinda periyodik yoklama yapmak yerine bir soket ciftinin okuma ucunda
+# select() ile beklenir. signal.set_wakeup_fd sayesinde gelen her sinyal yazma ucuna bir
+# bayt yazar; diger thread'ler de wake_sleepers() ile bekleyeni aninda uyandirabilir.
+SPINNER_FRAME_INTERVAL = 0.5 # Animasyon karesi en fazla bu siklikta yenilenir (saniye)
+_wakeup_reader: Optional[socket.socket] = None
+_wakeup_writer: Optional[socket.socket] = None
+_interrupt_generation = 0 # interrupt_sleep() her cagrildiginda artar
+_interrupt_lock = threading.Lock() # Ag izleyici ve kontrol arayuzu thread'leri ayni anda artirabilir
+WAKEUP_FALLBACK_SLICE = 0.2 # Soket yoksa bekleme bu uzunlukta dilimlere bolunur (saniye)
+
+
+def install_signal_handlers() -> None:
+    """Register SIGINT/SIGTERM handlers and route signal wakeups into the sleep socket."""
+
+    global _wakeup_reader, _wakeup_writer
+    signal.signal(signal.SIGINT, signal_handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, signal_handler)
+    try:
+        _wakeup_reader, _wakeup_writer = socket.socketpair()
+        _wakeup_reader.setblocking(False)
+        _wakeup_writer.setblocking(False)
+        signal.set_wakeup_fd(_wakeup_writer.fileno(), warn_on_full_buffer=False)
+    except (OSError, ValueError) as e:
+        logging.debug(f"Sinyal uyandirma soketi kurulamadi, zaman asimli bekleme kullanilacak: {e}")
+        _wakeup_reader = _wakeup_writer = None
+    logging.debug("SIGINT/SIGTERM handlers registered.")
+
+
+def wake_sleepers() -> None:
+    """Wake a pending animated_sleep immediately (safe to call from any thread)."""
+
+    if _wakeup_writer is not None:
+        try:
+            _wakeup_writer.send(b"\0")
+        except OSError:
+            pass # Tampon doluysa bekleyen zaten uyanacak
+
+
+def interrupt_sleep() -> None:
+    """End the current animated_sleep early without requesting exit (safe from any thread)."""
+
+    global _interrupt_generation
+    with _interrupt_lock:
+        _interrupt_generation += 1
+    wake_sleepers()
+
+
+def request_exit() -> None:
+    """Set exit_requested and wake any sleeper (used outside the signal handler)."""
+
+    global exit_requested
+    exit_requested = True
+    wake_sleepers()
+
+
+def wait_for_wakeup(timeout: float) -> None:
+    """Block for up to `timeout` seconds or until a signal / wake_sleepers() arrives."""
+
+    if timeout <= 0:
+        return
+    if _wakeup_reader is None:
+        # Soket acilamadiysa kisa dilimlerle uyunur; cikis istegi ve interrupt_sleep()
+        # en gec bir dilim icinde fark edilir.
+        deadline = time.monotonic() + timeout
+        generation = _interrupt_generation
+        while not exit_requested and _interrupt_generation == generation:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(WAKEUP_FALLBACK_SLICE, remaining))
+        return
+    readable, _, _ = select.select([_wakeup_reader], [], [], timeout)
+    if readable:
+        try:
+            while _wakeup_reader.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            logging.debug(f"Uyandirma soketi okunurken hata: {e}")
+
 # --- Bekleme Animasyonu --- #
 # Konsolda bekleme sirasinda gorsel bir isaret gosterir.
-def animated_sleep(duration: float, message: str = "Bekleniyor...", color: str | object = W) -> bool:
-    """Eger konsol penceresi varsa, bekleme sirasinda bir animasyon gosterir."""
+def animated_sleep(
+    duration: float,
+    message: str = "Bekleniyor...",
+    color: str | object = W,
+    spinner: Optional[bool] = None,
+) -> bool:
+    """Son sureye veya kapatma sinyaline kadar bekler; istenirse animasyon gosterir.
+
+    Animasyon kapaliyken dongu hic uyanmaz. Acikken kareler SPINNER_FRAME_INTERVAL
+    araligiyla yenilenir. Bekleme Ctrl+C ile kesildiyse True doner. Ag degisikligi
+    algilanirsa veya interrupt_sleep() cagrilirsa bekleme erken biter ve False doner;
+    cagiran bir sonraki adima gecer.
+    """
 
     global exit_requested  # Access the global flag
     if exit_requested:
@@ -121,80 +282,75 @@ def animated_sleep(duration: float, message: str = "Bekleniyor...", color: str |
         except ImportError:
             logging.debug("msvcrt module could not be imported on Windows.")
 
-    if sys.stdout:
-        spinner = itertools.cycle(["-", "\\", "|", "/"])
-        end_time = time.monotonic() + duration
-        turkish_chars = {
-            "ı": "i",
-            "İ": "I",
-            "ğ": "g",
-            "Ğ": "G",
-            "ü": "u",
-            "Ü": "U",
-            "ş": "s",
-            "Ş": "S",
-            "ö": "o",
-            "Ö": "O",
-            "ç": "c",
-            "Ç": "C",
-        }
-        ascii_message = message
-        for tr, en in turkish_chars.items():
-            ascii_message = ascii_message.replace(tr, en)
-
-        formatted_message = f"{color}{ascii_message}{RS}" if colorama else ascii_message
-        sys.stdout.write(formatted_message + " ")
-
-        interrupted = False
-        while time.monotonic() < end_time:
-            if exit_requested:  # Check flag set by signal handler
-                logging.debug("Exit requested flag detected during animated_sleep.")
-                interrupted = True
+    show_spinner = bool(sys.stdout) and (SPINNER_ENABLED if spinner is None else spinner)
+    end_time = time.monotonic() + duration
+    start_generation = _interrupt_generation
+
+    if not show_spinner:
+        while not exit_requested:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0 or _interrupt_generation != start_generation:
                 break
+            wait_for_wakeup(remaining)
+        return exit_requested
+
+    spinner_frames = itertools.cycle(["-", "\\", "|", "/"])
+    turkish_chars = {
+        "ı": "i",
+        "İ": "I",
+        "ğ": "g",
+        "Ğ": "G",
+        "ü": "u",
+        "Ü": "U",
+        "ş": "s",
+        "Ş": "S",
+        "ö": "o",
+        "Ö": "O",
+        "ç": "c",
+        "Ç": "C",
+    }
+    ascii_message = message
+    for tr, en in turkish_chars.items():
+        ascii_message = ascii_message.replace(tr, en)
+
+    formatted_message = f"{color}{ascii_message}{RS}" if colorama else ascii_message
+    sys.stdout.write(formatted_message + " ")
+
+    interrupted = False
+    while True:
+        if exit_requested:  # Check flag set by signal handler
+            logging.debug("Exit requested flag detected during animated_sleep.")
+            interrupted = True
+            break
+        remaining = end_time - time.monotonic()
+        if remaining <= 0 or _interrupt_generation != start_generation:
+            break
+
+        # Check for keyboard input using msvcrt on Windows (for .exe)
+        if msvcrt_loaded and msvcrt.kbhit():  # type: ignore[name-defined]
+            try:
+                key = msvcrt.getch()  # type: ignore[name-defined]
+                if key == b"\x03":  # Ctrl+C pressed
+                    logging.debug("Ctrl+C detected via msvcrt in animated_sleep.")
+                    exit_requested = True  # Set the global flag
+                    interrupted = True
+                    break
+            except Exception as e_msvcrt_get:  # pragma: no cover - platform specific
+                # Log error reading key, but continue
+                logging.debug("Error reading key with msvcrt: %s", e_msvcrt_get)
 
-            # Check for keyboard input using msvcrt on Windows (for .exe)
-            if msvcrt_loaded and msvcrt.kbhit():  # type: ignore[name-defined]
-                try:
-                    key = msvcrt.getch()  # type: ignore[name-defined]
-                    if key == b"\x03":  # Ctrl+C pressed
-                        logging.debug("Ctrl+C detected via msvcrt in animated_sleep.")
-                        exit_requested = True  # Set the global flag
-                        interrupted = True
-                        break
-                except Exception as e_msvcrt_get:  # pragma: no cover - platform specific
-                    # Log error reading key, but continue
-                    logging.debug("Error reading key with msvcrt: %s", e_msvcrt_get)
-
-            # Animation update
-            sys.stdout.write(next(spinner))
-            sys.stdout.flush()
-
-            # Shorter sleep to be more responsive to Ctrl+C
-            check_interval = 0.1  # Check for input every 0.1s
-            remaining_time_in_loop = end_time - time.monotonic()
-            sleep_this_iteration = min(check_interval, max(0.0, remaining_time_in_loop))
-            if sleep_this_iteration > 0:
-                time.sleep(sleep_this_iteration)
-
-            if not interrupted:  # Avoid erasing the spinner char if interrupted
-                sys.stdout.write("\b")
-
-        # Cleanup line after loop finishes or is interrupted
-        clear_len = len(ascii_message) + 10  # Adjusted length
-        sys.stdout.write("\r" + " " * clear_len + "\r")
+        # Animation update (rate-limited to SPINNER_FRAME_INTERVAL)
+        sys.stdout.write(next(spinner_frames))
         sys.stdout.flush()
-        # No extra message here, handler prints one
-        return interrupted  # Return True if exit was requested during sleep
+        wait_for_wakeup(min(SPINNER_FRAME_INTERVAL, remaining))
+        sys.stdout.write("\b")
 
-    # Non-console sleep, check flag periodically
-    end_time = time.monotonic() + duration
-    while time.monotonic() < end_time:
-        if exit_requested:
-            return True
-        sleep_chunk = min(0.2, max(0.0, end_time - time.monotonic()))
-        if sleep_chunk > 0:
-            time.sleep(sleep_chunk)  # Sleep in chunks
-    return exit_requested  # Check one last time
+    # Cleanup line after loop finishes or is interrupted
+    clear_len = len(ascii_message) + 10  # Adjusted length
+    sys.stdout.write("\r" + " " * clear_len + "\r")
+    sys.stdout.flush()
+    # No extra message here, handler prints one
+    return interrupted  # Return True if exit was requested during sleep
 
 # --- Kullanici Bilgilerini Alma --- #
 # Program icin gerekli olan KYK kullanici adi ve sifresini alir.
@@ -235,12 +391,16 @@ SESSION_FILE = SESSION_FILE_PATH
 
 # --- KYK Portal Adresleri ve Zaman Ayarlari --- #
 # GSB Wi-Fi sistemine baglanmak icin kullanilan adresler ve zamanlama ayarlari.
-LOGIN_URL = "https://wifi.gsb.gov.tr/login.html" # Giris sayfasi
-CHECK_URL = "https://wifi.gsb.gov.tr/j_spring_security_check" # Giris dogrulama adresi
-SUCCESS_URL = "https://wifi.gsb.gov.tr/" # Basarili giris sonrasi adres (ve AJAX hedefi)
+# KYK_PORTAL_URL ortam degiskeni ile portal adresi degistirilebilir (ornegin
+# tools/mock_portal.py ile yerel test ve olcum icin).
+PORTAL_BASE_URL = os.environ.get("KYK_PORTAL_URL", "https://wifi.gsb.gov.tr").rstrip("/") # Portal kok adresi
+LOGIN_URL = f"{PORTAL_BASE_URL}/login.html" # Giris sayfasi
+CHECK_URL = f"{PORTAL_BASE_URL}/j_spring_security_check" # Giris dogrulama adresi
+SUCCESS_URL = f"{PORTAL_BASE_URL}/" # Basarili giris sonrasi adres (ve AJAX hedefi)
 AJAX_INTERVAL = 600 # Oturumu acik tutma modunda kota kontrol araligi (saniye) - 10 dakika
 FAST_AJAX_INTERVAL = 10 # Hizli oturumu acik tutma modunda kota kontrol araligi (saniye) - 30 saniye
-RETRY_DELAY = 60 # Basarisiz giristen sonra yeniden deneme gecikmesi (saniye) - 1 dakika
+RETRY_BASE_DELAY = 5 # Basarisiz istekten sonra ilk yeniden deneme gecikmesi (saniye); sonrakiler ustel ve rastgele buyur
+RETRY_MAX_DELAY = 600 # Yeniden deneme gecikmesinin ust siniri (saniye) - 10 dakika
 REQUEST_TIMEOUT = 30 # Internet istekleri icin zaman asimi suresi (saniye)
 
 USER_AGENT = (
@@ -250,20 +410,15 @@ USER_AGENT = (
 SEC_CH_UA = '"Microsoft Edge";v="135", "Not-A.Brand";v="8", "Chromium";v="135"'
 
 
-def compose_headers(**overrides: str) -> Dict[str, str]:
-    """Merge provided overrides with a shared base header configuration."""
-
-    base_headers: Dict[str, str] = {
-        "User-Agent": USER_AGENT,
-        "Accept-Language": "tr,en;q=0.9,en-GB;q=0.8,en-US;q=0.7",
-        "Connection": "keep-alive",
-        "DNT": "1",
-        "sec-ch-ua": SEC_CH_UA,
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-    }
-    base_headers.update(overrides)
-    return base_headers
+BASE_HEADERS: Mapping[str, str] = MappingProxyType({
+    "User-Agent": USER_AGENT,
+    "Accept-Language": "tr,en;q=0.9,en-GB;q=0.8,en-US;q=0.7",
+    "Connection": "keep-alive",
+    "DNT": "1",
+    "sec-ch-ua": SEC_CH_UA,
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+})
 
 
 QuotaResult = Tuple[Optional[Dict[str, str]] | str, Optional[str]]
@@ -271,9 +426,16 @@ QuotaResult = Tuple[Optional[Dict[str, str]] | str, Optional[str]]
 # --- Kayit (Loglama) Ayarlari --- #
 # Programin calisma adimlarinin ve hatalarin kaydedilmesi icin ayarlar.
 # Kayitlar hem konsola hem de 'kyk_login.log' dosyasina yazilir.
+# Dosyaya yazma islemi bir kuyruk (QueueHandler/QueueListener) uzerinden ayri bir thread'de
+# yapilir; boylece disk G/C keep-alive dongusunu hic bekletmez. Dosya boyuta gore
+# (varsayilan) veya KYK_LOG_ROTATE=daily ile her gece dondurulur. KYK_LOG_FORMAT=json
+# ayarlanirsa dosyaya her satirda bir JSON nesnesi yazilir.
 
-MAX_LOGIN_ATTEMPTS = 3 # Izin verilen maksimum GENEL deneme sayisi (Network vb. hatalar icin)
+MAX_LOGIN_ATTEMPTS = 6 # Izin verilen maksimum GENEL deneme sayisi (Network vb. hatalar icin)
 MAX_CREDENTIAL_ATTEMPTS = 3 # Izin verilen maksimum HATALI GIRIS denemesi sayisi
+LOG_MAX_BYTES = 5 * 1024 * 1024 # Boyuta gore dondurmede log dosyasinin en buyuk boyutu (5 MB)
+LOG_BACKUP_COUNT = 5 # Saklanacak eski log dosyasi sayisi
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 # Renkli konsol cikti formatlayicisi
 class ColorFormatter(logging.Formatter):
@@ -285,24 +447,78 @@ class ColorFormatter(logging.Formatter):
         logging.ERROR:    f"%(asctime)s - {R}{BR}%(levelname)s{RS}{R} - %(message)s{RS}",
         logging.CRITICAL: f"%(asctime)s - {R}{BR}%(levelname)s{RS}{R} - %(message)s{RS}",
     }
+    def __init__(self) -> None:
+        super().__init__(datefmt=LOG_DATE_FORMAT)
+        # Her seviye icin formatlayici bir kez olusturulur.
+        self._formatters = {
+            level: logging.Formatter(log_fmt, datefmt=LOG_DATE_FORMAT) for level, log_fmt in self.FORMATS.items()
+        }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, self.FORMATS[logging.INFO])
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+        formatter = self._formatters.get(record.levelno, self._formatters[logging.INFO])
         return formatter.format(record)
 
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for machine-readable log files (KYK_LOG_FORMAT=json)."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, LOG_DATE_FORMAT),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def build_file_handler(path: Path) -> logging.Handler:
+    """Rotating file handler for the log file, honouring KYK_LOG_ROTATE and KYK_LOG_FORMAT."""
+
+    if os.environ.get("KYK_LOG_ROTATE", "").strip().lower() == "daily":
+        handler: logging.Handler = logging.handlers.TimedRotatingFileHandler(
+            path, when="midnight", backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    if os.environ.get("KYK_LOG_FORMAT", "").strip().lower() == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handler.setLevel(logging.DEBUG)
+    return handler
+
+
+def stop_log_listener() -> None:
+    """Flush the queued log records to the file and stop the writer thread (idempotent)."""
+
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+
 log_level = logging.DEBUG if DEBUG_MODE else logging.INFO
 logger = logging.getLogger()
 logger.setLevel(log_level)
 if logger.hasHandlers(): logger.handlers.clear()
+log_listener: Optional[logging.handlers.QueueListener] = None
 
-# Dosya Kayit Ayari (Renksiz)
+# Dosya Kayit Ayari (Renksiz, kuyruk uzerinden)
 try:
     LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    file_handler = logging.FileHandler(LOG_FILE_PATH, encoding='utf-8')
-    file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_formatter)
-    file_handler.setLevel(logging.DEBUG)
-    logger.addHandler(file_handler)
+    file_handler = build_file_handler(LOG_FILE_PATH)
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(stop_log_listener) # Cikista kuyrukta kalan kayitlar dosyaya yazilir
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.DEBUG)
+    logger.addHandler(queue_handler)
 except Exception as e_fh:
     print(f"{R}Hata: Log dosyasi (kyk_login.log) olusturulamadi/yazilamadi: {e_fh}{RS}")
 
@@ -320,52 +536,1289 @@ if sys.stdout:
     except Exception as e_ch:
         print(f"{R}Hata: Konsol loglama ayarlanamadi: {e_ch}{RS}")
 
+# --- Sayisal Ortam Degiskenleri --- #
+# Import sirasinda okunan sayisal ayarlar (KYK_RATE_LIMIT, KYK_SHUTDOWN_DEADLINE,
+# KYK_QUOTA_CACHE_TTL) hatali girilse bile betik (--help dahil) acilir: uyari yazilir ve
+# varsayilan deger kullanilir.
+def env_float(name: str, default: float) -> float:
+    """Read a finite float from environment variable `name`, warning and falling back to `default`."""
+
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        logging.warning(f"{name} icin gecersiz deger ({raw!r}); varsayilan {default:g} kullaniliyor.")
+        return default
+    return value
+
+
 # --- Ana Islevler --- #
 # Programin temel gorevlerini yerine getiren fonksiyonlar.
 
+NAVIGATE_ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7"
+CREDENTIAL_ERROR_FRAGMENTS = (
+    "hatali kullanici adi veya sifre",
+    "gecersiz kullanici adi veya parola",
+    "kimlik bilgileri dogrulanamadi",
+)
+LOGOUT_URL = f"{LOGIN_URL}?logout=1"
+LOGOUT_TIMEOUT = 20 # Cikis istegi icin zaman asimi suresi (saniye)
+LOGOUT_SUCCESS_FRAGMENT = "Basari ile cikis yaptiniz"
+
+
+# --- Performans Metrikleri --- #
+# Her portal cagrisinin suresi (toplam ve ilk bayta kadar gecen sure), sonucu
+# (basarili, CREDENTIAL_ERROR, SESSION_EXPIRED, zaman asimi vb.) ve yanit ayristirma
+# sureleri surec icinde toplanir. Prometheus metin formatinda veya JSON olarak disa aktarilir.
+# Not: requests DNS/baglanti surelerini ayrica vermez; 'ttfb' istek gonderiminden yanit
+# basliklarinin gelmesine kadar gecen suredir (response.elapsed).
+METRIC_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_EXPORT_PATH: Optional[Path] = None # --metrics-file ile ayarlanir
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Sequence[float] = METRIC_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class PortalMetrics:
+    """Thread-safe in-process store of per-endpoint timings and outcome counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.outcomes: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, endpoint: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((endpoint, phase))
+            if histogram is None:
+                histogram = self.histograms[(endpoint, phase)] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[(endpoint, outcome)] = self.outcomes.get((endpoint, outcome), 0) + 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """JSON-serialisable view of all metrics."""
+
+        with self._lock:
+            timings: Dict[str, Dict[str, object]] = {}
+            for (endpoint, phase), histogram in sorted(self.histograms.items()):
+                timings.setdefault(endpoint, {})[phase] = histogram.to_dict()
+            outcomes: Dict[str, Dict[str, int]] = {}
+            for (endpoint, outcome), value in sorted(self.outcomes.items()):
+                outcomes.setdefault(endpoint, {})[outcome] = value
+        return {"generated_at": time.time(), "timings": timings, "outcomes": outcomes}
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+
+        lines = [
+            "# HELP kyk_portal_request_seconds Portal request duration by endpoint and phase.",
+            "# TYPE kyk_portal_request_seconds histogram",
+        ]
+        with self._lock:
+            for (endpoint, phase), histogram in sorted(self.histograms.items()):
+                labels = f'endpoint="{endpoint}",phase="{phase}"'
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'kyk_portal_request_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'kyk_portal_request_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"kyk_portal_request_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"kyk_portal_request_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# HELP kyk_portal_outcomes_total Portal call outcomes by endpoint.")
+            lines.append("# TYPE kyk_portal_outcomes_total counter")
+            for (endpoint, outcome), value in sorted(self.outcomes.items()):
+                lines.append(f'kyk_portal_outcomes_total{{endpoint="{endpoint}",outcome="{outcome}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = PortalMetrics()
+_portal_call_context: contextvars.ContextVar[Optional[Dict[str, Optional[str]]]] = contextvars.ContextVar(
+    "portal_call_context", default=None
+)
+
+
+def note_outcome(outcome: str) -> None:
+    """Record why the current portal call failed (e.g. 'timeout'); used by the except branches."""
+
+    context = _portal_call_context.get()
+    if context is not None:
+        context["outcome"] = outcome
+
+
+def classify_portal_result(endpoint: str, result: object) -> str:
+    """Map a portal function's return value to an outcome label."""
+
+    if endpoint == "quota":
+        quota_info = result[0] if isinstance(result, tuple) else None
+        if quota_info == "SESSION_EXPIRED":
+            return "session_expired"
+        return "success" if isinstance(quota_info, dict) else "failure"
+    if result == "CREDENTIAL_ERROR":
+        return "credential_error"
+    return "success" if result else "failure"
+
+
+def _finish_portal_call(endpoint: str, context: Dict[str, Optional[str]], started: float, result: object) -> None:
+    outcome = classify_portal_result(endpoint, result)
+    if outcome == "failure" and context.get("outcome"):
+        outcome = str(context["outcome"])
+    METRICS.observe(endpoint, "total", time.perf_counter() - started)
+    METRICS.count(endpoint, outcome)
+    if endpoint in CIRCUIT_GATED_ENDPOINTS: # Cikis devreden gecmez; sonucu devreyi acip kapatmamali
+        PORTAL_BREAKER.record(outcome)
+
+
+def _abort_portal_call(endpoint: str) -> None:
+    # Cagri sonuc donmeden bir istisna ile bitti (KeyboardInterrupt, CancelledError vb.).
+    # Devre icin basari da hata da sayilmaz; yalnizca alinmis deneme hakki birakilir.
+    METRICS.count(endpoint, "exception")
+    if endpoint in CIRCUIT_GATED_ENDPOINTS:
+        PORTAL_BREAKER.release_trial()
+
+
+def _note_rate_limit_wait(endpoint: str, waited: float) -> None:
+    if waited > 0.001:
+        METRICS.observe(endpoint, "ratelimit_wait", waited)
+        if waited >= 1.0:
+            logging.debug(f"Hiz siniri: '{endpoint}' istegi {waited:.1f} sn bekledi.")
+
+
+def _circuit_blocks(endpoint: str) -> bool:
+    if endpoint not in CIRCUIT_GATED_ENDPOINTS or PORTAL_BREAKER.allow():
+        return False
+    logging.debug(f"Devre acik, '{endpoint}' istegi gonderilmedi ({PORTAL_BREAKER.retry_after():.0f} sn kaldi).")
+    METRICS.count(endpoint, "circuit_open")
+    return True
+
+
+def portal_call(endpoint: str):
+    """Decorator that times a portal function, counts its outcome under `endpoint`,
+    short-circuits it while PORTAL_BREAKER is open and paces it with PORTAL_RATE_LIMITER."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _circuit_blocks(endpoint):
+                    return circuit_open_result(endpoint, args)
+                import asyncio
+
+                try:
+                    waited_from = time.monotonic()
+                    while not exit_requested and (wait := PORTAL_RATE_LIMITER.delay_for(endpoint)) > 0:
+                        await asyncio.sleep(min(wait, 1.0))
+                    _note_rate_limit_wait(endpoint, time.monotonic() - waited_from)
+                    context: Dict[str, Optional[str]] = {"endpoint": endpoint, "outcome": None}
+                    token = _portal_call_context.set(context)
+                    started = time.perf_counter()
+                    try:
+                        result = await func(*args, **kwargs)
+                    finally:
+                        _portal_call_context.reset(token)
+                except BaseException:
+                    _abort_portal_call(endpoint)
+                    raise
+                _finish_portal_call(endpoint, context, started, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _circuit_blocks(endpoint):
+                return circuit_open_result(endpoint, args)
+            try:
+                _note_rate_limit_wait(endpoint, PORTAL_RATE_LIMITER.acquire(endpoint))
+                context: Dict[str, Optional[str]] = {"endpoint": endpoint, "outcome": None}
+                token = _portal_call_context.set(context)
+                started = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    _portal_call_context.reset(token)
+            except BaseException:
+                _abort_portal_call(endpoint)
+                raise
+            _finish_portal_call(endpoint, context, started, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_response_timing(response: "requests.Response", *args, **kwargs) -> None:
+    """requests response hook: time-to-first-byte of every portal request."""
+
+    context = _portal_call_context.get()
+    endpoint = context["endpoint"] if context else "other"
+    METRICS.observe(str(endpoint), "ttfb", response.elapsed.total_seconds())
+
+
+def export_metrics(path: Optional[Path] = None) -> None:
+    """Write METRICS to `path` (Prometheus text for .prom/.txt, JSON otherwise)."""
+
+    path = path or METRICS_EXPORT_PATH
+    if path is None:
+        return
+    if path.suffix in (".prom", ".txt"):
+        text = METRICS.to_prometheus()
+    else:
+        text = json.dumps(METRICS.snapshot(), indent=2)
+    try:
+        atomic_write_text(path, text)
+    except OSError as e:
+        logging.warning(f"Metrikler ({path}) yazilamadi: {e}")
+
+# --- Yeniden Deneme ve Devre Kesici --- #
+# Basarisiz portal cagrilarindan sonra sabit bir sure yerine ustel artan ve rastgele
+# dagitilan (decorrelated jitter) bir sure beklenir; boylece ayni yurttaki kopyalar portali
+# ayni anda yuklemez. Arka arkaya CIRCUIT_FAILURE_THRESHOLD ag/sunucu hatasindan sonra devre
+# acilir: CIRCUIT_RESET_TIMEOUT boyunca giris, ViewState ve kota istekleri hic gonderilmez,
+# ardindan tek bir deneme istegine izin verilir (yari acik). Cikis istekleri engellenmez.
+CIRCUIT_FAILURE_THRESHOLD = 5 # Devreyi acan arka arkaya hata sayisi
+CIRCUIT_RESET_TIMEOUT = 120 # Devrenin acik kalma suresi (saniye); kopyalar arasinda +-%20 dagitilir
+CIRCUIT_FAILURE_OUTCOMES = frozenset({"failure", "timeout", "connection_error", "unreachable"})
+CIRCUIT_GATED_ENDPOINTS = frozenset({"login", "viewstate", "quota"})
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker fed with the outcome of every portal call."""
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self._opened_until: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_until is None:
+                return "closed"
+            return "open" if time.monotonic() < self._opened_until else "half_open"
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial call through (0 when closed or half-open)."""
+
+        with self._lock:
+            if self._opened_until is None:
+                return 0.0
+            return max(0.0, self._opened_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a gated portal call may be sent now; half-open admits a single trial call."""
+
+        with self._lock:
+            if self._opened_until is None:
+                return True
+            if time.monotonic() < self._opened_until or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, outcome: str) -> None:
+        if outcome in CIRCUIT_FAILURE_OUTCOMES:
+            self.record_failure()
+        else:
+            self.record_success() # Portal yanit verdi (hatali giris veya oturum zaman asimi dahil)
+
+    def record_success(self) -> None:
+        with self._lock:
+            was_open = self._opened_until is not None
+            self.failures = 0
+            self._opened_until = None
+            self._trial_in_flight = False
+        if was_open:
+            logging.info("Portal tekrar yanit veriyor, devre kapatildi.")
+
+    def release_trial(self) -> None:
+        """Give back the half-open trial of a call that ended without an outcome (it raised)."""
+
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        """Close the breaker (also used when the network changes)."""
+
+        with self._lock:
+            self.failures = 0
+            self._opened_until = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+            if not trial_failed and (self._opened_until is not None or self.failures < self.failure_threshold):
+                return
+            open_for = self.reset_timeout * random.uniform(0.8, 1.2)
+            self._opened_until = time.monotonic() + open_for
+        logging.warning(f"Portal arka arkaya {self.failures} kez basarisiz oldu; istekler {open_for:.0f} sn durduruldu (devre acik).")
+
+
+class RetryPolicy:
+    """Capped exponential backoff with decorrelated jitter; never shorter than an open breaker."""
+
+    def __init__(
+        self,
+        base: float = RETRY_BASE_DELAY,
+        cap: float = RETRY_MAX_DELAY,
+        max_attempts: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts # None: sinirsiz (servis ve coklu hesap modu)
+        self.breaker = breaker if breaker is not None else PORTAL_BREAKER
+        self.attempts = 0
+        self._delay = base
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_attempts is not None and self.attempts >= self.max_attempts
+
+    def next_delay(self) -> float:
+        """Count a failed attempt and return how long to wait before the next one."""
+
+        self.attempts += 1
+        self._delay = min(self.cap, random.uniform(self.base, self._delay * 3))
+        return max(self._delay, self.breaker.retry_after())
+
+    def reset(self) -> None:
+        self.attempts = 0
+        self._delay = self.base
+
+
+PORTAL_BREAKER = CircuitBreaker()
+
+
+def circuit_open_result(endpoint: str, args: Sequence[object]) -> object:
+    """Failure value a gated portal function returns while the breaker is open."""
+
+    if endpoint == "quota":
+        return None, (args[1] if len(args) > 1 else None)
+    return None if endpoint == "viewstate" else False
+
+
+# --- Portal Istek Hiz Siniri --- #
+# Portala giden her cagri (giris, ViewState, kota, cikis) bir jeton kovasindan (token bucket)
+# jeton alir. Kova durumu kullaniciya ozel kucuk bir dosyada ($XDG_RUNTIME_DIR veya gecici
+# dizinde kullanici kimligiyle adlandirilmis, yalnizca sahibi okuyup yazabilir) tutulur ve
+# dosya kilidiyle (fcntl / msvcrt) korunur; boylece kullanicinin tum kopyalari ortak bir
+# sinira uyar, baska bir yerel kullanici ise kovayi dolduramaz veya bosaltamaz.
+# Giris ve cikis istekleri onceliklidir: keep-alive (ViewState/kota) istekleri kovada
+# RATE_LIMIT_LOGIN_RESERVE kadar jetonu giris/cikis icin birakir.
+RATE_LIMIT_PER_MINUTE = env_float("KYK_RATE_LIMIT", 60.0) # Bilgisayar genelinde dakikada en fazla portal cagrisi (0: sinirsiz)
+RATE_LIMIT_BURST = 20 # Kovanin kapasitesi (art arda gonderilebilecek cagri sayisi)
+RATE_LIMIT_LOGIN_RESERVE = 3 # Keep-alive cagrilarinin dokunamayacagi jeton sayisi
+RATE_LIMIT_PRIORITY_ENDPOINTS = frozenset({"login", "logout"})
+
+
+def default_rate_limit_path() -> Path:
+    """Per-user location of the shared token bucket file."""
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir) / "kyk_wifi_rate_limit.bin"
+    if hasattr(os, "getuid"):
+        return Path(tempfile.gettempdir()) / f"kyk_wifi_rate_limit_{os.getuid()}.bin"
+    return Path(tempfile.gettempdir()) / "kyk_wifi_rate_limit.bin" # Windows: gecici dizin zaten kullaniciya ozel
+
+
+RATE_LIMIT_PATH = Path(os.environ.get("KYK_RATE_LIMIT_FILE") or default_rate_limit_path())
+RATE_LIMIT_STATE = struct.Struct("<dd") # jeton sayisi, son guncelleme (Unix saniye)
+
+
+class PortalRateLimiter:
+    """Token bucket shared by all processes on the host through a locked state file."""
+
+    def __init__(
+        self,
+        per_minute: float = RATE_LIMIT_PER_MINUTE,
+        burst: float = RATE_LIMIT_BURST,
+        reserve: float = RATE_LIMIT_LOGIN_RESERVE,
+        path: Path = RATE_LIMIT_PATH,
+    ) -> None:
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._file_failed = False
+        self._local_state = (float(burst), time.time()) # Dosya kullanilamazsa surec ici kova
+
+    def _open(self) -> Optional[int]:
+        if self._fd is None and not self._file_failed:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+                if hasattr(os, "getuid") and os.fstat(fd).st_uid != os.getuid():
+                    os.close(fd)
+                    raise PermissionError("dosya baska bir kullaniciya ait")
+                self._fd = fd
+            except OSError as e:
+                logging.debug(f"Hiz siniri dosyasi ({self.path}) acilamadi, surec ici sinir kullanilacak: {e}")
+                self._file_failed = True
+        return self._fd
+
+    @staticmethod
+    def _lock_file(fd: int, locked: bool) -> None:
+        if sys.platform == "win32":
+            import msvcrt  # type: ignore
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK if locked else msvcrt.LK_UNLCK, 1)  # type: ignore[attr-defined]
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+
+    def _take(self, floor: float) -> float:
+        """Take one token if more than `floor` remain; return 0 or the seconds to wait."""
+
+        with self._lock:
+            fd = self._open()
+            if fd is None:
+                tokens, updated = self._local_state
+            else:
+                self._lock_file(fd, True)
+                os.lseek(fd, 0, os.SEEK_SET)
+                raw = os.read(fd, RATE_LIMIT_STATE.size)
+                tokens, updated = RATE_LIMIT_STATE.unpack(raw) if len(raw) == RATE_LIMIT_STATE.size else (float(self.burst), time.time())
+            try:
+                now = time.time()
+                tokens = min(float(self.burst), tokens + max(0.0, now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= floor + 1:
+                    tokens -= 1
+                else:
+                    wait = (floor + 1 - tokens) / self.rate
+                if fd is None:
+                    self._local_state = (tokens, now)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, RATE_LIMIT_STATE.pack(tokens, now))
+                return wait
+            finally:
+                if fd is not None:
+                    self._lock_file(fd, False)
+
+    def delay_for(self, endpoint: str) -> float:
+        """Non-blocking: take a token for `endpoint` (0.0) or return how long to wait first."""
+
+        if self.rate <= 0:
+            return 0.0
+        floor = 0.0 if endpoint in RATE_LIMIT_PRIORITY_ENDPOINTS else float(self.reserve)
+        try:
+            return self._take(floor)
+        except OSError as e:
+            logging.debug(f"Hiz siniri dosyasi kullanilamadi, surec ici sinir kullanilacak: {e}")
+            self._file_failed = True
+            self._fd = None
+            return self._take(floor)
+
+    def acquire(self, endpoint: str) -> float:
+        """Block until a token for `endpoint` is available (or exit is requested); return the time waited."""
+
+        started = time.monotonic()
+        while not exit_requested:
+            wait = self.delay_for(endpoint)
+            if wait <= 0:
+                break
+            if threading.current_thread() is threading.main_thread():
+                wait_for_wakeup(min(wait, 1.0)) # Ctrl+C ve interrupt_sleep() beklemeyi hemen bitirir
+            else:
+                # Uyandirma soketini yalnizca ana thread okur; digerleri animated_sleep'in uyanmasini calmaz.
+                time.sleep(min(wait, 1.0))
+        return time.monotonic() - started
+
+
+PORTAL_RATE_LIMITER = PortalRateLimiter()
+
+
+# --- Baglanti Havuzu --- #
+# Tum portal oturumlari tek bir HTTPAdapter'i paylasir; boylece yeniden giris, oturum
+# suresinin dolmasi veya cikis islemlerinde acik TCP/TLS baglantilari tekrar kullanilir.
+# Oturum sifirlamak icin yalnizca cerezler temizlenir, baglanti havuzu korunur.
+PORTAL_POOL_MAXSIZE = 8 # Portal icin havuzda tutulacak en fazla baglanti
+_portal_adapter: Optional["requests.adapters.HTTPAdapter"] = None
+
+
+def portal_adapter() -> "requests.adapters.HTTPAdapter":
+    """Return the process-wide HTTPAdapter (connection pool) used for the portal."""
+
+    global _portal_adapter
+    if _portal_adapter is None:
+        _portal_adapter = requests.adapters.HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=PORTAL_POOL_MAXSIZE,
+            max_retries=0,
+        )
+    return _portal_adapter
+
+
+def new_portal_session() -> requests.Session:
+    """Create a requests.Session (own cookie jar) backed by the shared connection pool.
+
+    Do not close() these sessions: that would also close the shared adapter.
+    """
+
+    session = requests.Session()
+    session.headers.update(BASE_HEADERS)
+    adapter = portal_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(record_response_timing)
+    return session
+
+
+def reset_portal_session(session: requests.Session) -> requests.Session:
+    """Drop the portal cookies of a session but keep its pooled connections."""
+
+    session.cookies.clear()
+    _portal_activity.pop(session, None)
+    return session
+
+
+# Portal, oturumun bosta kalma suresini her kimlik dogrulamali istekte sifirlar: yalnizca
+# keep-alive kota istegi degil, arka plandaki ViewState on yuklemesi ve kontrol arayuzunun
+# /refresh istegi de. Adaptif mod bosta kalma suresini bu son istekten olcer.
+_portal_activity: "weakref.WeakKeyDictionary[requests.Session, float]" = weakref.WeakKeyDictionary()
+
+
+def note_portal_activity(session: requests.Session) -> None:
+    """Record that `session` just completed an authenticated portal request."""
+
+    _portal_activity[session] = time.monotonic()
+
+
+def last_portal_activity(session: requests.Session) -> Optional[float]:
+    """Monotonic time of the last authenticated request on `session`, if any."""
+
+    return _portal_activity.get(session)
+
+
+# --- Baglanti On Kontrolu --- #
+# Giris denemesinden once portalin erisilebilir olup olmadigi ucuz bir on kontrolle
+# anlasilir: portal adresinin DNS cozumlemesi, kisa zaman asimli bir TCP baglantisi ve
+# captive portal tespiti icin HTTP 204 kontrolu. KYK Wi-Fi'a bagli degilken her giris
+# denemesi REQUEST_TIMEOUT kadar beklemek yerine bir saniyenin altinda sonuclanir.
+PROBE_ENABLED = os.environ.get("KYK_PROBE", "1") != "0" # KYK_PROBE=0 on kontrolu kapatir
+PROBE_TIMEOUT = 1.0 # DNS, TCP ve 204 kontrolunun her biri icin zaman asimi (saniye)
+PROBE_CACHE_TTL = 5.0 # Ayni sonucun tekrar kullanilacagi sure (saniye); coklu hesapta tek kontrol
+CAPTIVE_CHECK_URL = os.environ.get("KYK_CAPTIVE_CHECK_URL", "http://connectivitycheck.gstatic.com/generate_204")
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Outcome of one connectivity probe."""
+
+    status: str # "ok", "dns_failed" veya "tcp_failed"
+    detail: str = ""
+    internet: Optional[bool] = None # 204 kontrolu: True = internet acik, False = captive portal araya giriyor
+    elapsed: float = 0.0
+
+    @property
+    def portal_reachable(self) -> bool:
+        return self.status == "ok"
+
+
+_probe_lock = threading.Lock()
+_last_probe: Optional[Tuple[float, ProbeResult]] = None
+
+
+def _resolve(host: str, port: int, timeout: float) -> List[Tuple]:
+    """getaddrinfo with a timeout (the resolver call itself cannot be interrupted)."""
+
+    result: List[Tuple] = []
+    error: List[BaseException] = []
+
+    def worker() -> None:
+        try:
+            result.extend(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        except OSError as e:
+            error.append(e)
+
+    thread = threading.Thread(target=worker, name="probe-dns", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise socket.timeout(f"DNS cozumlemesi {timeout} sn icinde bitmedi")
+    if error:
+        raise error[0]
+    return result
+
+
+def check_captive_portal(timeout: float = PROBE_TIMEOUT) -> Optional[bool]:
+    """HTTP 204 check: True if the internet is open, False if intercepted, None if unknown."""
+    import http.client
+
+    url = urllib.parse.urlsplit(CAPTIVE_CHECK_URL)
+    connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(url.netloc, timeout=timeout)
+    try:
+        connection.request("GET", url.path or "/", headers={"User-Agent": USER_AGENT})
+        response = connection.getresponse()
+        body = response.read(512)
+        return response.status == 204 and not body
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def probe_portal(timeout: float = PROBE_TIMEOUT, captive_check: bool = True) -> ProbeResult:
+    """Resolve the portal host, open a TCP connection to it and optionally run the 204 check."""
+
+    started = time.monotonic()
+    url = urllib.parse.urlsplit(PORTAL_BASE_URL)
+    host = url.hostname or ""
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        addresses = _resolve(host, port, timeout)
+    except OSError as e:
+        return ProbeResult("dns_failed", f"{host}: {e}", elapsed=time.monotonic() - started)
+
+    last_error: Optional[OSError] = None
+    for family, socktype, proto, _, address in addresses[:3]:
+        try:
+            with socket.socket(family, socktype, proto) as sock:
+                sock.settimeout(timeout)
+                sock.connect(address)
+            break
+        except OSError as e:
+            last_error = e
+    else:
+        return ProbeResult("tcp_failed", f"{host}:{port}: {last_error}", elapsed=time.monotonic() - started)
+
+    internet = check_captive_portal(timeout) if captive_check else None
+    return ProbeResult("ok", f"{host}:{port}", internet=internet, elapsed=time.monotonic() - started)
+
+
+def portal_reachable() -> bool:
+    """Gate for login attempts: probe (cached for PROBE_CACHE_TTL) and log why the portal is unreachable."""
+
+    global _last_probe
+    if not PROBE_ENABLED:
+        return True
+    with _probe_lock:
+        now = time.monotonic()
+        if _last_probe is None or now - _last_probe[0] > PROBE_CACHE_TTL:
+            # 204 kontrolu burada yapilmaz: giris yapilmadan once KYK portali da tum istekleri
+            # yonlendirir, yani "internet yok" sonucu girise engel degil, giris gerektigini
+            # gosterir; baska bir captive portali KYK'ninkinden ayiramaz. Ayrica her giris
+            # denemesine portal disindaki bir adrese giden, PROBE_TIMEOUT'a kadar suren bir
+            # istek eklerdi. 204 kontrolu yalnizca --probe ile yapilir.
+            _last_probe = (now, probe_portal(captive_check=False))
+        result = _last_probe[1]
+    if not result.portal_reachable:
+        note_outcome("unreachable")
+        logging.error(f"KYK portalina ulasilamiyor ({result.status}: {result.detail}). KYK Wi-Fi agina bagli oldugunuzdan emin olun.")
+    return result.portal_reachable
+
+
+def run_probe_once() -> int:
+    """Entry point for --probe: print the connectivity probe result and exit."""
+
+    result = probe_portal()
+    internet_text = {True: "acik (204)", False: "captive portal (giris gerekli)", None: "bilinmiyor"}[result.internet]
+    print(f"Portal: {result.status} ({result.detail})")
+    if result.portal_reachable:
+        print(f"Internet: {internet_text}")
+    print(f"Sure: {result.elapsed * 1000:.0f} ms")
+    return 0 if result.portal_reachable else 1
+
+
+# --- Ag Degisikligi Izleme --- #
+# Linux'ta arayuz, adres ve varsayilan rota degisiklikleri netlink (rtnetlink) soketinden
+# olay olarak alinir; netlink kullanilamazsa /sys/class/net ve /proc/net/route yoklanir.
+# Ag degistiginde bekleyen uykular (keep-alive, yeniden deneme) hemen uyandirilir, on
+# kontrol onbellegi ve devre kesici sifirlanir; oturum dusmusse bir sonraki adim yeniden
+# giris yapar. Boylece yeniden baglanma dakikalar yerine saniyeler icinde fark edilir.
+# Olaylar yalnizca yeniden kontrolu tetikler: arayuz durumlari, adresler ve varsayilan
+# rotalar gercekten degismediyse (ornegin IPv6 RA ile adres omru yenilendiyse) hicbir
+# sey sifirlanmaz.
+NETWORK_WATCH_ENABLED = os.environ.get("KYK_NETWORK_WATCH", "1") != "0" # KYK_NETWORK_WATCH=0 izlemeyi kapatir
+NETWORK_EVENT_DEBOUNCE = 1.0 # Arka arkaya gelen olaylar bu sure boyunca tek degisiklik sayilir (saniye)
+NETWORK_POLL_INTERVAL = 2.0 # Netlink yoksa /sys/class/net yoklama araligi (saniye)
+RTMGRP_GROUPS = 0x1 | 0x10 | 0x40 | 0x100 | 0x400 # LINK, IPV4_IFADDR, IPV4_ROUTE, IPV6_IFADDR, IPV6_ROUTE
+NLMSG_HEADER = struct.Struct("=LHHLL") # uzunluk, tur, bayraklar, sira, pid
+IFINFO_MSG = struct.Struct("=BxHiII") # aile, tur, arayuz, bayraklar, degisen bayraklar
+IFADDR_MSG = struct.Struct("=BBBBI") # aile, onek uzunlugu, bayraklar, kapsam, arayuz
+ROUTE_MSG = struct.Struct("=BBBBBBBBI") # aile, hedef onek uzunlugu, ..., tablo, ...
+RTM_LINK_TYPES = (16, 17) # RTM_NEWLINK, RTM_DELLINK
+RTM_ADDR_TYPES = (20, 21) # RTM_NEWADDR, RTM_DELADDR
+RTM_ROUTE_TYPES = (24, 25) # RTM_NEWROUTE, RTM_DELROUTE
+RTM_GETADDR = 22
+NLM_F_REQUEST_DUMP = 0x1 | 0x300 # NLM_F_REQUEST | NLM_F_DUMP
+NLMSG_DONE_TYPES = (2, 3) # NLMSG_ERROR, NLMSG_DONE
+RTA_HEADER = struct.Struct("=HH") # uzunluk, tur
+IFA_ADDRESS, IFA_LOCAL = 1, 2
+IFF_UP_RUNNING = 0x1 | 0x40 | 0x10000 # IFF_UP, IFF_RUNNING, IFF_LOWER_UP
+RT_SCOPE_HOST = 254
+RT_TABLE_MAIN = 254
+network_watcher: Optional["NetworkWatcher"] = None
+
+
+def describe_netlink_events(data: bytes) -> List[str]:
+    """Relevant changes in one rtnetlink datagram (link up/down, address, default route)."""
+
+    events: List[str] = []
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length, msg_type, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+        if length < NLMSG_HEADER.size:
+            break
+        body = offset + NLMSG_HEADER.size
+        if msg_type in RTM_LINK_TYPES and body + IFINFO_MSG.size <= len(data):
+            _, _, index, flags, change = IFINFO_MSG.unpack_from(data, body)
+            if msg_type == 17 or change & IFF_UP_RUNNING:
+                events.append(f"arayuz {index} {'acik' if flags & 0x40 else 'kapali'}")
+        elif msg_type in RTM_ADDR_TYPES and body + IFADDR_MSG.size <= len(data):
+            _, _, _, scope, index = IFADDR_MSG.unpack_from(data, body)
+            if scope != RT_SCOPE_HOST:
+                events.append(f"arayuz {index} adres {'eklendi' if msg_type == 20 else 'silindi'}")
+        elif msg_type in RTM_ROUTE_TYPES and body + ROUTE_MSG.size <= len(data):
+            _, dst_len, _, _, table, *_ = ROUTE_MSG.unpack_from(data, body)
+            if dst_len == 0 and table == RT_TABLE_MAIN:
+                events.append(f"varsayilan rota {'eklendi' if msg_type == 24 else 'silindi'}")
+        offset += (length + 3) & ~3 # Mesajlar 4 bayta hizalanir
+    return events
+
+
+def netlink_attributes(data: bytes) -> Dict[int, bytes]:
+    """Parse rtnetlink attributes (rtattr) into {type: payload}."""
+
+    attributes: Dict[int, bytes] = {}
+    offset = 0
+    while offset + RTA_HEADER.size <= len(data):
+        length, kind = RTA_HEADER.unpack_from(data, offset)
+        if length < RTA_HEADER.size:
+            break
+        attributes[kind] = data[offset + RTA_HEADER.size:offset + length]
+        offset += (length + 3) & ~3
+    return attributes
+
+
+def netlink_addresses() -> List[Tuple[str, str]]:
+    """Non-host-scope IPv4/IPv6 addresses as (interface index, address) via an RTM_GETADDR dump."""
+
+    addresses: List[Tuple[str, str]] = []
+    try:
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as sock:
+            sock.settimeout(1.0)
+            sock.send(
+                NLMSG_HEADER.pack(NLMSG_HEADER.size + IFADDR_MSG.size, RTM_GETADDR, NLM_F_REQUEST_DUMP, 1, 0)
+                + IFADDR_MSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+            )
+            while True:
+                data = sock.recv(65536)
+                offset = 0
+                while offset + NLMSG_HEADER.size <= len(data):
+                    length, msg_type, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+                    if length < NLMSG_HEADER.size or msg_type in NLMSG_DONE_TYPES:
+                        return sorted(addresses)
+                    body = offset + NLMSG_HEADER.size
+                    if msg_type == RTM_ADDR_TYPES[0] and body + IFADDR_MSG.size <= len(data):
+                        family, _, _, scope, index = IFADDR_MSG.unpack_from(data, body)
+                        attributes = netlink_attributes(data[body + IFADDR_MSG.size:offset + length])
+                        raw = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+                        if scope != RT_SCOPE_HOST and raw:
+                            addresses.append((f"addr:{index}", socket.inet_ntop(family, raw)))
+                    offset += (length + 3) & ~3
+    except (AttributeError, OSError, ValueError) as e:
+        logging.debug(f"Netlink adres listesi alinamadi: {e}")
+    return sorted(addresses)
+
+
+def network_state() -> FrozenSet[Tuple[str, str]]:
+    """Interface states, addresses and IPv4/IPv6 default routes; compared to detect real changes."""
+
+    state = set(network_snapshot())
+    state.update(netlink_addresses())
+    try:
+        for line in Path("/proc/net/ipv6_route").read_text().splitlines():
+            fields = line.split()
+            if len(fields) == 10 and fields[0] == "0" * 32 and fields[1] == "00" and fields[9] != "lo":
+                state.add((f"default6:{fields[9]}", fields[4]))
+    except OSError:
+        pass
+    return frozenset(state)
+
+
+def network_snapshot() -> Tuple[Tuple[str, str], ...]:
+    """Operstate of every non-loopback interface plus the IPv4 default routes."""
+
+    state: List[Tuple[str, str]] = []
+    try:
+        for entry in sorted(Path("/sys/class/net").iterdir()):
+            if entry.name == "lo":
+                continue
+            try:
+                state.append((entry.name, (entry / "operstate").read_text().strip()))
+            except OSError:
+                continue
+    except OSError:
+        pass
+    try:
+        for line in Path("/proc/net/route").read_text().splitlines()[1:]:
+            fields = line.split()
+            if len(fields) > 2 and fields[1] == "00000000":
+                state.append((f"default:{fields[0]}", fields[2]))
+    except OSError:
+        pass
+    return tuple(state)
+
+
+class NetworkWatcher:
+    """Background thread that turns network changes into an immediate wake-up of the main loop."""
+
+    def __init__(self) -> None:
+        self.generation = 0 # Her ag degisikliginde artar; bekleyenler bu sayaci karsilastirir
+        self._state: FrozenSet[Tuple[str, str]] = frozenset()
+        self._stop = threading.Event()
+        self._socket: Optional[socket.socket] = None
+        try:
+            self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            self._socket.bind((0, RTMGRP_GROUPS))
+        except (AttributeError, OSError) as e:
+            logging.debug(f"Netlink soketi acilamadi, /sys/class/net yoklanacak: {e}")
+            if self._socket is not None:
+                self._socket.close()
+            self._socket = None
+        self.backend = "netlink" if self._socket is not None else "poll"
+        self._thread = threading.Thread(target=self._run, name="network-watcher", daemon=True)
+
+    def start(self) -> "NetworkWatcher":
+        self._thread.start()
+        logging.debug(f"Ag degisikligi izleme baslatildi ({self.backend}).")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=NETWORK_POLL_INTERVAL + 1)
+        if self._socket is not None:
+            self._socket.close()
+
+    def _run(self) -> None:
+        try:
+            self._state = network_state()
+            if self._socket is not None:
+                self._watch_netlink(self._socket)
+            else:
+                self._poll()
+        except Exception as e:
+            logging.warning(f"Ag degisikligi izleme durdu: {e}")
+            logging.debug("Ag izleme hatasi:", exc_info=True)
+
+    def _watch_netlink(self, sock: socket.socket) -> None:
+        pending: List[str] = []
+        deadline: Optional[float] = None
+        while not self._stop.is_set():
+            timeout = NETWORK_POLL_INTERVAL if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([sock], [], [], timeout)
+            if readable:
+                events = describe_netlink_events(sock.recv(65536))
+                if events and deadline is None:
+                    deadline = time.monotonic() + NETWORK_EVENT_DEBOUNCE
+                pending.extend(events)
+            if deadline is not None and time.monotonic() >= deadline:
+                self._check(", ".join(dict.fromkeys(pending)))
+                pending.clear()
+                deadline = None
+
+    def _poll(self) -> None:
+        while not self._stop.wait(NETWORK_POLL_INTERVAL):
+            self._check()
+
+    def _check(self, events: str = "") -> None:
+        current = network_state()
+        if current == self._state:
+            if events:
+                logging.debug(f"Ag olaylari ({events}) adres veya rotalari degistirmedi, yok sayiliyor.")
+            return
+        changes = sorted(current ^ self._state)
+        self._state = current
+        self._changed(events or ", ".join(f"{name}={value}" for name, value in changes))
+
+    def _changed(self, description: str) -> None:
+        global _last_probe
+        logging.info(f"Ag degisikligi algilandi ({description}). Oturum hemen kontrol edilecek.")
+        with _probe_lock:
+            _last_probe = None
+        PORTAL_BREAKER.reset()
+        self.generation += 1
+        interrupt_sleep()
+
+
+def start_network_watcher() -> Optional[NetworkWatcher]:
+    """Start the process-wide NetworkWatcher on Linux (no-op elsewhere or when disabled)."""
+
+    global network_watcher
+    if network_watcher is None and NETWORK_WATCH_ENABLED and sys.platform.startswith("linux"):
+        network_watcher = NetworkWatcher().start()
+    return network_watcher
+
+
+def network_generation() -> int:
+    """Current network change counter (0 when no watcher is running)."""
+
+    return network_watcher.generation if network_watcher is not None else 0
+
+
+# --- Istek Baslik Profilleri --- #
+# Ortak basliklar (BASE_HEADERS) oturum olusturulurken bir kez oturum varsayilani olarak
+# kurulur. Her istek turune ozgu basliklar modul yuklenirken bir kez hesaplanir ve
+# degistirilemez (MappingProxyType) olarak saklanir; keep-alive adimlarinda sozluk
+# yeniden olusturulmaz.
+LOGIN_GET_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Accept': NAVIGATE_ACCEPT,
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1',
+})
+LOGIN_POST_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Accept': NAVIGATE_ACCEPT,
+    'Cache-Control': 'max-age=0',
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'Origin': PORTAL_BASE_URL,
+    'Referer': LOGIN_URL,
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'same-origin',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1',
+})
+VIEWSTATE_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Accept': NAVIGATE_ACCEPT,
+    'Referer': LOGIN_URL,
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'same-origin',
+    'Upgrade-Insecure-Requests': '1',
+})
+AJAX_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Accept': "application/xml, text/xml, */*; q=0.01",
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'Faces-Request': 'partial/ajax',
+    'Origin': PORTAL_BASE_URL,
+    'Referer': SUCCESS_URL,
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-origin',
+    'X-Requested-With': 'XMLHttpRequest',
+})
+
+
+def logout_headers(jsessionid_value: str) -> Dict[str, str]:
+    """Headers for the logout GET; the session is identified only by the Cookie header."""
+
+    return {'Accept': NAVIGATE_ACCEPT, 'Cookie': f'JSESSIONID={jsessionid_value}'}
+
+
+def ajax_form_data(view_state: str) -> Dict[str, str]:
+    """Form fields of the quota AJAX request for the given ViewState."""
+
+    return {
+        'javax.faces.partial.ajax': 'true',
+        'javax.faces.source': 'mainPanel:kota:j_idt122',
+        'javax.faces.partial.execute': '@all',
+        'javax.faces.partial.render': 'mainPanel:kota',
+        'mainPanel:kota:j_idt122': 'mainPanel:kota:j_idt122',
+        'mainPanel:kota': 'mainPanel:kota',
+        'javax.faces.ViewState': view_state
+    }
+
+
+def contains_credential_error(body_text: str) -> bool:
+    """Portalin dondurdugu sayfada hatali giris mesaji olup olmadigini kontrol eder."""
+
+    lowered = body_text.lower()
+    return any(fragment in lowered for fragment in CREDENTIAL_ERROR_FRAGMENTS)
+
+
+def save_jsessionid(jsessionid: Optional[str], session_file: Optional[Path]) -> None:
+    """Persist the JSESSIONID of a fresh login (no-op when session_file is None)."""
+
+    if jsessionid and session_file is None:
+        logging.debug("Oturum kimligi dosyaya yazilmadi (coklu hesap modu).")
+    elif jsessionid:
+        try:
+            with open(session_file, "w") as f:
+                f.write(jsessionid)
+            logging.info(f"Oturum kimligi {session_file} dosyasina kaydedildi.")
+        except Exception as e:
+            logging.error(f"{session_file} dosyasina oturum kimligi kaydedilemedi: {e}")
+    else:
+        logging.warning("Basarili giristen sonra oturumda JSESSIONID cerezi bulunamadi.")
+
+
+def remove_session_file(suffix: str = "", jsessionid: Optional[str] = None) -> None:
+    """Delete SESSION_FILE_PATH after a logout (only if it holds `jsessionid`, when given)."""
+
+    try:
+        if jsessionid is not None and SESSION_FILE_PATH.exists() and SESSION_FILE_PATH.read_text(encoding="utf-8").strip() != jsessionid:
+            return # Dosya baska bir oturuma ait (ornegin coklu hesap veya toplu dogrulama)
+        if SESSION_FILE_PATH.exists():
+            SESSION_FILE_PATH.unlink()
+            logging.info(f"(Logout) Oturum dosyasi {suffix}silindi: {SESSION_FILE_PATH}")
+    except Exception as e:
+        logging.warning(f"(Logout) Oturum dosyasi {SESSION_FILE_PATH} silinemedi: {e}")
+
+
+def parse_viewstate_html(html_text: str) -> Optional[str]:
+    """SUCCESS_URL sayfasinin HTML'inden javax.faces.ViewState degerini cikarir."""
+
+    soup = bs4.BeautifulSoup(html_text, 'html.parser')
+    viewstate_input = soup.find('input', {'name': 'javax.faces.ViewState'})
+
+    if viewstate_input and 'value' in viewstate_input.attrs:
+        vs_value = viewstate_input['value']
+        logging.info(f"Ilk ViewState degeri bulundu.")
+        logging.debug(f"Tam ViewState: ...{vs_value[-20:]}") # Sadece sonunu logla
+        return vs_value
+    logging.error("Sayfa HTML'inde javax.faces.ViewState input'u bulunamadi.")
+    logging.debug(f"ViewState aranan HTML (ilk 500 char):\n{html_text[:500]}")
+    return None
+
+
+# ViewState akis (stream) taramasi: SUCCESS_URL sayfasi parca parca okunur ve gizli
+# javax.faces.ViewState input'u gorulur gorulmez tarama (ayristirma) durdurulur. Sayfanin
+# kalani taranmadan okunup atilir; govdesi okunmamis baglanti havuza geri donemez ve her
+# ViewState istegi yeni bir TCP/TLS baglantisi acmak zorunda kalir.
+VIEWSTATE_CHUNK_SIZE = 8192
+VIEWSTATE_DRAIN_LIMIT = 256 * 1024 # ViewState bulunduktan sonra en fazla bu kadar bayt okunup atilir
+VIEWSTATE_INPUT_PATTERN = re.compile(rb"""<input\b[^>]*\bname=["']javax\.faces\.ViewState["'][^>]*>""", re.I)
+VIEWSTATE_VALUE_PATTERN = re.compile(rb"""\bvalue=["']([^"']*)["']""", re.I)
+
+
+class ViewStateScanner:
+    """Incrementally scans page chunks for the javax.faces.ViewState hidden input."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan_from = 0
+
+    @property
+    def bytes_read(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """Add a chunk; return the ViewState as soon as the complete input tag has been seen."""
+
+        self._buffer += chunk
+        while True:
+            match = VIEWSTATE_INPUT_PATTERN.search(self._buffer, self._scan_from)
+            if not match:
+                break
+            value_match = VIEWSTATE_VALUE_PATTERN.search(match.group(0))
+            if value_match:
+                return html.unescape(value_match.group(1).decode("utf-8", errors="replace"))
+            self._scan_from = match.end()
+        # Parcalar arasinda bolunmus bir etiketi kacirmamak icin son '<' isaretinden itibaren tekrar tara
+        last_tag_start = self._buffer.rfind(b"<", self._scan_from)
+        if last_tag_start != -1:
+            self._scan_from = last_tag_start
+        return None
+
+    def text(self, encoding: Optional[str] = None) -> str:
+        return bytes(self._buffer).decode(encoding or "utf-8", errors="replace")
+
+
+def drain_chunks(chunks: Iterator[bytes], limit: int = VIEWSTATE_DRAIN_LIMIT) -> bool:
+    """Discard the rest of a streamed body; True when it ended within `limit` bytes.
+
+    A fully read response hands its connection back to the pool; a longer body is
+    abandoned and the connection is closed instead.
+    """
+    drained = 0
+    for chunk in chunks:
+        drained += len(chunk)
+        if drained > limit:
+            return False
+    return True
+
+
+# JSF partial-response icin hizli yol (fast path) kaliplari. Yanit her keep-alive
+# adiminda geldigi icin once bu kaliplar denenir; tutmazsa BeautifulSoup kullanilir.
+PARTIAL_UPDATE_PATTERN = re.compile(
+    r"""<update\s+id=["']([^"']+)["']\s*>\s*<!\[CDATA\[(.*?)\]\]>\s*</update>""",
+    re.S,
+)
+QUOTA_VALUE_PATTERN = re.compile(
+    r"<label[^>]*>[^<]*Toplam Kalan Kota \(MB\):[^<]*</label>\s*</td>\s*<td[^>]*>"
+    r"(?:(?!</td>).)*?<label[^>]*>\s*([^<&]*?)\s*</label>",
+    re.S,
+)
+
+
+def fast_parse_quota_response(content: bytes) -> Optional[Tuple[Dict[str, str], str]]:
+    """Single-pass regex extraction of quota and new ViewState; None when the fast path misses."""
+
+    text = content.decode("utf-8", errors="replace")
+    updates = {update_id: body for update_id, body in PARTIAL_UPDATE_PATTERN.findall(text)}
+    quota_html = updates.get('mainPanel:kota')
+    new_view_state = updates.get('j_id1:javax.faces.ViewState:0', '').strip()
+    if not quota_html or not new_view_state or "]]>" in quota_html or "]]>" in new_view_state:
+        return None
+    match = QUOTA_VALUE_PATTERN.search(quota_html)
+    if not match or not match.group(1):
+        return None
+    return {"Toplam Kalan Kota": f"{match.group(1)} MB"}, new_view_state
+
+
+def parse_quota_response(content: bytes, current_view_state: str) -> QuotaResult:
+    """JSF partial-response icindeki kota degerini ve yeni ViewState'i cikarir."""
+
+    parse_started = time.perf_counter()
+    try:
+        return _parse_quota_response(content, current_view_state)
+    finally:
+        METRICS.observe("quota", "parse", time.perf_counter() - parse_started)
+
+
+def _parse_quota_response(content: bytes, current_view_state: str) -> QuotaResult:
+    fast_result = fast_parse_quota_response(content)
+    if fast_result:
+        METRICS.count("quota_parse", "fast_path")
+        quota_dict, new_view_state = fast_result
+        logging.debug(f"AJAX'tan cikarilan kota degeri (hizli yol): {quota_dict['Toplam Kalan Kota']}")
+        logging.debug(f"AJAX yanitindan yeni ViewState alindi: ...{new_view_state[-20:]}")
+        return quota_dict, new_view_state
+    logging.debug("Hizli AJAX ayristirma basarisiz, BeautifulSoup ile ayristiriliyor.")
+    METRICS.count("quota_parse", "fallback")
+
+    BeautifulSoup = bs4.BeautifulSoup # bs4 (ve kuruluysa lxml) burada yuklenir
+    parser = 'lxml-xml' if 'lxml' in sys.modules else 'xml'
+    soup_xml = BeautifulSoup(content, parser)
+
+    quota_update = soup_xml.find('update', {'id': 'mainPanel:kota'})
+    new_viewstate_update = soup_xml.find('update', {'id': 'j_id1:javax.faces.ViewState:0'})
+
+    quota_html_content = None
+    if quota_update and quota_update.string:
+        quota_html_content = quota_update.string
+    else:
+        logging.error("AJAX yanitinda 'mainPanel:kota' update'i bulunamadi veya bos.")
+        new_vs = None
+        if new_viewstate_update and new_viewstate_update.string:
+             new_vs = new_viewstate_update.string
+             logging.debug(f"Yeni ViewState alindi (kota update'i olmadan): ...{new_vs[-20:]}")
+        else:
+             logging.warning("AJAX yanitinda ViewState update'i de bulunamadi.")
+        return None, new_vs
+
+    new_view_state = None
+    if new_viewstate_update and new_viewstate_update.string:
+        new_view_state = new_viewstate_update.string
+        logging.debug(f"AJAX yanitindan yeni ViewState alindi: ...{new_view_state[-20:]}")
+    else:
+        logging.error("AJAX yanitinda ViewState update'i bulunamadi! Sonraki istekler basarisiz olabilir.")
+        new_view_state = current_view_state
+
+    quota_value = None
+    if quota_html_content:
+        soup_html = BeautifulSoup(quota_html_content, 'html.parser')
+        try:
+            target_label_text = "Toplam Kalan Kota (MB):"
+            label_element = soup_html.find('label', string=lambda t: t and target_label_text in t.strip())
+            if label_element:
+                parent_td = label_element.find_parent('td')
+                if parent_td:
+                    value_td = parent_td.find_next_sibling('td')
+                    if value_td:
+                        value_label = value_td.find('label')
+                        if value_label:
+                            quota_mb = value_label.get_text(strip=True)
+                            quota_value = f"{quota_mb} MB"
+                            logging.debug(f"AJAX'tan cikarilan kota degeri: {quota_value}")
+                        else: logging.warning("AJAX HTML'inde deger label'i bulunamadi.")
+                    else: logging.warning("AJAX HTML'inde deger TD'si bulunamadi.")
+                else: logging.warning("AJAX HTML'inde parent TD bulunamadi.")
+            else:
+                logging.warning(f"AJAX HTML'i icinde '{target_label_text}' etiketi bulunamadi.")
+                logging.debug(f"AJAX HTML Content for Quota:\n{quota_html_content}")
+        except Exception as e_html_parse:
+            logging.warning(f"Kota HTML'i parse edilirken hata: {e_html_parse}")
+            logging.debug(f"Kota parse hatasi alan HTML: {quota_html_content}", exc_info=True)
+
+    quota_dict = None
+    if quota_value:
+        quota_dict = {"Toplam Kalan Kota": quota_value}
+
+    return quota_dict, new_view_state
+
+
 # KYK Wi-Fi Portalina Giris Islemi
-def login_attempt(session: requests.Session) -> bool | str:
-    """Verilen oturum (session) ile KYK Wi-Fi portalina giris yapmayi dener."""
+@portal_call("login")
+def login_attempt(
+    session: requests.Session,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    session_file: Optional[Path] = SESSION_FILE_PATH,
+) -> bool | str:
+    """Verilen oturum (session) ile KYK Wi-Fi portalina giris yapmayi dener.
+
+    Kullanici adi/sifre verilmezse global USERNAME/PASSWORD kullanilir. Coklu hesap
+    modunda session_file=None verilerek tek JSESSIONID dosyasinin ezilmesi engellenir.
+    """
+    if username is None:
+        username = USERNAME
+    if password is None:
+        password = PASSWORD
+    if not portal_reachable():
+        return False # Portal ag uzerinden erisilemiyor; REQUEST_TIMEOUT kadar beklemeye gerek yok
     try:
         logging.info(f"Giris sayfasi aliniyor: {LOGIN_URL}")
-        headers_get = compose_headers(
-            Accept="text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            **{
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-            }
-        )
+        headers_get = LOGIN_GET_HEADERS
         response_get = session.get(LOGIN_URL, headers=headers_get, timeout=REQUEST_TIMEOUT, verify=True)
         response_get.raise_for_status()
         logging.info("Giris sayfasi basariyla alindi. Ilk cerezler (cookies) alindi.")
 
         login_data = {
-            'j_username': USERNAME,
-            'j_password': PASSWORD,
+            'j_username': username,
+            'j_password': password,
             'submit': 'Giris'
         }
-        headers_post = compose_headers(
-            Accept="text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            **{
-                'Cache-Control': 'max-age=0',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Origin': 'https://wifi.gsb.gov.tr',
-                'Referer': LOGIN_URL,
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'same-origin',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-            }
-        )
 
         logging.info(f"Giris bilgileri gonderiliyor: {CHECK_URL}")
         response_post = session.post(
             CHECK_URL,
-            headers=headers_post,
+            headers=LOGIN_POST_HEADERS,
             data=login_data,
             timeout=REQUEST_TIMEOUT,
             allow_redirects=False,
@@ -379,16 +1832,7 @@ def login_attempt(session: requests.Session) -> bool | str:
         # Check for exact match to avoid considering error pages as success
         if response_post.status_code == 302 and redirect_location and redirect_location == BASE_SUCCESS_URL:
             logging.info(f"Giris basarili! Oturum acildi (Yonlendirme: {redirect_location}).")
-            jsessionid = session.cookies.get('JSESSIONID')
-            if jsessionid:
-                try:
-                    with open(SESSION_FILE_PATH, "w") as f:
-                        f.write(jsessionid)
-                    logging.info(f"Oturum kimligi {SESSION_FILE_PATH} dosyasina kaydedildi.")
-                except Exception as e:
-                    logging.error(f"{SESSION_FILE_PATH} dosyasina oturum kimligi kaydedilemedi: {e}")
-            else:
-                logging.warning("Basarili giristen sonra oturumda JSESSIONID cerezi bulunamadi.")
+            save_jsessionid(session.cookies.get('JSESSIONID'), session_file)
             return True
         else:
             logging.warning(f"Giris basarisiz. Durum: {response_post.status_code}, Beklenen Yonlendirme (benzeri): {BASE_SUCCESS_URL}, Gelen Yonlendirme: {redirect_location}")
@@ -402,9 +1846,7 @@ def login_attempt(session: requests.Session) -> bool | str:
                     # Fetch the content of the redirected page to confirm
                     error_page_resp = session.get(redirect_location, headers=headers_get, timeout=REQUEST_TIMEOUT, verify=True)
                     body_text = error_page_resp.text
-                    if "hatali kullanici adi veya sifre" in body_text.lower() or \
-                       "gecersiz kullanici adi veya parola" in body_text.lower() or \
-                       "kimlik bilgileri dogrulanamadi" in body_text.lower():
+                    if contains_credential_error(body_text):
                         logging.warning("Geri yonlendirilen sayfada hatali giris bilgisi mesaji tespit edildi.")
                         error_message_found = True
                     else:
@@ -416,9 +1858,7 @@ def login_attempt(session: requests.Session) -> bool | str:
             elif response_post.status_code != 302: # Check body only if not a redirect
                 try:
                     body_text = response_post.text
-                    if "hatali kullanici adi veya sifre" in body_text.lower() or \
-                       "gecersiz kullanici adi veya parola" in body_text.lower() or \
-                       "kimlik bilgileri dogrulanamadi" in body_text.lower():
+                    if contains_credential_error(body_text):
                         logging.warning("Yanit iceriginde hatali giris bilgisi mesaji tespit edildi.")
                         is_credential_error = True
                         error_message_found = True
@@ -437,9 +1877,11 @@ def login_attempt(session: requests.Session) -> bool | str:
             return False
 
     except requests.exceptions.Timeout:
+        note_outcome("timeout")
         logging.error(f"Ag istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi. Internet baglantinizi kontrol edin.")
         return False
     except requests.exceptions.ConnectionError as e:
+        note_outcome("connection_error")
         logging.error(f"Ag baglanti hatasi: {e}. KYK Wi-Fi agina bagli oldugunuzdan ve portalin erisilebilir oldugundan emin olun.")
         return False
     except requests.exceptions.RequestException as e:
@@ -450,210 +1892,1268 @@ def login_attempt(session: requests.Session) -> bool | str:
         return False
 
 # Oturumun Aktif Kalmasi Icin Gerekli Bilgiyi (ViewState) Alma
+@portal_call("viewstate")
 def get_initial_viewstate(session: requests.Session) -> Optional[str]:
     """Basarili giristen sonra ana sayfadan ilk ViewState degerini alir."""
     try:
         logging.info(f"Basarili giris sayfasi ({SUCCESS_URL}) aliniyor (ViewState icin)...")
-        headers = compose_headers(
-            Accept="text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            Referer=LOGIN_URL,
-            **{
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'same-origin',
-                'Upgrade-Insecure-Requests': '1',
-            }
-        )
-        response = session.get(SUCCESS_URL, headers=headers, timeout=REQUEST_TIMEOUT, verify=True)
+        with session.get(SUCCESS_URL, headers=VIEWSTATE_HEADERS, timeout=REQUEST_TIMEOUT, verify=True, stream=True) as response:
+            response.raise_for_status()
+
+            if LOGIN_URL in response.url:
+                 logging.error("ViewState alinirken giris sayfasina yonlendirildi! Oturum kaybolmus olabilir.")
+                 return None
+
+            scanner = ViewStateScanner()
+            chunks = response.iter_content(chunk_size=VIEWSTATE_CHUNK_SIZE)
+            for chunk in chunks:
+                vs_value = scanner.feed(chunk)
+                if vs_value:
+                    logging.info("Ilk ViewState degeri bulundu.")
+                    logging.debug(f"Tam ViewState: ...{vs_value[-20:]} ({scanner.bytes_read} bayt tarandi)")
+                    note_portal_activity(session)
+                    if not drain_chunks(chunks):
+                        logging.debug("Sayfanin kalani cok buyuk; baglanti havuza iade edilmeden kapatiliyor.")
+                    return vs_value
+
+            logging.debug("Akis taramasinda ViewState bulunamadi, tum sayfa ayristiriliyor.")
+            vs_value = parse_viewstate_html(scanner.text(response.encoding))
+            if vs_value:
+                note_portal_activity(session)
+            return vs_value
+
+    except requests.exceptions.RequestException as e:
+        if isinstance(e, requests.exceptions.Timeout):
+            note_outcome("timeout")
+        logging.error(f"ViewState almak icin sayfa getirilirken hata: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"ViewState parse edilirken hata: {e}", exc_info=True)
+        return None
+
+# Kota Bilgisini Internetten Sorgulama
+@portal_call("quota")
+def get_quota_ajax(session: requests.Session, current_view_state: Optional[str]) -> QuotaResult:
+    """Verilen ViewState ile AJAX kullanarak kota bilgisini sorgular."""
+    if not current_view_state:
+        logging.error("AJAX istegi icin ViewState mevcut degil.")
+        return None, None
+
+    logging.debug("Kota bilgisi icin AJAX istegi gonderiliyor...")
+    try:
+        response = session.post(SUCCESS_URL, headers=AJAX_HEADERS, data=ajax_form_data(current_view_state), timeout=REQUEST_TIMEOUT, verify=True)
+
+        if response.headers.get('Content-Type', '').startswith('text/html'):
+            logging.error("AJAX istegine XML yerine HTML yaniti alindi. Oturum zaman asimina ugramis olabilir.")
+            return "SESSION_EXPIRED", None
+
         response.raise_for_status()
+        logging.debug(f"AJAX yanit durumu: {response.status_code}")
+
+        result = parse_quota_response(response.content, current_view_state)
+        if isinstance(result[0], dict):
+            note_portal_activity(session)
+        return result
 
-        if LOGIN_URL in response.url:
-             logging.error("ViewState alinirken giris sayfasina yonlendirildi! Oturum kaybolmus olabilir.")
-             return None
+    except requests.exceptions.Timeout:
+        note_outcome("timeout")
+        logging.error(f"AJAX istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi.")
+        return None, current_view_state
+    except requests.exceptions.RequestException as e:
+        logging.error(f"AJAX istegi sirasinda hata: {e}")
+        return None, current_view_state
+    except Exception as e:
+        logging.error(f"AJAX yaniti islenirken hata: {e}", exc_info=True)
+        return None, current_view_state
+
+# KYK Wi-Fi Oturumunu Kapatma Islemi
+@portal_call("logout")
+def perform_logout(jsessionid_value: str, timeout: float = LOGOUT_TIMEOUT) -> bool:
+    """Verilen oturum kimligi (JSESSIONID) ile KYK Wi-Fi portalindan cikis yapmayi dener."""
+    if not jsessionid_value:
+        logging.error("(Logout) Oturum kimligi (JSESSIONID) degeri bos olamaz.")
+        return False
+
+    logging.info(f"(Logout) JSESSIONID ile oturum kapatilmaya calisiliyor: ...{jsessionid_value[-6:]}")
+    try:
+        # Her cikis icin ayri bir cerez kutusu, ama ortak baglanti havuzu kullanilir.
+        # Session.close() paylasilan havuzu da kapatacagi icin bu oturum kapatilmaz.
+        logout_session = new_portal_session()
+        response = logout_session.get(LOGOUT_URL, headers=logout_headers(jsessionid_value), timeout=timeout, verify=True)
+        response.raise_for_status()
+
+        clear_session_store(jsessionid_value)
+        if LOGOUT_SUCCESS_FRAGMENT in response.text:
+             logging.info("(Logout) Cikis basarili! Sunucu onay mesaji dondu.")
+             remove_session_file(jsessionid=jsessionid_value)
+             return True
+        else:
+             logging.warning("(Logout) Cikis istegi gonderildi (Yanit Kodu 200 OK), ancak onay mesaji yanitta bulunamadi.")
+             logging.warning("(Logout) Oturum buyuk ihtimalle sunucu tarafindan sonlandirildi, ancak dogrulanamadi.")
+             remove_session_file("(dogrulanamasa da) ", jsessionid=jsessionid_value)
+             return True
+
+    except requests.exceptions.Timeout:
+        note_outcome("timeout")
+        logging.error(f"(Logout) Cikis istegi {timeout:.0f} saniye sonra zaman asimina ugradi.")
+        return False
+    except requests.exceptions.ConnectionError as e:
+        note_outcome("connection_error")
+        logging.error(f"(Logout) Baglanti hatasi nedeniyle cikis basarisiz: {e}.")
+        return False
+    except requests.exceptions.RequestException as e:
+        logging.error(f"(Logout) Cikis istegi sirasinda bir hata olustu: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"(Logout) Cikis sirasinda beklenmeyen bir hata olustu: {e}", exc_info=True)
+        return False
+
+# --- ViewState Yonetimi --- #
+# ViewState'in yasi ve hangi oturuma (JSESSIONID) ait oldugu takip edilir. AJAX yaniti yeni
+# ViewState dondurmediginde veya ViewState eskidiginde yenisi hemen arka planda (ayri
+# thread'de) alinir; boylece bir sonraki keep-alive adimi tek bir AJAX isteginden ibaret kalir.
+VIEWSTATE_MAX_AGE = 20 * 60 # Bu sureden eski ViewState arka planda onceden yenilenir (saniye)
+
+
+class ViewStateManager:
+    """Tracks the ViewState of one session and prefetches a fresh one in the background."""
+
+    def __init__(self, session: requests.Session, max_age: float = VIEWSTATE_MAX_AGE) -> None:
+        self.session = session
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._view_state: Optional[str] = None
+        self._owner: Optional[str] = None # ViewState'in alindigi oturumun JSESSIONID'si
+        self._updated_at = 0.0
+        self._refresh_done: Optional[threading.Event] = None
+
+    def _session_id(self) -> Optional[str]:
+        try:
+            return self.session.cookies.get('JSESSIONID')
+        except requests.cookies.CookieConflictError:
+            return None
+
+    def _current(self) -> Optional[str]:
+        # Oturum sifirlandiysa veya yeniden giris yapildiysa eski ViewState gecersizdir.
+        if self._view_state and self._owner != self._session_id():
+            self._view_state = None
+        return self._view_state
+
+    @property
+    def age(self) -> Optional[float]:
+        with self._lock:
+            if not self._current():
+                return None
+            return time.monotonic() - self._updated_at
+
+    def update(self, view_state: Optional[str]) -> None:
+        """Record a ViewState returned by the portal (initial page or AJAX response)."""
+
+        if not view_state:
+            return
+        owner = self._session_id()
+        with self._lock:
+            self._view_state = view_state
+            self._owner = owner
+            self._updated_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Drop the current ViewState and start fetching a new one right away in the background."""
+
+        with self._lock:
+            self._view_state = None
+        self.refresh_in_background()
+
+    def refresh_if_stale(self) -> None:
+        """Prefetch a new ViewState when the current one is older than max_age."""
+
+        age = self.age
+        if age is not None and age >= self.max_age:
+            logging.debug(f"ViewState {age:.0f} sn once alinmis, arka planda yenileniyor.")
+            self.refresh_in_background()
+
+    def refresh_in_background(self) -> threading.Event:
+        """Start (or join) a background get_initial_viewstate; the event is set when it finishes."""
+
+        with self._lock:
+            if self._refresh_done is not None and not self._refresh_done.is_set():
+                return self._refresh_done
+            done = self._refresh_done = threading.Event()
+        owner = self._session_id()
+        fetcher = self._prefetch_session()
+        threading.Thread(target=self._refresh, args=(done, fetcher, owner), name="viewstate-refresh", daemon=True).start()
+        return done
+
+    def _prefetch_session(self) -> requests.Session:
+        # requests.Session thread-safe degildir: arka plan thread'i ana oturumu kullanmaz, ayni
+        # baglanti havuzunu paylasan ayri bir oturuma cerezlerin kopyasiyla istek atar.
+        fetcher = new_portal_session()
+        fetcher.cookies.update(self.session.cookies)
+        return fetcher
+
+    def _refresh(self, done: threading.Event, fetcher: requests.Session, owner: Optional[str]) -> None:
+        try:
+            view_state = get_initial_viewstate(fetcher)
+            # Bu sirada yeniden giris yapildiysa alinan ViewState eski oturuma aittir.
+            if owner == self._session_id():
+                if last_portal_activity(fetcher) is not None:
+                    note_portal_activity(self.session) # Portal bosta kalma suresini ana oturum icin sifirladi
+                self.update(view_state)
+        finally:
+            done.set()
+
+    def acquire(self, timeout: float = REQUEST_TIMEOUT + 5) -> Optional[str]:
+        """Return a usable ViewState: the current one, the pending prefetch, or a synchronous fetch."""
+
+        with self._lock:
+            view_state = self._current()
+            pending = self._refresh_done if self._refresh_done and not self._refresh_done.is_set() else None
+        if view_state:
+            return view_state
+        if pending is not None:
+            pending.wait(timeout)
+            with self._lock:
+                return self._current()
+        view_state = get_initial_viewstate(self.session)
+        self.update(view_state)
+        return view_state
+
+
+# --- Asenkron (asyncio) Portal Istemcisi --- #
+# Ayni dort portal islevinin httpx.AsyncClient uzerinde calisan surumleri.
+# Donus degerleri senkron surumlerle aynidir; boylece bircok oturum tek bir
+# asyncio dongusunde, thread kullanmadan calistirilabilir. httpx istege baglidir.
+
+def new_async_client() -> "httpx.AsyncClient":
+    """Create an httpx.AsyncClient configured like the requests sessions used above."""
+
+    if httpx is None:
+        raise RuntimeError("Asenkron istemci icin 'httpx' kutuphanesi gerekli. 'pip install httpx' ile yukleyin.")
+    return httpx.AsyncClient(headers=BASE_HEADERS, timeout=REQUEST_TIMEOUT, verify=True, follow_redirects=True)
+
+
+@portal_call("login")
+async def async_login_attempt(
+    client: "httpx.AsyncClient",
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    session_file: Optional[Path] = None,
+) -> bool | str:
+    """Async counterpart of login_attempt; returns True, "CREDENTIAL_ERROR" or False."""
+    import asyncio
+
+    if username is None:
+        username = USERNAME
+    if password is None:
+        password = PASSWORD
+    if not await asyncio.to_thread(portal_reachable):
+        return False # Portal ag uzerinden erisilemiyor; REQUEST_TIMEOUT kadar beklemeye gerek yok
+    try:
+        logging.info(f"(Async) Giris sayfasi aliniyor: {LOGIN_URL}")
+        headers_get = LOGIN_GET_HEADERS
+        response_get = await client.get(LOGIN_URL, headers=headers_get)
+        response_get.raise_for_status()
+
+        login_data = {'j_username': username, 'j_password': password, 'submit': 'Giris'}
+        response_post = await client.post(CHECK_URL, headers=LOGIN_POST_HEADERS, data=login_data, follow_redirects=False)
+        logging.info(f"(Async) Giris POST yanit durumu (status code): {response_post.status_code}")
+
+        redirect_location = response_post.headers.get('Location')
+        if response_post.status_code == 302 and redirect_location == SUCCESS_URL:
+            logging.info(f"(Async) Giris basarili! Oturum acildi (Yonlendirme: {redirect_location}).")
+            save_jsessionid(client.cookies.get('JSESSIONID'), session_file)
+            return True
+
+        logging.warning(f"(Async) Giris basarisiz. Durum: {response_post.status_code}, Gelen Yonlendirme: {redirect_location}")
+        if redirect_location and LOGIN_URL in redirect_location:
+            try:
+                error_page_resp = await client.get(redirect_location, headers=headers_get)
+                if contains_credential_error(error_page_resp.text):
+                    logging.warning("(Async) Geri yonlendirilen sayfada hatali giris bilgisi mesaji tespit edildi.")
+            except Exception as e_redir:
+                logging.warning(f"(Async) Geri yonlendirme sayfasi alinirken hata olustu: {e_redir}")
+            return "CREDENTIAL_ERROR"
+        if response_post.status_code != 302 and contains_credential_error(response_post.text):
+            logging.warning("(Async) Yanit iceriginde hatali giris bilgisi mesaji tespit edildi.")
+            return "CREDENTIAL_ERROR"
+        logging.error("(Async) Giris basarisiz oldu (Detaylar yukarida).")
+        return False
+
+    except httpx.TimeoutException:
+        note_outcome("timeout")
+        logging.error(f"(Async) Ag istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi.")
+        return False
+    except httpx.ConnectError as e:
+        note_outcome("connection_error")
+        logging.error(f"(Async) Ag baglanti hatasi: {e}. KYK Wi-Fi agina bagli oldugunuzdan ve portalin erisilebilir oldugundan emin olun.")
+        return False
+    except httpx.HTTPError as e:
+        logging.error(f"(Async) HTTP istegi sirasinda bir hata olustu: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"(Async) Giris denemesi sirasinda beklenmeyen bir hata olustu: {e}", exc_info=True)
+        return False
+
+
+@portal_call("viewstate")
+async def async_get_initial_viewstate(client: "httpx.AsyncClient") -> Optional[str]:
+    """Async counterpart of get_initial_viewstate."""
+    try:
+        async with client.stream("GET", SUCCESS_URL, headers=VIEWSTATE_HEADERS) as response:
+            response.raise_for_status()
+            if LOGIN_URL in str(response.url):
+                logging.error("(Async) ViewState alinirken giris sayfasina yonlendirildi! Oturum kaybolmus olabilir.")
+                return None
+            scanner = ViewStateScanner()
+            vs_value = None
+            drained = 0
+            async for chunk in response.aiter_bytes(VIEWSTATE_CHUNK_SIZE):
+                if vs_value:
+                    # Kalani okunup atilir ki baglanti havuza geri donebilsin (bkz. drain_chunks).
+                    drained += len(chunk)
+                    if drained > VIEWSTATE_DRAIN_LIMIT:
+                        break
+                    continue
+                vs_value = scanner.feed(chunk)
+            if vs_value:
+                logging.info("(Async) Ilk ViewState degeri bulundu.")
+                return vs_value
+            return parse_viewstate_html(scanner.text(response.encoding))
+    except httpx.HTTPError as e:
+        if isinstance(e, httpx.TimeoutException):
+            note_outcome("timeout")
+        logging.error(f"(Async) ViewState almak icin sayfa getirilirken hata: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"(Async) ViewState parse edilirken hata: {e}", exc_info=True)
+        return None
+
+
+@portal_call("quota")
+async def async_get_quota_ajax(client: "httpx.AsyncClient", current_view_state: Optional[str]) -> QuotaResult:
+    """Async counterpart of get_quota_ajax."""
+    if not current_view_state:
+        logging.error("(Async) AJAX istegi icin ViewState mevcut degil.")
+        return None, None
+    try:
+        response = await client.post(SUCCESS_URL, headers=AJAX_HEADERS, data=ajax_form_data(current_view_state))
+        if response.headers.get('Content-Type', '').startswith('text/html'):
+            logging.error("(Async) AJAX istegine XML yerine HTML yaniti alindi. Oturum zaman asimina ugramis olabilir.")
+            return "SESSION_EXPIRED", None
+        response.raise_for_status()
+        return parse_quota_response(response.content, current_view_state)
+    except httpx.TimeoutException:
+        note_outcome("timeout")
+        logging.error(f"(Async) AJAX istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi.")
+        return None, current_view_state
+    except httpx.HTTPError as e:
+        logging.error(f"(Async) AJAX istegi sirasinda hata: {e}")
+        return None, current_view_state
+    except Exception as e:
+        logging.error(f"(Async) AJAX yaniti islenirken hata: {e}", exc_info=True)
+        return None, current_view_state
+
+
+@portal_call("logout")
+async def async_perform_logout(
+    jsessionid_value: str,
+    client: Optional["httpx.AsyncClient"] = None,
+    timeout: float = LOGOUT_TIMEOUT,
+) -> bool:
+    """Async counterpart of perform_logout; uses a throwaway client unless one is given."""
+    if not jsessionid_value:
+        logging.error("(Async Logout) Oturum kimligi (JSESSIONID) degeri bos olamaz.")
+        return False
+    try:
+        if client is None:
+            async with new_async_client() as own_client:
+                response = await own_client.get(LOGOUT_URL, headers=logout_headers(jsessionid_value), timeout=timeout)
+        else:
+            response = await client.get(LOGOUT_URL, headers=logout_headers(jsessionid_value), timeout=timeout)
+        response.raise_for_status()
+        clear_session_store(jsessionid_value)
+        if LOGOUT_SUCCESS_FRAGMENT in response.text:
+            logging.info("(Async Logout) Cikis basarili! Sunucu onay mesaji dondu.")
+            remove_session_file(jsessionid=jsessionid_value)
+        else:
+            logging.warning("(Async Logout) Cikis istegi gonderildi, ancak onay mesaji yanitta bulunamadi.")
+            remove_session_file("(dogrulanamasa da) ", jsessionid=jsessionid_value)
+        return True
+    except httpx.TimeoutException:
+        note_outcome("timeout")
+        logging.error(f"(Async Logout) Cikis istegi {timeout:.0f} saniye sonra zaman asimina ugradi.")
+        return False
+    except httpx.ConnectError as e:
+        note_outcome("connection_error")
+        logging.error(f"(Async Logout) Baglanti hatasi nedeniyle cikis basarisiz: {e}.")
+        return False
+    except httpx.HTTPError as e:
+        logging.error(f"(Async Logout) Cikis istegi sirasinda bir hata olustu: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"(Async Logout) Cikis sirasinda beklenmeyen bir hata olustu: {e}", exc_info=True)
+        return False
+
+# --- Kalici Oturum Deposu --- #
+# Cerezler (cookie jar), son ViewState ve zaman damgalari 'session_store.json' dosyasinda
+# saklanir. Program yeniden basladiginda tek bir AJAX istegi ile oturumun hala gecerli
+# olup olmadigi kontrol edilir; gecerliyse giris adimlari tamamen atlanir.
+# Kullanici adi (T.C. kimlik no) depoya acik yazilmaz, yalnizca ozeti (username_key) saklanir.
+# Surum 1 dosyalari kullanici adini acik tutuyordu; okunurken ozete cevrilir ve ilk
+# yazmada surum 2 olarak yeniden kaydedilir.
+SESSION_STORE_VERSION = 2
+SESSION_STORE_MIN_INTERVAL = 60 # Keep-alive sirasinda depoya en sik yazma araligi (saniye)
+_last_session_store_write = 0.0
+
+
+def username_key(username: str) -> str:
+    """Short SHA-256 digest identifying an account on disk without storing the T.C. ID number."""
+
+    return hashlib.sha256(username.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class StoredSession:
+    """On-disk representation of a portal session (see SESSION_STORE_VERSION)."""
+
+    username_key: str
+    cookies: List[Dict[str, object]]
+    view_state: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @property
+    def jsessionid(self) -> Optional[str]:
+        for cookie in self.cookies:
+            if cookie.get("name") == "JSESSIONID":
+                return str(cookie.get("value"))
+        return None
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write text via a temporary file in the same directory and os.replace() it into place."""
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(text)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def load_session_store(path: Path = SESSION_STORE_PATH) -> Optional[StoredSession]:
+    """Read the session store; returns None when missing, unreadable or of another version."""
+
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        version = data.get("version")
+        if version == SESSION_STORE_VERSION:
+            key = str(data["username_key"])
+        elif version == 1:
+            key = username_key(data["username"])
+        else:
+            logging.info(f"Oturum deposu surumu ({version}) desteklenmiyor, yok sayiliyor.")
+            return None
+        return StoredSession(
+            username_key=key,
+            cookies=list(data.get("cookies", [])),
+            view_state=data.get("view_state"),
+            created_at=float(data.get("created_at", 0.0)),
+            updated_at=float(data.get("updated_at", 0.0)),
+        )
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning(f"Oturum deposu ({path}) okunamadi: {e}")
+        return None
+
+
+def save_session_store(
+    session: requests.Session,
+    view_state: Optional[str],
+    username: str,
+    force: bool = False,
+    path: Path = SESSION_STORE_PATH,
+) -> None:
+    """Persist cookies and ViewState; without force, writes are throttled to SESSION_STORE_MIN_INTERVAL."""
+
+    global _last_session_store_write
+    now = time.time()
+    if not force and now - _last_session_store_write < SESSION_STORE_MIN_INTERVAL:
+        return
+    key = username_key(username)
+    previous = load_session_store(path)
+    created_at = previous.created_at if previous and previous.username_key == key else now
+    cookies = [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            "expires": cookie.expires,
+        }
+        for cookie in session.cookies
+    ]
+    payload = {
+        "version": SESSION_STORE_VERSION,
+        "username_key": key,
+        "cookies": cookies,
+        "view_state": view_state,
+        "created_at": created_at,
+        "updated_at": now,
+    }
+    try:
+        atomic_write_text(path, json.dumps(payload, indent=2))
+        _last_session_store_write = now
+        logging.debug(f"Oturum deposu guncellendi: {path}")
+    except OSError as e:
+        logging.warning(f"Oturum deposu ({path}) yazilamadi: {e}")
+
+
+def clear_session_store(jsessionid: Optional[str] = None, path: Path = SESSION_STORE_PATH) -> None:
+    """Delete the store; when jsessionid is given, only if the store belongs to that session."""
+
+    if jsessionid is not None:
+        stored = load_session_store(path)
+        if stored and stored.jsessionid != jsessionid:
+            return
+    try:
+        if path.exists():
+            path.unlink()
+            logging.debug(f"Oturum deposu silindi: {path}")
+    except OSError as e:
+        logging.warning(f"Oturum deposu ({path}) silinemedi: {e}")
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        viewstate_input = soup.find('input', {'name': 'javax.faces.ViewState'})
 
-        if viewstate_input and 'value' in viewstate_input.attrs:
-            vs_value = viewstate_input['value']
-            logging.info(f"Ilk ViewState degeri bulundu.")
-            logging.debug(f"Tam ViewState: ...{vs_value[-20:]}") # Sadece sonunu logla
-            return vs_value
-        else:
-            logging.error("Sayfa HTML'inde javax.faces.ViewState input'u bulunamadi.")
-            logging.debug(f"ViewState aranan HTML (ilk 500 char):\n{response.text[:500]}")
-            return None
+def resume_stored_session(session: requests.Session, username: str) -> Optional[str]:
+    """Restore a stored session into `session` and validate it with one AJAX call.
 
-    except requests.exceptions.RequestException as e:
-        logging.error(f"ViewState almak icin sayfa getirilirken hata: {e}")
-        return None
-    except Exception as e:
-        logging.error(f"ViewState parse edilirken hata: {e}", exc_info=True)
+    Returns the fresh ViewState when the portal still accepts the session, else None
+    (and leaves `session` without the restored cookies).
+    """
+    stored = load_session_store()
+    if not stored or stored.username_key != username_key(username) or not stored.view_state:
         return None
 
-# Kota Bilgisini Internetten Sorgulama
-def get_quota_ajax(session: requests.Session, current_view_state: Optional[str]) -> QuotaResult:
-    """Verilen ViewState ile AJAX kullanarak kota bilgisini sorgular."""
-    if not current_view_state:
-        logging.error("AJAX istegi icin ViewState mevcut degil.")
-        return None, None
+    logging.info("Kayitli oturum bulundu, gecerliligi kontrol ediliyor...")
+    for cookie in stored.cookies:
+        session.cookies.set(
+            str(cookie["name"]),
+            str(cookie["value"]),
+            domain=cookie.get("domain"),
+            path=cookie.get("path") or "/",
+            secure=bool(cookie.get("secure")),
+            expires=cookie.get("expires"),
+        )
 
-    logging.debug("Kota bilgisi icin AJAX istegi gonderiliyor...")
-    ajax_headers = compose_headers(
-        Accept="application/xml, text/xml, */*; q=0.01",
-        **{
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
-            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-            'Faces-Request': 'partial/ajax',
-            'Origin': 'https://wifi.gsb.gov.tr',
-            'Referer': SUCCESS_URL,
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-origin',
-            'X-Requested-With': 'XMLHttpRequest',
+    quota_info, new_view_state = get_quota_ajax(session, stored.view_state)
+    if isinstance(quota_info, dict) and new_view_state:
+        record_quota_sample(quota_info, username)
+        logging.info(f"Kayitli oturum gecerli, giris atlandi. Kalan Kota: {quota_info.get('Toplam Kalan Kota', 'N/A')}")
+        save_session_store(session, new_view_state, username, force=True)
+        return new_view_state
+
+    logging.info("Kayitli oturum artik gecerli degil. Normal giris yapilacak.")
+    session.cookies.clear()
+    clear_session_store()
+    return None
+
+# --- Kapanis Koordinatoru --- #
+# Program kapanirken acik oturumlarin tamami ayni anda kapatilir ve toplam bekleme
+# SHUTDOWN_DEADLINE ile sinirlanir (systemd'nin SIGKILL gondermesinden once bitmesi icin).
+# Sure icinde kapatilamayan JSESSIONID'ler 'pending_logouts.json' dosyasina yazilir ve
+# bir sonraki acilista yeniden kapatilmaya calisilir.
+SHUTDOWN_DEADLINE = env_float("KYK_SHUTDOWN_DEADLINE", 15.0) # Tum cikis istekleri icin toplam sure (saniye)
+PENDING_LOGOUTS_PATH = PATHS.base_path / "pending_logouts.json"
+PENDING_LOGOUTS_VERSION = 1
+PENDING_LOGOUT_MAX_AGE = 24 * 60 * 60 # Bundan eski bekleyen oturumlar portalda zaten sona ermistir (saniye)
+
+
+def load_pending_logouts(path: Path = PENDING_LOGOUTS_PATH) -> Dict[str, Dict[str, object]]:
+    """Read pending logouts as {jsessionid: {"label", "saved_at"}}; empty when missing or unreadable."""
+
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != PENDING_LOGOUTS_VERSION:
+            logging.info(f"Bekleyen cikis dosyasi surumu ({data.get('version')}) desteklenmiyor, yok sayiliyor.")
+            return {}
+        return {
+            str(entry["jsessionid"]): {"label": str(entry.get("label", "")), "saved_at": float(entry.get("saved_at", 0.0))}
+            for entry in data.get("sessions", [])
         }
-    )
-    ajax_data = {
-        'javax.faces.partial.ajax': 'true',
-        'javax.faces.source': 'mainPanel:kota:j_idt122',
-        'javax.faces.partial.execute': '@all',
-        'javax.faces.partial.render': 'mainPanel:kota',
-        'mainPanel:kota:j_idt122': 'mainPanel:kota:j_idt122',
-        'mainPanel:kota': 'mainPanel:kota',
-        'javax.faces.ViewState': current_view_state
-    }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.warning(f"Bekleyen cikis dosyasi ({path}) okunamadi: {e}")
+        return {}
+
 
+def save_pending_logouts(pending: Dict[str, Dict[str, object]], path: Path = PENDING_LOGOUTS_PATH) -> None:
+    """Write pending logouts; the file is removed when nothing is left."""
+
+    try:
+        if not pending:
+            if path.exists():
+                path.unlink()
+                logging.debug(f"Bekleyen cikis dosyasi silindi: {path}")
+            return
+        sessions = [{"jsessionid": jsessionid, **entry} for jsessionid, entry in pending.items()]
+        atomic_write_text(path, json.dumps({"version": PENDING_LOGOUTS_VERSION, "sessions": sessions}, indent=2))
+    except OSError as e:
+        logging.warning(f"Bekleyen cikis dosyasi ({path}) yazilamadi: {e}")
+
+
+def logout_concurrently(sessions: Dict[str, str], deadline: float = SHUTDOWN_DEADLINE) -> List[str]:
+    """Log out {jsessionid: label} in parallel within `deadline` seconds; return the ones that failed.
+
+    Each logout runs in a daemon thread with a request timeout capped by the time left, so a
+    hung request can neither exceed the deadline nor keep the interpreter from exiting.
+    """
+    results: Dict[str, bool] = {}
+    ends_at = time.monotonic() + deadline
+
+    def logout(jsessionid: str) -> None:
+        remaining = ends_at - time.monotonic()
+        results[jsessionid] = remaining > 0 and perform_logout(jsessionid, timeout=min(LOGOUT_TIMEOUT, remaining))
+
+    threads = [
+        threading.Thread(target=logout, args=(jsessionid,), name=f"logout-{label or index}", daemon=True)
+        for index, (jsessionid, label) in enumerate(sessions.items())
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0.0, ends_at - time.monotonic()))
+    return [jsessionid for jsessionid in sessions if not results.get(jsessionid)]
+
+
+def shutdown_logouts(sessions: Dict[str, str], deadline: float = SHUTDOWN_DEADLINE) -> List[str]:
+    """Log out sessions on exit; failures are saved to PENDING_LOGOUTS_PATH and returned."""
+
+    if not sessions:
+        return []
+    logging.info(f"{len(sessions)} oturum en fazla {deadline:.0f} saniye icinde kapatiliyor...")
+    failed = logout_concurrently(sessions, deadline)
+    if failed:
+        pending = load_pending_logouts()
+        now = time.time()
+        for jsessionid in failed:
+            pending[jsessionid] = {"label": sessions[jsessionid], "saved_at": now}
+            # Kullanici bu oturumu kapatmak istedi; sonraki acilista devam ettirilmesin.
+            clear_session_store(jsessionid)
+        save_pending_logouts(pending)
+        logging.warning(f"{len(failed)} oturum kapatilamadi; sonraki acilista tekrar denenecek ({PENDING_LOGOUTS_PATH}).")
+    return failed
+
+
+def retry_pending_logouts(deadline: float = SHUTDOWN_DEADLINE) -> None:
+    """Close sessions left open by an earlier run; entries that still fail stay in the file."""
+
+    pending = load_pending_logouts()
+    if not pending:
+        return
+    now = time.time()
+    expired = [jsessionid for jsessionid, entry in pending.items() if now - float(entry["saved_at"]) > PENDING_LOGOUT_MAX_AGE]
+    for jsessionid in expired:
+        del pending[jsessionid]
+    if pending and portal_reachable():
+        logging.info(f"Onceki calismadan kalan {len(pending)} oturum kapatiliyor...")
+        failed = set(logout_concurrently({jsessionid: str(entry["label"]) for jsessionid, entry in pending.items()}, deadline))
+        pending = {jsessionid: entry for jsessionid, entry in pending.items() if jsessionid in failed}
+        if pending:
+            logging.warning(f"{len(pending)} bekleyen oturum yine kapatilamadi; sonraki acilista tekrar denenecek.")
+    elif pending:
+        logging.info(f"Portala ulasilamadi; {len(pending)} bekleyen cikis islemi sonraya birakildi.")
+    save_pending_logouts(pending)
+
+
+# --- Kota Onbellegi --- #
+# Her basarili kota sorgusu (keep-alive adimi, menu, kontrol arayuzu) hesap bazinda
+# bellekte tutulur. QUOTA_CACHE_TTL icinde tekrar sorulan kota portala gitmeden verilir.
+# Ayni anda gelen istekler tek bir portal istegini paylasir (single-flight): ilk cagiran
+# istegi yapar, digerleri onun sonucunu bekler.
+QUOTA_CACHE_TTL = env_float("KYK_QUOTA_CACHE_TTL", 60.0) # Kota bu sure boyunca yeniden sorgulanmaz (saniye)
+
+
+class QuotaCache:
+    """Per-account cache of the last quota result with TTL and request coalescing."""
+
+    def __init__(self, ttl: float = QUOTA_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+
+    def put(self, key: str, quota_info: Dict[str, str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(quota_info))
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[Dict[str, str], float]]:
+        """(quota_info, age in seconds) if a result newer than max_age (default: ttl) exists."""
+
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        return (dict(entry[1]), age) if age <= max_age else None
+
+    def fetch(
+        self,
+        key: str,
+        loader: Callable[[], object],
+        max_age: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> object:
+        """Cached quota if fresh enough, else the result of `loader` shared by concurrent callers.
+
+        loader performs the portal request and should store successful results with put()
+        (record_quota_sample does this); its return value is handed to every waiter.
+        """
+
+        cached = self.get(key, max_age)
+        if cached is not None:
+            return cached[0]
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        if not leader:
+            return future.result(timeout)
+        try:
+            result = loader()
+        except BaseException as e:
+            # KeyboardInterrupt vb. de bekleyenlere iletilir; aksi halde sonsuza dek beklerler.
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+QUOTA_CACHE = QuotaCache()
+
+
+# --- Kota Gecmisi (Zaman Serisi) --- #
+# Her kota olcumu hesap basina ikili (binary) bir dosyaya sabit genislikte kayit olarak
+# eklenir: 8 bayt Unix zamani + 4 bayt MB (int32). Kayitlar zamana gore sirali oldugu
+# icin okuma mmap ile yapilir ve bir zaman araliginin baslangici ikili arama ile bulunur;
+# aylar suren gecmis icin kyk_login.log dosyasini yeniden ayristirmak gerekmez.
+QUOTA_HISTORY_DIR = PATHS.base_path / "quota_history"
+QUOTA_HISTORY_MAGIC = b"KYKQTS01" # Dosya basligi (bicim surumu dahil)
+QUOTA_RECORD = struct.Struct("<qi") # Zaman damgasi (saniye, int64) + kalan kota (MB, int32)
+QUOTA_HISTORY_MIN_INTERVAL = 300 # Kota degismediyse en sik kayit araligi (saniye)
+_quota_histories: Dict[Path, "QuotaHistory"] = {}
+_quota_histories_lock = threading.Lock()
+
+
+def parse_quota_mb(value: str) -> Optional[int]:
+    """Parse a quota string such as '1234 MB', '24997.29 MB' or '1.234,56 MB' to whole MB."""
+
+    text = value.upper().replace("MB", "").replace(" ", "").strip()
+    if "," in text and "." in text:
+        # Son ayirici ondalik ayiricidir; digeri binlik ayiricidir.
+        decimal_sep = "," if text.rfind(",") > text.rfind(".") else "."
+        thousands_sep = "." if decimal_sep == "," else ","
+        text = text.replace(thousands_sep, "").replace(decimal_sep, ".")
+    else:
+        text = text.replace(",", ".")
     try:
-        response = session.post(SUCCESS_URL, headers=ajax_headers, data=ajax_data, timeout=REQUEST_TIMEOUT, verify=True)
+        return int(round(float(text)))
+    except ValueError:
+        return None
 
-        if response.headers.get('Content-Type', '').startswith('text/html'):
-            logging.error("AJAX istegine XML yerine HTML yaniti alindi. Oturum zaman asimina ugramis olabilir.")
-            return "SESSION_EXPIRED", None
 
-        response.raise_for_status()
-        logging.debug(f"AJAX yanit durumu: {response.status_code}")
+def quota_history_path(username: str) -> Path:
+    """History file of an account; the file name is a hash, not the T.C. ID number."""
 
-        parser = 'lxml-xml' if 'lxml' in sys.modules else 'xml'
-        soup_xml = BeautifulSoup(response.content, parser)
+    return QUOTA_HISTORY_DIR / f"{username_key(username)}.bin"
 
-        quota_update = soup_xml.find('update', {'id': 'mainPanel:kota'})
-        new_viewstate_update = soup_xml.find('update', {'id': 'j_id1:javax.faces.ViewState:0'})
 
-        quota_html_content = None
-        if quota_update and quota_update.string:
-            quota_html_content = quota_update.string
-        else:
-            logging.error("AJAX yanitinda 'mainPanel:kota' update'i bulunamadi veya bos.")
-            new_vs = None
-            if new_viewstate_update and new_viewstate_update.string:
-                 new_vs = new_viewstate_update.string
-                 logging.debug(f"Yeni ViewState alindi (kota update'i olmadan): ...{new_vs[-20:]}")
-            else:
-                 logging.warning("AJAX yanitinda ViewState update'i de bulunamadi.")
-            return None, new_vs
+class _TimestampView:
+    """Sequence view over the timestamps of a mapped history file (for bisect)."""
 
-        new_view_state = None
-        if new_viewstate_update and new_viewstate_update.string:
-            new_view_state = new_viewstate_update.string
-            logging.debug(f"AJAX yanitindan yeni ViewState alindi: ...{new_view_state[-20:]}")
-        else:
-            logging.error("AJAX yanitinda ViewState update'i bulunamadi! Sonraki istekler basarisiz olabilir.")
-            new_view_state = current_view_state
+    def __init__(self, buffer: mmap.mmap, count: int) -> None:
+        self._buffer = buffer
+        self._count = count
 
-        quota_value = None
-        if quota_html_content:
-            soup_html = BeautifulSoup(quota_html_content, 'html.parser')
-            try:
-                target_label_text = "Toplam Kalan Kota (MB):"
-                label_element = soup_html.find('label', string=lambda t: t and target_label_text in t.strip())
-                if label_element:
-                    parent_td = label_element.find_parent('td')
-                    if parent_td:
-                        value_td = parent_td.find_next_sibling('td')
-                        if value_td:
-                            value_label = value_td.find('label')
-                            if value_label:
-                                quota_mb = value_label.get_text(strip=True)
-                                quota_value = f"{quota_mb} MB"
-                                logging.debug(f"AJAX'tan cikarilan kota degeri: {quota_value}")
-                            else: logging.warning("AJAX HTML'inde deger label'i bulunamadi.")
-                        else: logging.warning("AJAX HTML'inde deger TD'si bulunamadi.")
-                    else: logging.warning("AJAX HTML'inde parent TD bulunamadi.")
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return QUOTA_RECORD.unpack_from(self._buffer, len(QUOTA_HISTORY_MAGIC) + index * QUOTA_RECORD.size)[0]
+
+
+class QuotaHistory:
+    """Append-only (timestamp, MB) series stored as fixed-width binary records."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._last: Optional[Tuple[int, int]] = None
+
+    def append(self, quota_mb: int, timestamp: Optional[float] = None) -> bool:
+        """Add a sample; unchanged values are thinned to one per QUOTA_HISTORY_MIN_INTERVAL."""
+
+        ts = int(timestamp if timestamp is not None else time.time())
+        with self._lock:
+            if self._last is None:
+                self._last = self._read_last()
+            if self._last is not None:
+                last_ts, last_mb = self._last
+                ts = max(ts, last_ts) # Ikili arama icin kayitlar zamana gore sirali kalmali
+                if quota_mb == last_mb and ts - last_ts < QUOTA_HISTORY_MIN_INTERVAL:
+                    return False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                if f.tell() == 0:
+                    f.write(QUOTA_HISTORY_MAGIC)
                 else:
-                    logging.warning(f"AJAX HTML'i icinde '{target_label_text}' etiketi bulunamadi.")
-                    logging.debug(f"AJAX HTML Content for Quota:\n{quota_html_content}")
-            except Exception as e_html_parse:
-                logging.warning(f"Kota HTML'i parse edilirken hata: {e_html_parse}")
-                logging.debug(f"Kota parse hatasi alan HTML: {quota_html_content}", exc_info=True)
+                    # Yarim kalmis (cokme sirasinda) bir kayit varsa uzerine yazilarak hizalama korunur.
+                    misalignment = (f.tell() - len(QUOTA_HISTORY_MAGIC)) % QUOTA_RECORD.size
+                    if misalignment:
+                        f.truncate(f.tell() - misalignment)
+                f.write(QUOTA_RECORD.pack(ts, quota_mb))
+            self._last = (ts, quota_mb)
+            return True
 
-        quota_dict = None
-        if quota_value:
-            quota_dict = {"Toplam Kalan Kota": quota_value}
+    def _read_last(self) -> Optional[Tuple[int, int]]:
+        samples = self._read(since=None, until=None, last_only=True)
+        return samples[-1] if samples else None
 
-        return quota_dict, new_view_state
+    def samples(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Tuple[int, int]]:
+        """Samples with since <= timestamp <= until; the start is found by binary search."""
 
-    except requests.exceptions.Timeout:
-        logging.error(f"AJAX istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi.")
-        return None, current_view_state
-    except requests.exceptions.RequestException as e:
-        logging.error(f"AJAX istegi sirasinda hata: {e}")
-        return None, current_view_state
-    except Exception as e:
-        logging.error(f"AJAX yaniti islenirken hata: {e}", exc_info=True)
-        return None, current_view_state
+        return self._read(since, until)
 
-# KYK Wi-Fi Oturumunu Kapatma Islemi
-def perform_logout(jsessionid_value: str) -> bool:
-    """Verilen oturum kimligi (JSESSIONID) ile KYK Wi-Fi portalindan cikis yapmayi dener."""
-    LOGOUT_URL = "https://wifi.gsb.gov.tr/login.html?logout=1"
-    REQUEST_TIMEOUT = 20
-    SUCCESS_MESSAGE_FRAGMENT = "Basari ile cikis yaptiniz"
+    def latest(self) -> Optional[Tuple[int, int]]:
+        return self._read_last()
 
-    if not jsessionid_value:
-        logging.error("(Logout) Oturum kimligi (JSESSIONID) degeri bos olamaz.")
-        return False
+    def usage_since(self, since: float) -> Optional[int]:
+        """MB consumed since `since`: the sum of drops between samples (quota top-ups are ignored).
 
-    logging.info(f"(Logout) JSESSIONID ile oturum kapatilmaya calisiliyor: ...{jsessionid_value[-6:]}")
+        The window is located in O(log n); only the samples inside it are visited. The last
+        sample before `since` is included so that the first drop in the window is counted.
+        """
+        window = self._read(since, None, include_previous=True)
+        if len(window) < 2:
+            return None
+        return sum(max(previous[1] - current[1], 0) for previous, current in zip(window, window[1:]))
+
+    def _read(
+        self,
+        since: Optional[float],
+        until: Optional[float],
+        include_previous: bool = False,
+        last_only: bool = False,
+    ) -> List[Tuple[int, int]]:
+        header_size = len(QUOTA_HISTORY_MAGIC)
+        try:
+            with open(self.path, "rb") as f:
+                count = (os.fstat(f.fileno()).st_size - header_size) // QUOTA_RECORD.size
+                if count <= 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if buffer[:header_size] != QUOTA_HISTORY_MAGIC:
+                        logging.warning(f"Kota gecmisi dosyasi taninmadi: {self.path}")
+                        return []
+                    timestamps = _TimestampView(buffer, count)
+                    start = bisect.bisect_left(timestamps, since) if since is not None else 0
+                    end = bisect.bisect_right(timestamps, until) if until is not None else count
+                    if include_previous and start > 0:
+                        start -= 1
+                    if last_only:
+                        start = max(end - 1, 0)
+                    return [
+                        QUOTA_RECORD.unpack_from(buffer, header_size + index * QUOTA_RECORD.size)
+                        for index in range(start, end)
+                    ]
+        except FileNotFoundError:
+            return []
+
+
+def quota_history(username: str) -> QuotaHistory:
+    """Shared QuotaHistory instance of an account."""
+
+    path = quota_history_path(username)
+    with _quota_histories_lock:
+        history = _quota_histories.get(path)
+        if history is None:
+            history = _quota_histories[path] = QuotaHistory(path)
+        return history
+
+
+def record_quota_sample(quota_info: object, username: Optional[str]) -> None:
+    """Cache a successful get_quota_ajax result and append it to the account's history (never raises)."""
+
+    if not username or not isinstance(quota_info, dict):
+        return
+    QUOTA_CACHE.put(username, quota_info)
+    quota_mb = parse_quota_mb(str(quota_info.get("Toplam Kalan Kota", "")))
+    if quota_mb is None:
+        logging.debug(f"Kota degeri sayiya cevrilemedi: {quota_info.get('Toplam Kalan Kota')}")
+        return
     try:
-        headers = compose_headers(
-            Accept="text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            **{'Cookie': f'JSESSIONID={jsessionid_value}'}
+        quota_history(username).append(quota_mb)
+    except OSError as e:
+        logging.warning(f"Kota gecmisi yazilamadi: {e}")
+    state = burn_rate_monitor().observe(username, quota_mb)
+    if state.rate is not None:
+        hours_left = state.hours_left
+        logging.debug(
+            f"Tahmini tuketim: {state.rate:.1f} MB/saat"
+            + (f", kota bitimine ~{hours_left:.1f} saat" if hours_left is not None else "")
         )
-        response = requests.get(LOGOUT_URL, headers=headers, timeout=REQUEST_TIMEOUT, verify=True)
-        response.raise_for_status()
 
-        if SUCCESS_MESSAGE_FRAGMENT in response.text:
-             logging.info("(Logout) Cikis basarili! Sunucu onay mesaji dondu.")
-             try:
-                 if SESSION_FILE_PATH.exists():
-                     SESSION_FILE_PATH.unlink()
-                     logging.info(f"(Logout) Oturum dosyasi silindi: {SESSION_FILE_PATH}")
-             except Exception as e:
-                 logging.warning(f"(Logout) Oturum dosyasi {SESSION_FILE_PATH} silinemedi: {e}")
-             return True
+
+# --- Kota Tuketim Hizi ve Uyarilar --- #
+# Her kota olcumunde tuketim hizi (MB/saat) ustel agirlikli hareketli ortalama (EWMA) ile
+# O(1) maliyetle guncellenir ve kotanin ne zaman bitecegi tahmin edilir. Kalan kota veya
+# tahmini kalan sure ayarlanan esiklerin altina indiginde bir komut calistirilir ve/veya
+# yerel bir webhook adresine JSON gonderilir. Ayarlar ortam degiskenlerinden (.env) okunur:
+#   KYK_ALERT_THRESHOLDS_MB=5000,1000   KYK_ALERT_HOURS_LEFT=24,6
+#   KYK_ALERT_COMMAND="notify-send KYK $KYK_ALERT_MESSAGE"   KYK_ALERT_WEBHOOK=http://127.0.0.1:9000/kyk
+BURN_RATE_TIME_CONSTANT = 6 * 3600 # EWMA zaman sabiti (saniye); eski olcumlerin etkisi bu surede ~%63 azalir
+BURN_RATE_HOURS_HYSTERESIS = 1.25 # Sure esigi, tahmin esigin bu katini asinca yeniden kurulur
+ALERT_HOOK_TIMEOUT = 30 # Uyari komutu/webhook icin zaman asimi suresi (saniye)
+_burn_rate_monitor: Optional["BurnRateMonitor"] = None
+
+
+def parse_alert_thresholds(value: Optional[str]) -> Tuple[float, ...]:
+    """Parse a comma separated list of positive numbers (invalid entries are skipped)."""
+
+    thresholds = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            number = float(item)
+        except ValueError:
+            logging.warning(f"Gecersiz uyari esigi atlandi: {item!r}")
+            continue
+        if number > 0:
+            thresholds.append(number)
+    return tuple(sorted(set(thresholds), reverse=True))
+
+
+@dataclass
+class BurnRateState:
+    """Incremental consumption estimate of one account."""
+
+    last_timestamp: float
+    last_mb: int
+    rate: Optional[float] = None # MB/saat (EWMA)
+    fired: set = field(default_factory=set)
+
+    @property
+    def hours_left(self) -> Optional[float]:
+        if not self.rate or self.rate <= 0:
+            return None
+        return self.last_mb / self.rate
+
+
+class BurnRateMonitor:
+    """EWMA burn-rate estimator with remaining-MB and hours-left alert thresholds."""
+
+    def __init__(
+        self,
+        mb_thresholds: Sequence[float] = (),
+        hour_thresholds: Sequence[float] = (),
+        command: Optional[str] = None,
+        webhook: Optional[str] = None,
+        time_constant: float = BURN_RATE_TIME_CONSTANT,
+    ) -> None:
+        self.mb_thresholds = tuple(mb_thresholds)
+        self.hour_thresholds = tuple(hour_thresholds)
+        self.command = command
+        self.webhook = webhook
+        self.time_constant = time_constant
+        self.states: Dict[str, BurnRateState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "BurnRateMonitor":
+        return cls(
+            mb_thresholds=parse_alert_thresholds(os.getenv("KYK_ALERT_THRESHOLDS_MB")),
+            hour_thresholds=parse_alert_thresholds(os.getenv("KYK_ALERT_HOURS_LEFT")),
+            command=os.getenv("KYK_ALERT_COMMAND") or None,
+            webhook=os.getenv("KYK_ALERT_WEBHOOK") or None,
+        )
+
+    @property
+    def has_hooks(self) -> bool:
+        return bool(self.command or self.webhook)
+
+    def observe(self, username: str, quota_mb: int, timestamp: Optional[float] = None) -> BurnRateState:
+        """Fold one sample into the estimate (O(1)) and fire any threshold that was crossed."""
+
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            state = self.states.get(username)
+            if state is None:
+                state = self.states[username] = BurnRateState(last_timestamp=now, last_mb=quota_mb)
+            else:
+                elapsed = now - state.last_timestamp
+                if elapsed <= 0:
+                    return state
+                consumed = state.last_mb - quota_mb
+                # Kota yenilendiyse (artis) hiz degismez; yalnizca referans noktasi guncellenir.
+                if consumed >= 0:
+                    instant_rate = consumed * 3600 / elapsed
+                    if state.rate is None:
+                        state.rate = instant_rate
+                    else:
+                        # Duzensiz araliklarda da dogru agirlik icin alfa gecen sureye gore hesaplanir.
+                        alpha = 1 - math.exp(-elapsed / self.time_constant)
+                        state.rate += alpha * (instant_rate - state.rate)
+                state.last_timestamp = now
+                state.last_mb = quota_mb
+            alerts = self._crossed_thresholds(state)
+        for event, threshold in alerts:
+            self._fire(username, state, event, threshold)
+        return state
+
+    def _crossed_thresholds(self, state: BurnRateState) -> List[Tuple[str, float]]:
+        crossed = []
+        for threshold in self.mb_thresholds:
+            key = ("remaining_mb", threshold)
+            if state.last_mb <= threshold:
+                if key not in state.fired:
+                    state.fired.add(key)
+                    crossed.append(key)
+            else:
+                state.fired.discard(key)
+        hours_left = state.hours_left
+        for threshold in self.hour_thresholds:
+            key = ("hours_left", threshold)
+            if hours_left is not None and hours_left <= threshold:
+                if key not in state.fired:
+                    state.fired.add(key)
+                    crossed.append(key)
+            elif hours_left is None or hours_left > threshold * BURN_RATE_HOURS_HYSTERESIS:
+                state.fired.discard(key)
+        return crossed
+
+    def _fire(self, username: str, state: BurnRateState, event: str, threshold: float) -> None:
+        hours_left = state.hours_left
+        if event == "remaining_mb":
+            message = f"Kalan kota {state.last_mb} MB ({threshold:g} MB esiginin altinda)"
         else:
-             logging.warning("(Logout) Cikis istegi gonderildi (Yanit Kodu 200 OK), ancak onay mesaji yanitta bulunamadi.")
-             logging.warning("(Logout) Oturum buyuk ihtimalle sunucu tarafindan sonlandirildi, ancak dogrulanamadi.")
-             try:
-                 if SESSION_FILE_PATH.exists():
-                     SESSION_FILE_PATH.unlink()
-                     logging.info(f"(Logout) Oturum dosyasi (dogrulanamasa da) silindi: {SESSION_FILE_PATH}")
-             except Exception as e:
-                 logging.warning(f"(Logout) Oturum dosyasi {SESSION_FILE_PATH} silinemedi: {e}")
-             return True
+            message = f"Kota tahminen {hours_left:.1f} saat icinde bitecek ({threshold:g} saat esigi)"
+        logging.warning(f"[{mask_username(username)}] Kota uyarisi: {message}")
+        if not self.has_hooks:
+            return
+        payload = {
+            "event": event,
+            "threshold": threshold,
+            "account": mask_username(username),
+            "remaining_mb": state.last_mb,
+            "rate_mb_per_hour": round(state.rate, 2) if state.rate is not None else None,
+            "hours_left": round(hours_left, 2) if hours_left is not None else None,
+            "message": message,
+            "timestamp": state.last_timestamp,
+        }
+        # Komut ve webhook keep-alive dongusunu bekletmemek icin ayri bir thread'de calisir.
+        threading.Thread(target=self._run_hooks, args=(payload,), name="kyk-alert", daemon=True).start()
 
-    except requests.exceptions.Timeout:
-        logging.error(f"(Logout) Cikis istegi {REQUEST_TIMEOUT} saniye sonra zaman asimina ugradi.")
-        return False
-    except requests.exceptions.ConnectionError as e:
-        logging.error(f"(Logout) Baglanti hatasi nedeniyle cikis basarisiz: {e}.")
-        return False
-    except requests.exceptions.RequestException as e:
-        logging.error(f"(Logout) Cikis istegi sirasinda bir hata olustu: {e}")
-        return False
-    except Exception as e:
-        logging.error(f"(Logout) Cikis sirasinda beklenmeyen bir hata olustu: {e}", exc_info=True)
-        return False
+    def _run_hooks(self, payload: Dict[str, object]) -> None:
+        if self.command:
+            import subprocess
+
+            env = dict(os.environ)
+            env.update({f"KYK_ALERT_{key.upper()}": "" if value is None else str(value) for key, value in payload.items()})
+            try:
+                subprocess.run(self.command, shell=True, env=env, timeout=ALERT_HOOK_TIMEOUT, check=False)
+            except (OSError, subprocess.SubprocessError) as e:
+                logging.warning(f"Uyari komutu calistirilamadi: {e}")
+        if self.webhook:
+            import urllib.request
+
+            request = urllib.request.Request(
+                self.webhook,
+                data=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=ALERT_HOOK_TIMEOUT) as response:
+                    response.read()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Uyari webhook'u ({self.webhook}) gonderilemedi: {e}")
+
+
+def burn_rate_monitor() -> BurnRateMonitor:
+    """Process-wide monitor, configured from the environment on first use (after .env is loaded)."""
+
+    global _burn_rate_monitor
+    if _burn_rate_monitor is None:
+        _burn_rate_monitor = BurnRateMonitor.from_env()
+    return _burn_rate_monitor
+
+
+def run_usage_report(hours: float, accounts_path: Optional[Path] = None) -> int:
+    """Entry point for --usage: print consumption over the last `hours` from the history files."""
+
+    if accounts_path:
+        usernames = [account.username for account in load_accounts(accounts_path)]
+    else:
+        dotenv.load_dotenv(dotenv_path=DOTENV_PATH)
+        username = os.getenv("KYK_USERNAME")
+        usernames = [username] if username else []
+    if not usernames:
+        logging.error("Kullanim raporu icin KYK_USERNAME (.env) veya --accounts dosyasi gerekli.")
+        return 2
+
+    since = time.time() - hours * 3600
+    for username in usernames:
+        history = quota_history(username)
+        latest = history.latest()
+        if latest is None:
+            print(f"{mask_username(username)}: kota gecmisi yok.")
+            continue
+        last_ts, last_mb = latest
+        usage = history.usage_since(since)
+        usage_text = f"{usage} MB" if usage is not None else "yetersiz veri"
+        print(
+            f"{mask_username(username)}: son {hours:g} saatte kullanim: {usage_text}, "
+            f"kalan kota: {last_mb} MB ({time.strftime('%Y-%m-%d %H:%M', time.localtime(last_ts))})"
+        )
+        # Tuketim hizi, kayitlar esik tanimlanmamis ayri bir tahminciden gecirilerek hesaplanir.
+        estimator = BurnRateMonitor()
+        for sample_ts, sample_mb in history.samples(since=last_ts - 2 * BURN_RATE_TIME_CONSTANT):
+            state = estimator.observe(username, sample_mb, sample_ts)
+        if state.rate is not None:
+            hours_left = state.hours_left
+            print(
+                f"    tahmini tuketim: {state.rate:.1f} MB/saat"
+                + (f", kota bitimine ~{hours_left:.1f} saat" if hours_left is not None else "")
+            )
+    return 0
+
+# --- Adaptif Oturum Acik Tutma --- #
+# Portalin gercek bosta kalma (idle) zaman asimini ogrenir: basarili bir kontrolden sonra
+# gecen en uzun sure "guvenli", SESSION_EXPIRED alinan en kisa sure "zaman asimi" olarak
+# kaydedilir. Aralik bu iki deger arasinda ikili arama ile daraltilir ve guvenlik payi
+# birakilarak en uzun guvenli araliga yakinsanir. Ogrenilenler dosyada saklanir.
+ADAPTIVE_MIN_INTERVAL = FAST_AJAX_INTERVAL # Adaptif modda en kisa kontrol araligi (saniye)
+ADAPTIVE_MAX_INTERVAL = 3600 # Adaptif modda en uzun kontrol araligi (saniye) - 1 saat
+ADAPTIVE_GROWTH_FACTOR = 1.5 # Zaman asimi gorulmediyse araligin buyutulme orani
+ADAPTIVE_SAFETY_MARGIN = 0.2 # Ogrenilen zaman asiminin altinda birakilan pay (%20)
+ADAPTIVE_TOLERANCE = 30 # Guvenli/zaman asimi sinirlari bu kadar yaklasinca arama biter (saniye)
+KEEPALIVE_PROFILE_VERSION = 1
+
+
+class AdaptiveKeepAlive:
+    """Learns the portal's idle timeout from keep-alive outcomes and picks the next interval."""
+
+    def __init__(self, path: Optional[Path] = KEEPALIVE_PROFILE_PATH) -> None:
+        self.path = path
+        self.safe_gap = 0.0
+        self.expired_gap: Optional[float] = None
+        self._last_success: Dict[str, float] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != KEEPALIVE_PROFILE_VERSION:
+                return
+            self.safe_gap = float(data.get("safe_gap") or 0.0)
+            expired_gap = data.get("expired_gap")
+            self.expired_gap = float(expired_gap) if expired_gap is not None else None
+            logging.debug(f"Adaptif profil yuklendi: guvenli={self.safe_gap:.0f} sn, zaman asimi={self.expired_gap}")
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Adaptif keep-alive profili ({self.path}) okunamadi: {e}")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        payload = {
+            "version": KEEPALIVE_PROFILE_VERSION,
+            "safe_gap": self.safe_gap,
+            "expired_gap": self.expired_gap,
+            "updated_at": time.time(),
+        }
+        try:
+            atomic_write_text(self.path, json.dumps(payload, indent=2))
+        except OSError as e:
+            logging.warning(f"Adaptif keep-alive profili ({self.path}) yazilamadi: {e}")
+
+    def _idle_since(self, key: str, last_activity: Optional[float]) -> Optional[float]:
+        # Son basarili ping'den sonra portala baska bir istek gittiyse bosta kalma ondan baslar.
+        previous = self._last_success.get(key)
+        if previous is None or last_activity is None:
+            return previous if last_activity is None else last_activity
+        return max(previous, last_activity)
+
+    def record_success(self, key: str = "default", now: Optional[float] = None, last_activity: Optional[float] = None) -> None:
+        """A keep-alive ping succeeded; the idle gap before it is known to be safe.
+
+        `last_activity` is the time of the last authenticated request sent before this ping
+        (see last_portal_activity); the idle gap is measured from the later of it and the
+        previous success.
+        """
+        now = time.monotonic() if now is None else now
+        previous = self._idle_since(key, last_activity)
+        self._last_success[key] = now
+        if previous is None:
+            return
+        gap = now - previous
+        if gap <= self.safe_gap:
+            return
+        self.safe_gap = gap
+        if self.expired_gap is not None and gap >= self.expired_gap:
+            logging.info("Adaptif mod: daha uzun bir bekleme basarili oldu, onceki zaman asimi olcumu siliniyor.")
+            self.expired_gap = None
+        self.save()
+
+    def record_expired(self, key: str = "default", now: Optional[float] = None, last_activity: Optional[float] = None) -> None:
+        """The session expired; the idle gap since the last request bounds the timeout from above."""
+
+        now = time.monotonic() if now is None else now
+        previous = self._idle_since(key, last_activity)
+        self._last_success.pop(key, None)
+        if previous is None:
+            return
+        gap = now - previous
+        if gap <= self.safe_gap:
+            # Bilinen guvenli sureden kisa: bosta kalma disinda bir sebep (portal yeniden baslatma vb.)
+            logging.debug(f"Adaptif mod: {gap:.0f} sn sonra oturum dustu, guvenli sureden kisa oldugu icin yok sayildi.")
+            return
+        if self.expired_gap is None or gap < self.expired_gap:
+            self.expired_gap = gap
+            logging.info(f"Adaptif mod: oturum {gap:.0f} sn bosta kaldiktan sonra dustu.")
+            self.save()
+
+    def next_interval(self) -> float:
+        """Interval (seconds) to wait before the next keep-alive ping."""
+
+        if self.expired_gap is None:
+            if self.safe_gap:
+                candidate = self.safe_gap * ADAPTIVE_GROWTH_FACTOR
+            else:
+                candidate = AJAX_INTERVAL
+        elif self.expired_gap - self.safe_gap > ADAPTIVE_TOLERANCE:
+            candidate = (self.safe_gap + self.expired_gap) / 2
+        else:
+            candidate = self.expired_gap * (1 - ADAPTIVE_SAFETY_MARGIN)
+        return max(ADAPTIVE_MIN_INTERVAL, min(ADAPTIVE_MAX_INTERVAL, candidate))
 
 # --- Giris Bilgilerini Degistirme Islevi ---
 def handle_credential_change(current_session: requests.Session) -> requests.Session:
@@ -683,7 +3183,7 @@ def handle_credential_change(current_session: requests.Session) -> requests.Sess
         # Update global variables
         USERNAME = new_username
         PASSWORD = new_password
-        load_dotenv(override=True) # Reload to ensure consistency
+        dotenv.load_dotenv(override=True) # Reload to ensure consistency
         print(f"{G}Giris bilgileri basariyla guncellendi.{RS}")
 
         # Force logout of the current session if it exists and was logged in
@@ -709,7 +3209,7 @@ def handle_credential_change(current_session: requests.Session) -> requests.Sess
         logged_in = False
         last_view_state = None
         login_attempts = 0 # Reset general login attempts too
-        new_session = requests.Session() # Create a new session for the new credentials
+        new_session = reset_portal_session(current_session) # Clear cookies for the new credentials, keep the connection pool
         print(f"{Y}Yeni bilgilerle tekrar giris yapilacak...{RS}")
         animated_sleep(2, "Yeniden baslatiliyor...", color=Y) # Don't check interruption here, let loop handle it
         return new_session # Return the new session
@@ -723,12 +3223,973 @@ def handle_credential_change(current_session: requests.Session) -> requests.Sess
         animated_sleep(2, "Hata...", color=R) # Don't check interruption here
         return current_session # Return the old session on error
 
+# --- Coklu Hesap Yonetimi --- #
+# Birden fazla KYK hesabini tek bir surecte, tek bir zamanlayici dongusu ile acik tutar.
+# Her hesabin kendi oturumu (session), ViewState'i ve bir sonraki kontrol zamani vardir.
+
+def mask_username(username: str) -> str:
+    """Return a log-safe form of a T.C. ID number (only the last 4 digits visible)."""
+
+    if len(username) <= 4:
+        return "*" * len(username)
+    return "*" * (len(username) - 4) + username[-4:]
+
+
+@dataclass
+class AccountState:
+    """Per-account keep-alive state driven by KeepAliveScheduler."""
+
+    username: str
+    password: str
+    session: requests.Session = field(default_factory=new_portal_session, repr=False)
+    view_state: Optional[str] = field(default=None, repr=False)
+    logged_in: bool = False
+    disabled: bool = False
+    logged_out: bool = False # Kontrol arayuzu ile kapatildi (hata degil)
+    next_due: float = 0.0
+    retry: RetryPolicy = field(default_factory=RetryPolicy, repr=False) # Sinirsiz; ustel ve rastgele bekleme
+    last_quota: Optional[str] = None
+    last_quota_at: Optional[float] = None # Son basarili kota sorgusunun zamani (Unix saniye)
+    session_file: Optional[Path] = None
+    view_states: ViewStateManager = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.view_states = ViewStateManager(self.session)
+
+    @property
+    def label(self) -> str:
+        return mask_username(self.username)
+
+    def reset_session(self) -> None:
+        reset_portal_session(self.session)
+        self.view_state = None
+        self.logged_in = False
+
+
+def load_accounts(path: Path) -> List[AccountState]:
+    """Read 'kullanici_adi:sifre' lines from an accounts file (# starts a comment)."""
+
+    accounts: List[AccountState] = []
+    seen = set()
+    for line_no, raw_line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        username, sep, password = line.partition(":")
+        username = username.strip()
+        password = password.strip()
+        if not sep or not username or not password:
+            logging.warning(f"{path} satir {line_no}: 'kullanici_adi:sifre' formatinda degil, atlaniyor.")
+            continue
+        if username in seen:
+            logging.warning(f"{path} satir {line_no}: {mask_username(username)} tekrar ediyor, atlaniyor.")
+            continue
+        seen.add(username)
+        accounts.append(AccountState(username=username, password=password))
+    return accounts
+
+
+class SchedulerNotRunning(RuntimeError):
+    """call_soon() was used while the scheduler loop is not (or no longer) running."""
+
+
+class KeepAliveScheduler:
+    """Drives login/keep-alive for many accounts from one loop using a due-time heap."""
+
+    def __init__(
+        self,
+        accounts: Sequence[AccountState],
+        interval: float = AJAX_INTERVAL,
+        adaptive: Optional[AdaptiveKeepAlive] = None,
+    ) -> None:
+        self.accounts = list(accounts)
+        self.interval = interval
+        self.adaptive = adaptive
+        self._heap: List[Tuple[float, int]] = []
+        self._calls: "queue.SimpleQueue[Tuple[Callable[[], object], concurrent.futures.Future]]" = queue.SimpleQueue()
+        self._calls_lock = threading.Lock()
+        self.running = False # run() dongusu calisirken True; degilse call_soon hemen hata verir
+        now = time.monotonic()
+        for index, account in enumerate(self.accounts):
+            account.next_due = now
+            self._heap.append((account.next_due, index))
+        heapq.heapify(self._heap)
+
+    def _schedule_all_now(self) -> None:
+        # Ag degisti: her hesap hemen kontrol edilir, bekleyen yeniden deneme suresi atlanir.
+        now = time.monotonic()
+        self._heap = []
+        for index, account in enumerate(self.accounts):
+            if account.disabled:
+                continue
+            account.retry.reset()
+            account.next_due = now
+            self._heap.append((now, index))
+        heapq.heapify(self._heap)
+
+    def _schedule(self, index: int, delay: float) -> None:
+        account = self.accounts[index]
+        account.next_due = time.monotonic() + delay
+        heapq.heappush(self._heap, (account.next_due, index))
+
+    def call_soon(self, func: Callable[[], object], timeout: Optional[float] = None) -> object:
+        """Run `func` on the scheduler thread between steps and return its result (any thread)."""
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._calls_lock:
+            if not self.running:
+                raise SchedulerNotRunning("hesap dongusu calismiyor")
+            self._calls.put((func, future))
+        interrupt_sleep()
+        return future.result(timeout)
+
+    def _stop_calls(self) -> None:
+        # Dongu bitti: kuyrukta kalan istekler beklemek yerine hemen hata alir.
+        with self._calls_lock:
+            self.running = False
+        while True:
+            try:
+                _, future = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(SchedulerNotRunning("hesap dongusu sonlandi"))
+
+    def _run_calls(self) -> None:
+        while True:
+            try:
+                func, future = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+
+    def refresh(self, index: int) -> None:
+        """Run an out-of-turn step for one account and reschedule it (scheduler thread only)."""
+
+        account = self.accounts[index]
+        if account.disabled:
+            return
+        delay = self.tick(account)
+        if delay is None:
+            account.next_due = math.inf
+        else:
+            self._schedule(index, delay)
+
+    def logout(self, index: int) -> bool:
+        """Log one account out and stop keeping it alive (scheduler thread only)."""
+
+        account = self.accounts[index]
+        jsessionid = account.session.cookies.get('JSESSIONID') if account.logged_in else None
+        logged_out = bool(jsessionid) and perform_logout(jsessionid)
+        if logged_out:
+            logging.info(f"[{account.label}] Oturum kapatildi.")
+        account.reset_session()
+        account.disabled = account.logged_out = True
+        account.next_due = math.inf
+        if all(other.disabled for other in self.accounts):
+            logging.info("Tum oturumlar kapatildi. Programdan cikiliyor...")
+            request_exit()
+        return logged_out
+
+    def tick(self, account: AccountState) -> Optional[float]:
+        """Run one due step for an account; return the delay until its next step (None = drop)."""
+
+        if not account.logged_in:
+            logging.info(f"[{account.label}] Giris deneniyor...")
+            result = login_attempt(account.session, account.username, account.password, session_file=account.session_file)
+            if result == "CREDENTIAL_ERROR":
+                logging.error(f"[{account.label}] Hatali kullanici adi veya sifre. Hesap devre disi birakildi.")
+                account.disabled = True
+                return None
+            if result is not True:
+                retry_delay = account.retry.next_delay()
+                logging.warning(f"[{account.label}] Giris basarisiz ({account.retry.attempts}. deneme). {retry_delay:.0f} sn sonra tekrar denenecek.")
+                account.reset_session()
+                return retry_delay
+            account.logged_in = True
+            account.retry.reset()
+            logging.info(f"[{account.label}] Oturum acildi.")
+
+        if not account.view_state:
+            account.view_state = account.view_states.acquire()
+            if not account.view_state:
+                logging.error(f"[{account.label}] ViewState alinamadi. Yeniden giris yapilacak.")
+                account.reset_session()
+                return account.retry.next_delay()
+
+        last_activity = last_portal_activity(account.session)
+        quota_info, new_view_state = get_quota_ajax(account.session, account.view_state)
+        if quota_info == "SESSION_EXPIRED":
+            logging.error(f"[{account.label}] Oturumun suresi dolmus. Yeniden giris yapilacak.")
+            if self.adaptive:
+                self.adaptive.record_expired(account.username, last_activity=last_activity)
+            account.reset_session()
+            return 1.0
+
+        if quota_info:
+            record_quota_sample(quota_info, account.username)
+            account.last_quota = quota_info.get("Toplam Kalan Kota", "N/A")
+            account.last_quota_at = time.time()
+            logging.info(f"[{account.label}] Kalan Kota: {account.last_quota}")
+            if self.adaptive:
+                self.adaptive.record_success(account.username, last_activity=last_activity)
+        else:
+            logging.warning(f"[{account.label}] Kota bilgisi alinamadi.")
+        account.view_state = new_view_state
+        if new_view_state:
+            account.view_states.update(new_view_state)
+        else:
+            account.view_states.invalidate() # Sonraki adimdan once arka planda alinir
+        if self.adaptive:
+            return self.adaptive.next_interval()
+        return self.interval
+
+    def run(self) -> None:
+        """Loop until Ctrl+C or until every account has been disabled."""
+
+        interval_text = "adaptif" if self.adaptive else f"{self.interval} sn"
+        logging.info(f"Coklu hesap modu: {len(self.accounts)} hesap, kontrol araligi {interval_text}.")
+        with self._calls_lock:
+            self.running = True
+        try:
+            seen_generation = network_generation()
+            while self._heap and not exit_requested:
+                calls_seen = _interrupt_generation
+                self._run_calls()
+                if network_generation() != seen_generation:
+                    seen_generation = network_generation()
+                    self._schedule_all_now()
+                due, index = self._heap[0]
+                if due != self.accounts[index].next_due or self.accounts[index].disabled:
+                    heapq.heappop(self._heap) # Yeniden planlanmis veya devre disi birakilmis hesabin eski kaydi
+                    continue
+                wait = due - time.monotonic()
+                if wait > 0:
+                    if _interrupt_generation != calls_seen:
+                        continue # Bu arada kontrol arayuzunden yeni bir istek geldi
+                    if animated_sleep(wait, "Sonraki hesap kontrolu bekleniyor...", color=C):
+                        break
+                    continue
+                heapq.heappop(self._heap)
+                delay = self.tick(self.accounts[index])
+                if delay is not None:
+                    self._schedule(index, delay)
+                export_metrics()
+        finally:
+            self._stop_calls()
+        if not self._heap and not exit_requested:
+            logging.error("Aktif hesap kalmadi. Coklu hesap modu sonlandiriliyor.")
+
+    def shutdown(self) -> None:
+        """Log out every account that still holds a portal session."""
+
+        sessions: Dict[str, AccountState] = {}
+        for account in self.accounts:
+            if not account.logged_in:
+                continue
+            jsessionid = account.session.cookies.get('JSESSIONID')
+            if jsessionid:
+                sessions[jsessionid] = account
+            else:
+                logging.warning(f"[{account.label}] Kapatilacak oturum kimligi (JSESSIONID) bulunamadi.")
+            account.logged_in = False
+        failed = shutdown_logouts({jsessionid: account.label for jsessionid, account in sessions.items()})
+        for jsessionid, account in sessions.items():
+            if jsessionid in failed:
+                logging.warning(f"[{account.label}] Oturum kapatilamadi veya dogrulanamadi.")
+            else:
+                logging.info(f"[{account.label}] Oturum kapatildi.")
+
+
+# --- Yerel Kontrol Arayuzu --- #
+# Servis ve coklu hesap modlarinda calisan bir surece yalnizca 127.0.0.1 uzerinden HTTP ile
+# durum, son kota, kota yenileme, cikis ve metrik sorgulari yapilabilir. Durum ve kota
+# yanitlari bellekteki son degerlerden hazirlanir (portala istek gonderilmez); yenileme ve
+# cikis islemleri canli oturum ve ViewState ile zamanlayici thread'inde calistirilir.
+# Arayuz kimlik dogrulamasiz calismaz: KYK_CONTROL_TOKEN ayarli degilse rastgele bir anahtar
+# uretilir ve yalnizca sahibinin okuyabildigi (0600) control_token.txt dosyasina yazilir.
+CONTROL_HOST = "127.0.0.1"
+CONTROL_CALL_TIMEOUT = 2 * REQUEST_TIMEOUT + 10 # Yenileme/cikis isteginin en uzun bekleme suresi (saniye)
+CONTROL_REFRESH_MAX_AGE = 5.0 # /refresh bu sureden yeni kotayi tekrar sorgulamaz; ?max_age=0 yenilemeyi zorlar
+
+
+def load_control_token(path: Path = CONTROL_TOKEN_PATH) -> str:
+    """KYK_CONTROL_TOKEN, else the token in `path` (created with mode 0600 when missing)."""
+
+    import secrets
+
+    token = os.getenv("KYK_CONTROL_TOKEN", "").strip()
+    if token:
+        return token
+    if path.exists():
+        if os.name == "posix" and path.stat().st_mode & 0o077:
+            logging.warning(f"{path} baska kullanicilarca okunabiliyor; yeni bir anahtar uretiliyor.")
+        else:
+            token = path.read_text(encoding="utf-8").strip()
+            if token:
+                return token
+    token = secrets.token_urlsafe(32)
+    atomic_write_text(path, token + "\n") # mkstemp dosyayi 0600 izniyle olusturur
+    if os.name == "posix":
+        os.chmod(path, 0o600)
+    logging.info(f"Kontrol arayuzu anahtari {path} dosyasina yazildi.")
+    return token
+
+
+def account_status(account: AccountState, now: Optional[float] = None) -> Dict[str, object]:
+    """JSON-serialisable status of one account (no portal requests)."""
+
+    now = time.monotonic() if now is None else now
+    return {
+        "account": account.label,
+        "logged_in": account.logged_in,
+        "disabled": account.disabled,
+        "last_quota": account.last_quota,
+        "remaining_mb": parse_quota_mb(account.last_quota) if account.last_quota else None,
+        "last_quota_at": account.last_quota_at,
+        "next_check_in": round(max(0.0, account.next_due - now), 1) if math.isfinite(account.next_due) else None,
+        "failed_attempts": account.retry.attempts,
+    }
+
+
+class ControlRequestHandler:
+    """GET /status, /quota, /metrics; POST /refresh, /logout (optional ?account=<last digits>).
+
+    Combined with http.server.BaseHTTPRequestHandler by ControlServer, so http.server is only
+    imported when the control API is started.
+    """
+
+    control: "ControlServer" # ControlServer her sunucu icin ayarlar
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f"Kontrol arayuzu: {self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status: int, data: object) -> None:
+        self._send(status, json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+
+    def _authorized(self) -> bool:
+        token = self.control.token
+        supplied = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        return bool(supplied) and hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
+
+    def _selected_accounts(self, query: Dict[str, List[str]]) -> Optional[List[int]]:
+        scheduler = self.control.scheduler
+        wanted = query.get("account", [None])[0]
+        if not wanted:
+            return list(range(len(scheduler.accounts)))
+        matches = [index for index, account in enumerate(scheduler.accounts) if account.username.endswith(wanted)]
+        return matches if len(matches) == 1 else None
+
+    def _dispatch(self, method: str) -> None:
+        if not self._authorized():
+            self._send_json(401, {"error": "yetkisiz"})
+            return
+        url = urllib.parse.urlsplit(self.path)
+        route = (method, url.path.rstrip("/") or "/")
+        handler = {
+            ("GET", "/status"): self._status,
+            ("GET", "/quota"): self._quota,
+            ("GET", "/metrics"): self._metrics,
+            ("POST", "/refresh"): self._refresh,
+            ("POST", "/logout"): self._logout,
+        }.get(route)
+        if handler is None:
+            self._send_json(404, {"error": f"bilinmeyen istek: {method} {url.path}"})
+            return
+        self.query = urllib.parse.parse_qs(url.query)
+        indices = self._selected_accounts(self.query)
+        if indices is None:
+            self._send_json(404, {"error": "hesap bulunamadi veya birden fazla hesapla eslesti"})
+            return
+        try:
+            handler(indices)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except concurrent.futures.TimeoutError:
+            self._send_json(504, {"error": "islem zaman asimina ugradi"})
+        except SchedulerNotRunning as e:
+            self._send_json(503, {"error": str(e)})
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        if int(self.headers.get("Content-Length") or 0):
+            self.rfile.read(int(self.headers["Content-Length"]))
+        self._dispatch("POST")
+
+    def _accounts(self, indices: Sequence[int]) -> List[Dict[str, object]]:
+        now = time.monotonic()
+        return [account_status(self.control.scheduler.accounts[index], now) for index in indices]
+
+    def _status(self, indices: Sequence[int]) -> None:
+        watcher = network_watcher
+        self._send_json(200, {
+            "pid": os.getpid(),
+            "uptime": round(time.monotonic() - self.control.started_at, 1),
+            "circuit": PORTAL_BREAKER.state,
+            "network_watch": watcher.backend if watcher else None,
+            "accounts": self._accounts(indices),
+        })
+
+    def _quota(self, indices: Sequence[int]) -> None:
+        fields = ("account", "last_quota", "remaining_mb", "last_quota_at")
+        accounts = [{key: status[key] for key in fields} for status in self._accounts(indices)]
+        self._send_json(200, {"accounts": accounts})
+
+    def _metrics(self, indices: Sequence[int]) -> None:
+        self._send(200, METRICS.to_prometheus(), content_type="text/plain; version=0.0.4")
+
+    def _refresh(self, indices: Sequence[int]) -> None:
+        # Ayni anda gelen yenileme istekleri QUOTA_CACHE uzerinden tek portal istegini paylasir.
+        scheduler = self.control.scheduler
+        max_age = float(self.query.get("max_age", [CONTROL_REFRESH_MAX_AGE])[0])
+        for index in indices:
+            QUOTA_CACHE.fetch(
+                scheduler.accounts[index].username,
+                lambda index=index: scheduler.call_soon(lambda: scheduler.refresh(index), timeout=CONTROL_CALL_TIMEOUT),
+                max_age=max_age,
+                timeout=CONTROL_CALL_TIMEOUT,
+            )
+        self._send_json(200, {"accounts": self._accounts(indices)})
+
+    def _logout(self, indices: Sequence[int]) -> None:
+        scheduler = self.control.scheduler
+        results = scheduler.call_soon(lambda: [scheduler.logout(index) for index in indices], timeout=CONTROL_CALL_TIMEOUT)
+        self._send_json(200, {"accounts": [
+            {"account": scheduler.accounts[index].label, "logged_out": logged_out}
+            for index, logged_out in zip(indices, results)  # type: ignore[call-overload]
+        ]})
+
+
+class ControlServer:
+    """Localhost-only control endpoint bound to a running KeepAliveScheduler."""
+
+    def __init__(self, scheduler: KeepAliveScheduler, port: int, token: Optional[str] = None) -> None:
+        import http.server
+
+        self.token = token or load_control_token() # Her istekte 'Authorization: Bearer <token>' gerekir
+        self.scheduler = scheduler
+        self.started_at = time.monotonic()
+        handler = type("ControlHTTPRequestHandler", (ControlRequestHandler, http.server.BaseHTTPRequestHandler), {"control": self})
+        self._httpd = http.server.ThreadingHTTPServer((CONTROL_HOST, port), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="control-api", daemon=True)
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        return self._httpd.server_address  # type: ignore[return-value]
+
+    def start(self) -> "ControlServer":
+        self._thread.start()
+        logging.info(f"Kontrol arayuzu dinleniyor: http://{CONTROL_HOST}:{self.server_address[1]}/status")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def run_scheduler(scheduler: KeepAliveScheduler, control_port: Optional[int] = None) -> None:
+    """Run a scheduler (with the control API when a port is given) and log out on exit."""
+
+    control: Optional[ControlServer] = None
+    if control_port is not None:
+        try:
+            control = ControlServer(scheduler, control_port).start()
+        except OSError as e:
+            logging.error(f"Kontrol arayuzu {CONTROL_HOST}:{control_port} adresinde acilamadi: {e}")
+    try:
+        scheduler.run()
+    finally:
+        if control is not None:
+            control.stop()
+        scheduler.shutdown()
+
+
+def run_multi_account(
+    accounts_path: Path,
+    interval: Optional[float] = AJAX_INTERVAL,
+    control_port: Optional[int] = None,
+) -> int:
+    """Entry point for --accounts (interval=None selects the adaptive interval); returns the exit code."""
+
+    try:
+        accounts = load_accounts(accounts_path)
+    except OSError as e:
+        logging.error(f"Hesap dosyasi ({accounts_path}) okunamadi: {e}")
+        return 1
+    if not accounts:
+        logging.error(f"Hesap dosyasinda ({accounts_path}) gecerli hesap bulunamadi.")
+        return 1
+
+    if interval is None:
+        scheduler = KeepAliveScheduler(accounts, adaptive=AdaptiveKeepAlive())
+    else:
+        scheduler = KeepAliveScheduler(accounts, interval=interval)
+    try:
+        run_scheduler(scheduler, control_port)
+    finally:
+        logging.info("Coklu hesap modu sonlandi.")
+    return 0
+
+
+# --- Servis (Daemon) Modu --- #
+# systemd, konteyner vb. ortamlar icin etkilesimsiz calisma. Giris bilgileri yalnizca
+# ortam degiskenlerinden veya .env dosyasindan okunur; stdin hic kullanilmaz.
+
+def run_daemon(mode: str, interval: Optional[float], control_port: Optional[int] = None) -> int:
+    """Entry point for --daemon: keeps the .env account alive without any prompts."""
+
+    dotenv.load_dotenv(dotenv_path=DOTENV_PATH)
+    username = os.getenv("KYK_USERNAME")
+    password = os.getenv("KYK_PASSWORD")
+    if not username or not password:
+        logging.error("Servis modu icin KYK_USERNAME ve KYK_PASSWORD ortam degiskenleri veya .env dosyasi gerekli.")
+        return 2
+
+    account = AccountState(username=username, password=password, session_file=SESSION_FILE_PATH)
+    resumed_view_state = resume_stored_session(account.session, username)
+    if resumed_view_state:
+        account.logged_in = True
+        account.view_state = resumed_view_state
+
+    if mode == "fast":
+        scheduler = KeepAliveScheduler([account], interval=FAST_AJAX_INTERVAL)
+    elif interval is None:
+        scheduler = KeepAliveScheduler([account], adaptive=AdaptiveKeepAlive())
+    else:
+        scheduler = KeepAliveScheduler([account], interval=interval)
+
+    logging.info(f"Servis modu baslatildi ({mask_username(username)}, mod: {mode}).")
+    try:
+        run_scheduler(scheduler, control_port)
+    finally:
+        logging.info("Servis modu sonlandi.")
+    return 1 if account.disabled and not account.logged_out else 0
+
+
+# --- Toplu Hesap Ice Aktarma --- #
+# CSV veya TOML bir listedeki hesaplar, sinirli sayida is parcacigi (thread) ile ve portala
+# saniyede en fazla ROSTER_LOGIN_RATE giris denemesi gidecek sekilde dogrulanir. Gecerli
+# hesaplar accounts.txt dosyasina eklenir (coklu hesap modu bunu kullanir), dogrulama
+# sirasinda acilan oturumlar hemen kapatilir ve her satir icin bir rapor (CSV) yazilir.
+ROSTER_WORKERS = 8 # Ayni anda dogrulanan en fazla hesap
+ROSTER_LOGIN_RATE = 2.0 # Portala saniyede en fazla giris denemesi (tum is parcaciklari toplami)
+ROSTER_MAX_ATTEMPTS = 3 # Ag/sunucu hatasinda hesap basina en fazla deneme
+ROSTER_USERNAME_COLUMNS = ("username", "kullanici_adi", "tc", "tckn")
+ROSTER_PASSWORD_COLUMNS = ("password", "sifre")
+
+
+@dataclass(frozen=True)
+class RosterEntry:
+    """One row of a roster file."""
+
+    line: int
+    username: str
+    password: str = field(repr=False)
+
+
+@dataclass
+class RosterResult:
+    """Validation outcome of one roster row."""
+
+    line: int
+    account: str
+    status: str # "valid", "invalid_credentials", "error", "skipped"
+    detail: str = ""
+    seconds: float = 0.0
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def read_roster(path: Path) -> Tuple[List[RosterEntry], List[RosterResult]]:
+    """Parse a CSV (header or 'username,password' rows) or TOML ([[account]] tables) roster."""
+
+    rows: List[Tuple[int, str, str]] = []
+    if path.suffix.lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML hesap listesi icin Python 3.11 veya ustu gerekli; CSV kullanin.") from None
+
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+        for number, table in enumerate(data.get("account", data.get("accounts", [])), start=1):
+            if not isinstance(table, dict):
+                raise ValueError(f"{path}: {number}. hesap kaydi bir tablo degil ([[account]] kullanin).")
+            rows.append((number, str(table.get("username", "")).strip(), str(table.get("password", "")).strip()))
+    else:
+        import csv
+
+        with path.open(newline="", encoding="utf-8-sig") as roster_file:
+            user_column, password_column = 0, 1
+            first_row = True
+            for line_no, record in enumerate(csv.reader(roster_file), start=1):
+                cells = [cell.strip() for cell in record]
+                if not any(cells) or cells[0].startswith("#"):
+                    continue
+                header = [cell.lower() for cell in cells]
+                if first_row and any(name in header for name in ROSTER_USERNAME_COLUMNS):
+                    # Baslik satiri: sutunlar adlarina gore bulunur (ek sutunlar yok sayilir)
+                    user_column = next(header.index(name) for name in ROSTER_USERNAME_COLUMNS if name in header)
+                    password_column = next((header.index(name) for name in ROSTER_PASSWORD_COLUMNS if name in header), user_column + 1)
+                    first_row = False
+                    continue
+                first_row = False
+                cells += [""] * (max(user_column, password_column) + 1 - len(cells))
+                rows.append((line_no, cells[user_column], cells[password_column]))
+
+    entries: List[RosterEntry] = []
+    skipped: List[RosterResult] = []
+    seen = set()
+    for line_no, username, password in rows:
+        if not username or not password:
+            skipped.append(RosterResult(line_no, mask_username(username), "skipped", "kullanici adi veya sifre eksik"))
+        elif username in seen:
+            skipped.append(RosterResult(line_no, mask_username(username), "skipped", "tekrar eden hesap"))
+        else:
+            seen.add(username)
+            entries.append(RosterEntry(line_no, username, password))
+    return entries, skipped
+
+
+def validate_roster_entry(entry: RosterEntry, limiter: RateLimiter) -> RosterResult:
+    """Log in with one roster account (retrying network errors), then log the session out."""
+
+    started = time.monotonic()
+    label = mask_username(entry.username)
+    session = new_portal_session()
+    retry = RetryPolicy(max_attempts=ROSTER_MAX_ATTEMPTS)
+    while not exit_requested:
+        limiter.acquire()
+        result = login_attempt(session, entry.username, entry.password, session_file=None)
+        if result is True:
+            jsessionid = session.cookies.get('JSESSIONID')
+            detail = "" if jsessionid and perform_logout(jsessionid) else "dogrulama oturumu kapatilamadi"
+            return RosterResult(entry.line, label, "valid", detail, time.monotonic() - started)
+        if result == "CREDENTIAL_ERROR":
+            return RosterResult(entry.line, label, "invalid_credentials", "", time.monotonic() - started)
+        delay = retry.next_delay()
+        if retry.exhausted:
+            break
+        reset_portal_session(session)
+        deadline = time.monotonic() + delay
+        while not exit_requested and time.monotonic() < deadline:
+            time.sleep(min(0.5, deadline - time.monotonic()))
+    detail = "iptal edildi" if exit_requested else f"{retry.attempts} denemede portala giris yapilamadi"
+    return RosterResult(entry.line, label, "error", detail, time.monotonic() - started)
+
+
+def write_roster_report(path: Path, results: Sequence[RosterResult]) -> None:
+    import csv
+    import io
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("line", "account", "status", "detail", "seconds"))
+    for result in sorted(results, key=lambda item: item.line):
+        writer.writerow((result.line, result.account, result.status, result.detail, f"{result.seconds:.2f}"))
+    atomic_write_text(path, buffer.getvalue())
+
+
+def merge_accounts_file(path: Path, entries: Sequence[RosterEntry]) -> int:
+    """Append validated accounts to an accounts file (existing usernames are kept); returns the count added."""
+
+    existing = path.read_text(encoding="utf-8") if path.exists() else ""
+    known = {line.partition(":")[0].strip() for line in existing.splitlines() if line.strip() and not line.startswith("#")}
+    new_lines = [f"{entry.username}:{entry.password}" for entry in entries if entry.username not in known]
+    if new_lines:
+        prefix = existing if not existing or existing.endswith("\n") else existing + "\n"
+        atomic_write_text(path, prefix + "\n".join(new_lines) + "\n")
+    return len(new_lines)
+
+
+def run_roster_import(
+    roster_path: Path,
+    accounts_path: Path = ACCOUNTS_FILE_PATH,
+    report_path: Optional[Path] = None,
+    workers: int = ROSTER_WORKERS,
+    rate: float = ROSTER_LOGIN_RATE,
+) -> int:
+    """Entry point for --import-roster: validate every roster account and report the results."""
+
+    try:
+        entries, results = read_roster(roster_path)
+    except (OSError, ValueError) as e:
+        logging.error(f"Hesap listesi ({roster_path}) okunamadi: {e}")
+        return 2
+    if not entries:
+        logging.error(f"Hesap listesinde ({roster_path}) dogrulanacak hesap bulunamadi.")
+        return 2
+    probe = probe_portal(captive_check=False)
+    if not probe.portal_reachable:
+        logging.error(f"KYK portalina ulasilamiyor ({probe.status}: {probe.detail}). Dogrulama yapilmadi.")
+        return 1
+
+    logging.info(f"{len(entries)} hesap dogrulaniyor ({workers} is parcacigi, saniyede en fazla {rate:g} giris)...")
+    limiter = RateLimiter(rate)
+    started = time.monotonic()
+    valid: List[RosterEntry] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="roster") as executor:
+        futures = {executor.submit(validate_roster_entry, entry, limiter): entry for entry in entries}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            if result.status == "valid":
+                valid.append(futures[future])
+            logging.info(f"[{done}/{len(entries)}] {result.account}: {result.status} {result.detail}".rstrip())
+
+    report_path = report_path or roster_path.with_name(f"{roster_path.stem}_rapor.csv")
+    write_roster_report(report_path, results)
+    added = merge_accounts_file(accounts_path, sorted(valid, key=lambda entry: entry.line)) if valid else 0
+    counts = {status: sum(1 for result in results if result.status == status) for status in ("valid", "invalid_credentials", "error", "skipped")}
+    print(
+        f"Gecerli: {counts['valid']}, hatali bilgi: {counts['invalid_credentials']}, "
+        f"ag/sunucu hatasi: {counts['error']}, atlanan: {counts['skipped']} "
+        f"({time.monotonic() - started:.0f} sn)"
+    )
+    print(f"Rapor: {report_path}")
+    print(f"{accounts_path} dosyasina {added} yeni hesap eklendi.")
+    return 0 if counts["error"] == 0 else 1
+
+
+# --- Tek Seferlik Komutlar --- #
+# --logout ve --quota; banner, ilk calistirma yardimcisi ve menu olmadan calisip cikar.
+# Yalnizca gereken moduller yuklenir (ornegin --logout BeautifulSoup'u hic yuklemez).
+
+def stored_jsessionid() -> Optional[str]:
+    """JSESSIONID of the last session: session_info.txt first, then the session store."""
+
+    try:
+        if SESSION_FILE_PATH.exists():
+            jsessionid = SESSION_FILE_PATH.read_text(encoding="utf-8").strip()
+            if jsessionid:
+                return jsessionid
+    except OSError as e:
+        logging.warning(f"{SESSION_FILE_PATH} okunamadi: {e}")
+    stored = load_session_store()
+    return stored.jsessionid if stored else None
+
+
+def run_logout_once() -> int:
+    """Entry point for --logout: close the last known session (and any pending ones) and exit."""
+
+    retry_pending_logouts()
+    jsessionid = stored_jsessionid()
+    if not jsessionid:
+        logging.warning("Kapatilacak aktif oturum kimligi (JSESSIONID) bulunamadi.")
+        return 1
+    return 1 if shutdown_logouts({jsessionid: "--logout"}) else 0
+
+
+def run_quota_once() -> int:
+    """Entry point for --quota: print the remaining quota (resuming or logging in) and exit."""
+
+    dotenv.load_dotenv(dotenv_path=DOTENV_PATH)
+    username = os.getenv("KYK_USERNAME")
+    password = os.getenv("KYK_PASSWORD")
+    if not username or not password:
+        logging.error("--quota icin KYK_USERNAME ve KYK_PASSWORD ortam degiskenleri veya .env dosyasi gerekli.")
+        return 2
+
+    session = new_portal_session()
+    view_state = resume_stored_session(session, username)
+    if not view_state:
+        login_result = login_attempt(session, username, password)
+        if login_result == "CREDENTIAL_ERROR":
+            return 2
+        if login_result is not True:
+            return 1
+        view_state = get_initial_viewstate(session)
+        if not view_state:
+            return 1
+
+    quota_info, new_view_state = get_quota_ajax(session, view_state)
+    if not isinstance(quota_info, dict):
+        logging.error("Kota bilgisi alinamadi.")
+        return 1
+    record_quota_sample(quota_info, username)
+    if new_view_state:
+        save_session_store(session, new_view_state, username, force=True)
+    print(quota_info.get("Toplam Kalan Kota", "N/A"))
+    return 0
+
+
+def parse_interval(value: str) -> Optional[float]:
+    """argparse type for --interval: a positive number of seconds, or 'auto' (None)."""
+
+    if value.strip().lower() == "auto":
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"gecersiz aralik: {value!r} (saniye veya 'auto' olmali)")
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("aralik sifirdan buyuk olmali")
+    return seconds
+
+
+def parse_cli_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command line options; with no options the interactive menu is used."""
+
+    parser = argparse.ArgumentParser(description="KYK Wi-Fi otomatik giris ve kota kontrol scripti")
+    parser.add_argument(
+        "--accounts",
+        nargs="?",
+        const=str(ACCOUNTS_FILE_PATH),
+        default=None,
+        metavar="DOSYA",
+        help=f"Birden fazla hesabi tek surecte acik tut ('kullanici_adi:sifre' satirlari, varsayilan: {ACCOUNTS_FILE_PATH.name})",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Etkilesimsiz servis modu: menu, soru ve animasyon yok (systemd/konteyner icin)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("keepalive", "fast"),
+        default="keepalive",
+        help=f"Servis modunda keep-alive turu; 'fast' her {FAST_AJAX_INTERVAL} sn kontrol eder ve --interval'i yok sayar",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        metavar="DOSYA",
+        help="Portal istek metriklerini bu dosyaya yaz (.prom/.txt: Prometheus metni, diger: JSON)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=parse_interval,
+        default=AJAX_INTERVAL,
+        metavar="SANIYE|auto",
+        help=f"Keep-alive kontrol araligi; 'auto' portalin zaman asimini ogrenir (varsayilan: {AJAX_INTERVAL})",
+    )
+    parser.add_argument(
+        "--logout",
+        action="store_true",
+        help="Son oturumu (session_info.txt / session_store.json) kapat ve cik",
+    )
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="--daemon/--accounts ile 127.0.0.1:PORT uzerinde kontrol arayuzu ac (/status, /quota, /refresh, /logout, /metrics)",
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Portal erisilebilirligini (DNS, TCP, captive portal 204 kontrolu) yazdir ve cik",
+    )
+    parser.add_argument(
+        "--quota",
+        action="store_true",
+        help="Kalan kotayi yazdir ve cik (.env bilgileriyle; kayitli oturum varsa giris yapilmaz)",
+    )
+    parser.add_argument(
+        "--import-roster",
+        default=None,
+        metavar="DOSYA",
+        help="CSV/TOML hesap listesini dogrula, gecerli hesaplari accounts.txt'ye (veya --accounts dosyasina) ekle ve cik",
+    )
+    parser.add_argument(
+        "--roster-report",
+        default=None,
+        metavar="DOSYA",
+        help="--import-roster raporunun yazilacagi CSV (varsayilan: <liste>_rapor.csv)",
+    )
+    parser.add_argument(
+        "--roster-workers",
+        type=int,
+        default=ROSTER_WORKERS,
+        metavar="N",
+        help=f"--import-roster icin ayni anda dogrulanan hesap sayisi (varsayilan: {ROSTER_WORKERS})",
+    )
+    parser.add_argument(
+        "--roster-rate",
+        type=float,
+        default=ROSTER_LOGIN_RATE,
+        metavar="N",
+        help=f"--import-roster icin saniyede en fazla giris denemesi (varsayilan: {ROSTER_LOGIN_RATE:g})",
+    )
+    parser.add_argument(
+        "--usage",
+        nargs="?",
+        type=float,
+        const=24.0,
+        default=None,
+        metavar="SAAT",
+        help="Kota gecmisinden son SAAT saatteki kullanimi yazdir ve cik (varsayilan: 24)",
+    )
+    return parser.parse_args(argv)
+
+
 # --- Ana Program Akisi --- #
 # Programin basladigi ve kullanici etkilesiminin yonetildigi ana bolum.
 if __name__ == "__main__":
     # Register signal handler early
-    signal.signal(signal.SIGINT, signal_handler)
-    logging.debug("SIGINT handler registered.")
+    install_signal_handlers()
+
+    cli_args = parse_cli_args()
+    if cli_args.metrics_file:
+        METRICS_EXPORT_PATH = Path(cli_args.metrics_file)
+        atexit.register(export_metrics)
+    if cli_args.daemon:
+        SPINNER_ENABLED = False
+    if cli_args.probe:
+        sys.exit(run_probe_once())
+    if cli_args.logout:
+        sys.exit(run_logout_once())
+    if cli_args.quota:
+        sys.exit(run_quota_once())
+    if cli_args.import_roster:
+        sys.exit(run_roster_import(
+            Path(cli_args.import_roster),
+            accounts_path=Path(cli_args.accounts) if cli_args.accounts else ACCOUNTS_FILE_PATH,
+            report_path=Path(cli_args.roster_report) if cli_args.roster_report else None,
+            workers=cli_args.roster_workers,
+            rate=cli_args.roster_rate,
+        ))
+    if cli_args.usage is not None:
+        sys.exit(run_usage_report(cli_args.usage, Path(cli_args.accounts) if cli_args.accounts else None))
+    start_network_watcher()
+    retry_pending_logouts()
+    if cli_args.accounts:
+        sys.exit(run_multi_account(Path(cli_args.accounts), cli_args.interval, cli_args.control_port))
+    if cli_args.daemon:
+        sys.exit(run_daemon(cli_args.mode, cli_args.interval, cli_args.control_port))
+    if cli_args.control_port is not None:
+        logging.warning("--control-port yalnizca --daemon veya --accounts ile kullanilabilir; yok sayiliyor.")
 
     # --- Program Imzasi ve Bilgileri --- #
     PROGRAM_NAME = "KYK Wi-Fi Giris Scripti"
@@ -805,19 +4266,30 @@ if __name__ == "__main__":
     logging.info("KYK Otomatik Giris & Kota Kontrol Scripti Baslatiliyor...")
 
     # --- Get Credentials & Initial Setup ---
-    load_dotenv(dotenv_path=DOTENV_PATH)
+    dotenv.load_dotenv(dotenv_path=DOTENV_PATH)
     USERNAME, PASSWORD, cred_source = get_credentials()
     if not USERNAME or not PASSWORD:
         print(f"{R}Hata: Giris bilgileri alinamadi. Programdan cikiliyor.{RS}")
         sys.exit(1)
 
-    session = requests.Session() # Internet istekleri icin oturum olustur
+    session = new_portal_session() # Internet istekleri icin oturum olustur
+    view_states = ViewStateManager(session) # ViewState'i takip eder ve gerektiginde arka planda yeniler
     logged_in = False # Giris durumu bayragi
     last_view_state = None # Kota sorgusu icin gerekli bilgi
     login_attempts = 0 # Basarisiz genel giris denemesi sayaci
+    login_retry = RetryPolicy(max_attempts=MAX_LOGIN_ATTEMPTS) # Genel hatalarda bekleme suresi (ustel, rastgele)
     credential_error_attempts = 0 # Basarisiz HATALI GIRIS denemesi sayaci
     save_credentials_requested = False # Flag to save credentials after successful validation
 
+    # --- Kayitli Oturumu Devam Ettirme --- #
+    # .env bilgileriyle calisiliyorsa, onceki calismadan kalan oturum tek AJAX istegi ile denenir.
+    if cred_source == 'env':
+        resumed_view_state = resume_stored_session(session, USERNAME)
+        if resumed_view_state:
+            logged_in = True
+            last_view_state = resumed_view_state
+            view_states.update(resumed_view_state)
+
     # --- Initial Validation (if credentials came from user) ---
     if cred_source == 'user':
         print() # Add separation
@@ -841,15 +4313,17 @@ if __name__ == "__main__":
                 logged_in = True
                 credential_error_attempts = 0
                 login_attempts = 0
+                login_retry.reset()
                 logging.info("="*30)
                 logging.info(f"{G}   ILK GIRIS BASARILI{RS}")
                 logging.info("="*30)
                 print()
                 animated_interrupted = animated_sleep(1, "Oturum bilgileri aliniyor (ViewState)...", color=C)
                 if animated_interrupted or exit_requested: break
-                last_view_state = get_initial_viewstate(session)
+                last_view_state = view_states.acquire()
                 if not last_view_state:
                     logging.warning("Basarili giristen sonra ilk ViewState alinamadi. Kota kontrolu calismayabilir.")
+                save_session_store(session, last_view_state, USERNAME, force=True)
 
                 # Save credentials ONLY if validation was successful AND user requested it initially
                 if save_credentials_requested:
@@ -858,7 +4332,7 @@ if __name__ == "__main__":
                             f.write(f"KYK_USERNAME={USERNAME}\n")
                             f.write(f"KYK_PASSWORD={PASSWORD}\n")
                         print(f"{G}Giris bilgileri .env dosyasina kaydedildi.{RS}")
-                        load_dotenv(override=True) # Ensure env is up-to-date
+                        dotenv.load_dotenv(override=True) # Ensure env is up-to-date
                     except Exception as e:
                         print(f"{R}.env dosyasina kaydederken hata olustu: {e}{RS}")
                         logging.error(f"Basarili dogrulama sonrasi .env kaydi basarisiz: {e}", exc_info=True)
@@ -886,7 +4360,7 @@ if __name__ == "__main__":
                             print(f"{R}Sifre bos olamaz.{RS}")
                     USERNAME = new_username # Update global USERNAME
                     PASSWORD = new_password # Update global PASSWORD
-                    session = requests.Session() # Reset session for new attempt
+                    session = reset_portal_session(session) # Reset session for new attempt
                     print() # Add separation
                     continue # Retry validation with new credentials
                 else:
@@ -899,11 +4373,12 @@ if __name__ == "__main__":
             else: # login_result is False (Network or other error)
                 login_attempts += 1
                 credential_error_attempts = 0 # Reset credential counter on other errors
-                logging.warning(f"Ilk dogrulama sirasinda giris basarisiz (Network/Sunucu Hatasi?). {RETRY_DELAY} saniye sonra tekrar denenecek ({login_attempts}/{MAX_LOGIN_ATTEMPTS})...")
+                retry_delay = login_retry.next_delay()
+                logging.warning(f"Ilk dogrulama sirasinda giris basarisiz (Network/Sunucu Hatasi?). {retry_delay:.0f} saniye sonra tekrar denenecek ({login_attempts}/{MAX_LOGIN_ATTEMPTS})...")
                 print() # Add newline before retry sleep
-                animated_interrupted = animated_sleep(RETRY_DELAY, f"{RETRY_DELAY} sn sonra tekrar denenecek...", color=Y)
+                animated_interrupted = animated_sleep(retry_delay, f"{retry_delay:.0f} sn sonra tekrar denenecek...", color=Y)
                 if animated_interrupted or exit_requested: break # Check after sleep
-                session = requests.Session() # Reset session fully on general errors
+                session = reset_portal_session(session) # Reset session cookies on general errors
                 continue # Retry validation
 
         # After validation loop: Check if we exited due to failure
@@ -934,6 +4409,7 @@ if __name__ == "__main__":
                     if login_result is True:
                         logged_in = True
                         login_attempts = 0 # Reset general attempts on success
+                        login_retry.reset()
                         credential_error_attempts = 0 # Reset credential attempts on success
                         last_view_state = None
                         logging.info("="*30)
@@ -942,9 +4418,10 @@ if __name__ == "__main__":
                         print() # Add newline after successful login message
                         animated_interrupted = animated_sleep(1, "Oturum bilgileri aliniyor (ViewState)...", color=C)
                         if animated_interrupted or exit_requested: break # Check after sleep
-                        last_view_state = get_initial_viewstate(session)
+                        last_view_state = view_states.acquire()
                         if not last_view_state:
                              logging.warning("Basarili giristen sonra ilk ViewState alinamadi. Kota kontrolu calismayabilir.")
+                        save_session_store(session, last_view_state, USERNAME, force=True)
 
                     elif login_result == "CREDENTIAL_ERROR":
                         credential_error_attempts += 1
@@ -967,7 +4444,7 @@ if __name__ == "__main__":
                                  print(f"{C}Mevcut bilgilerle tekrar denenecek...{RS}")
                                  animated_interrupted = animated_sleep(3, "Tekrar deneniyor...", color=Y)
                                  if animated_interrupted or exit_requested: break
-                                 session = requests.Session() # Reset session cookies for retry
+                                 session = reset_portal_session(session) # Reset session cookies for retry
                                  continue # Continue to next loop iteration to retry login
                              elif retry_choice == '2':
                                  session = handle_credential_change(session) # Refactored function
@@ -998,11 +4475,12 @@ if __name__ == "__main__":
                         logged_in = False # This block needs one more level of indentation
                         login_attempts += 1
                         credential_error_attempts = 0 # Reset credential error count on other failures
-                        logging.warning(f"Giris basarisiz (Network/Sunucu Hatasi?). {RETRY_DELAY} saniye sonra tekrar denenecek ({login_attempts}/{MAX_LOGIN_ATTEMPTS})...")
+                        retry_delay = login_retry.next_delay()
+                        logging.warning(f"Giris basarisiz (Network/Sunucu Hatasi?). {retry_delay:.0f} saniye sonra tekrar denenecek ({login_attempts}/{MAX_LOGIN_ATTEMPTS})...")
                         print() # Add newline before retry sleep
-                        animated_interrupted = animated_sleep(RETRY_DELAY, f"{RETRY_DELAY} sn sonra tekrar denenecek...", color=Y)
+                        animated_interrupted = animated_sleep(retry_delay, f"{retry_delay:.0f} sn sonra tekrar denenecek...", color=Y)
                         if animated_interrupted or exit_requested: break # Check after sleep
-                        session = requests.Session() # Reset session fully on general errors
+                        session = reset_portal_session(session) # Reset session cookies on general errors
                         continue # Retry validation
                 else:
                     logging.error(f"{MAX_LOGIN_ATTEMPTS} kez basarisiz genel giris denemesi yapildi (Network vb.). Program durduruluyor.")
@@ -1022,9 +4500,13 @@ if __name__ == "__main__":
                 print(f"{BR}{C}4:{RS} Giriş Bilgilerini Değiştir")
                 print(f"{BR}{C}5:{RS} Oturumu Kapat ve Çık")
                 print(f"{BR}{C}6:{RS} Programdan Çık (Oturum Açık Kalsın)")
+                print(f"{BR}{C}7:{RS} Oturumu Açık Tut (Adaptif Mod - Zaman Aşımını Öğrenir)")
                 print(f"{BR}{M}---------------{RS}")
                 print() # Add newline before prompt
 
+                # Kullanici secim yaparken eskimis ViewState arka planda yenilenir
+                view_states.refresh_if_stale()
+
                 # Kullanicidan secim al
                 choice = input(f"{W}Seciminiz (Varsayilan: 1 - Kalan Kotayı Göster): {RS}").strip()
 
@@ -1044,46 +4526,54 @@ if __name__ == "__main__":
                 if choice == '1':
                     # --- Manuel Kota Kontrolu --- #
                     print(f"{M}{BR}--- Kota Bilgisi Sorgulama ---{RS}")
-                    logging.info("Manuel kota bilgisi kontrol ediliyor...")
-                    if not last_view_state:
-                         animated_interrupted = animated_sleep(1, "ViewState aliniyor...", color=C)
-                         if animated_interrupted or exit_requested: break
-                         last_view_state = get_initial_viewstate(session)
-                         if not last_view_state:
+                    cached_quota = QUOTA_CACHE.get(USERNAME) # Yakin zamanda alinmis kota varsa portala gidilmez
+                    if cached_quota:
+                        quota_info, quota_age = cached_quota
+                        logging.info(f"Kota {quota_age:.0f} sn once alinmisti, onbellekten gosteriliyor.")
+                        print(f"{G}-> Kalan Kota: {quota_info.get('Toplam Kalan Kota', 'N/A')}{RS} ({quota_age:.0f} sn once)")
+                        print() # Add newline after quota info
+                    else:
+                        logging.info("Manuel kota bilgisi kontrol ediliyor...")
+                        last_view_state = view_states.acquire() # Hazirdaki (gerekirse arka planda alinmis) ViewState
+                        if not last_view_state:
                              logging.error("Manuel kota sorgulamasi icin ViewState alinamadi.")
                              logged_in = False
-                             session = requests.Session() # Reset session
+                             session = reset_portal_session(session) # Reset session
                              continue # Go back to main loop start (will trigger login)
 
-                    if exit_requested: break # Check before AJAX
-
-                    animated_interrupted = animated_sleep(2, "Kota sorgulaniyor...", color=C)
-                    if animated_interrupted or exit_requested: break
+                        if exit_requested: break # Check before AJAX
 
-                    quota_info, new_view_state = get_quota_ajax(session, last_view_state)
+                        animated_interrupted = animated_sleep(2, "Kota sorgulaniyor...", color=C)
+                        if animated_interrupted or exit_requested: break
 
-                    if exit_requested: break # Check after AJAX
+                        quota_info, new_view_state = get_quota_ajax(session, last_view_state)
 
-                    if quota_info == "SESSION_EXPIRED":
-                         logging.error("Oturumun suresi dolmus gibi gorunuyor. Yeniden giris denenecek.")
-                         logged_in = False
-                         last_view_state = None
-                         session = requests.Session()
-                         continue
+                        if exit_requested: break # Check after AJAX
 
-                    if quota_info:
-                         quota_value_str = quota_info.get("Toplam Kalan Kota", "N/A")
-                         print(f"{G}-> Kalan Kota: {quota_value_str}{RS}")
-                         print() # Add newline after quota info
-                    else:
-                         logging.warning("-> Kota bilgisi alinamadi.")
-                         print() # Add newline even if quota failed
+                        if quota_info == "SESSION_EXPIRED":
+                             logging.error("Oturumun suresi dolmus gibi gorunuyor. Yeniden giris denenecek.")
+                             logged_in = False
+                             last_view_state = None
+                             session = reset_portal_session(session)
+                             continue
+
+                        if quota_info:
+                             record_quota_sample(quota_info, USERNAME)
+                             quota_value_str = quota_info.get("Toplam Kalan Kota", "N/A")
+                             print(f"{G}-> Kalan Kota: {quota_value_str}{RS}")
+                             print() # Add newline after quota info
+                        else:
+                             logging.warning("-> Kota bilgisi alinamadi.")
+                             print() # Add newline even if quota failed
 
-                    if new_view_state:
-                         last_view_state = new_view_state
-                    else:
-                         logging.warning("Manuel kontrol: AJAX yanitindan yeni ViewState alinamadi.")
-                         last_view_state = None # Force refresh next time
+                        if new_view_state:
+                             last_view_state = new_view_state
+                             view_states.update(new_view_state)
+                             save_session_store(session, last_view_state, USERNAME)
+                        else:
+                             logging.warning("Manuel kontrol: AJAX yanitindan yeni ViewState alinamadi. Yenisi arka planda aliniyor.")
+                             last_view_state = None
+                             view_states.invalidate() # Sonraki sorgudan once hazir olur
 
                     print(f"{M}{BR}------------------------------{RS}")
                     # logging.info("-" * 30)
@@ -1111,16 +4601,12 @@ if __name__ == "__main__":
                         if current_time - last_quota_check_time >= AJAX_INTERVAL:
                             # Updated log message
                             logging.info(f"Oturum aktif tutuluyor (Normal Mod - Kontrol her {AJAX_INTERVAL // 60} dk)... ")
+                            last_view_state = view_states.acquire() # Hazirdaki (gerekirse arka planda alinmis) ViewState
                             if not last_view_state:
-                                logging.debug("Keep-alive icin ViewState aliniyor...")
-                                animated_interrupted = animated_sleep(1, "ViewState aliniyor...", C)
-                                if animated_interrupted or exit_requested: break # Check flag after sleep
-                                last_view_state = get_initial_viewstate(session)
-                                if not last_view_state:
-                                    logging.error("ViewState alinamadi. Oturum hatasi olabilir. Menuye donuluyor.")
-                                    logged_in = False
-                                    session = requests.Session() # Reset session? Maybe just break.
-                                    break # Break inner loop to re-evaluate login state
+                                logging.error("ViewState alinamadi. Oturum hatasi olabilir. Menuye donuluyor.")
+                                logged_in = False
+                                session = reset_portal_session(session) # Reset session? Maybe just break.
+                                break # Break inner loop to re-evaluate login state
 
                             if exit_requested: break # Check flag before potentially long AJAX call
 
@@ -1135,10 +4621,11 @@ if __name__ == "__main__":
                                 logging.error("Oturumun suresi dolmus gibi gorunuyor. Yeniden giris denenecek.")
                                 logged_in = False
                                 last_view_state = None
-                                session = requests.Session()
+                                session = reset_portal_session(session)
                                 break # Break inner loop to re-login
 
                             if quota_info:
+                                record_quota_sample(quota_info, USERNAME)
                                 quota_value_str = quota_info.get("Toplam Kalan Kota", "N/A")
                                 logger.info(f"Kalan Kota: {quota_value_str}")
                                 print() # Add newline after quota info
@@ -1148,14 +4635,17 @@ if __name__ == "__main__":
                                 print() # Add newline even if quota failed
 
                             if new_view_state:
+                                view_states.update(new_view_state)
                                 if new_view_state != last_view_state:
                                     logging.debug("Keep-alive: ViewState guncellendi.")
                                     last_view_state = new_view_state
+                                    save_session_store(session, last_view_state, USERNAME)
                                 else:
                                     logging.debug("Keep-alive: ViewState degismedi.")
                             else:
-                                logging.warning("Keep-alive: AJAX yanitindan yeni ViewState alinamadi. Sonraki kontrol ViewState'i yeniden almayi deneyecek.")
-                                last_view_state = None # Force refresh next time
+                                logging.warning("Keep-alive: AJAX yanitindan yeni ViewState alinamadi. Yenisi arka planda aliniyor.")
+                                last_view_state = None
+                                view_states.invalidate() # Sonraki kontrolden once hazir olur
 
                             last_quota_check_time = current_time
 
@@ -1170,6 +4660,7 @@ if __name__ == "__main__":
                         sleep_duration = max(0.5, AJAX_INTERVAL - time_since_last_check)
                         logging.debug(f"Keep-alive: Sonraki kontrol icin {sleep_duration:.1f} saniye bekleniyor...")
                         # Updated animated sleep message
+                        sleep_generation = _interrupt_generation
                         interrupted = animated_sleep(sleep_duration, "Sonraki oturum kontrolu bekleniyor...", color=C)
 
                         # Check if sleep was interrupted OR if flag was set during quota check
@@ -1179,6 +4670,8 @@ if __name__ == "__main__":
                             # Reset the flag so the main loop continues instead of exiting
                             exit_requested = False
                             break # Exit inner keep-alive loop
+                        if _interrupt_generation != sleep_generation:
+                            last_quota_check_time = 0 # Ag degisti; kalan bekleme atlanir, oturum hemen kontrol edilir
 
                     # After the inner loop breaks
                     if not logged_in: # If loop broke due to session issue, don't log this
@@ -1201,16 +4694,12 @@ if __name__ == "__main__":
                         if current_time - last_quota_check_time >= FAST_AJAX_INTERVAL:
                              # Updated log message
                             logging.info(f"Oturum aktif tutuluyor (Hizli Mod - Kontrol her {FAST_AJAX_INTERVAL} sn)... ")
+                            last_view_state = view_states.acquire() # Hazirdaki (gerekirse arka planda alinmis) ViewState
                             if not last_view_state:
-                                logging.debug("Fast Keep-alive icin ViewState aliniyor...")
-                                animated_interrupted = animated_sleep(1, "ViewState aliniyor...", C)
-                                if animated_interrupted or exit_requested: break # Check flag after sleep
-                                last_view_state = get_initial_viewstate(session)
-                                if not last_view_state:
-                                    logging.error("ViewState alinamadi. Oturum hatasi olabilir. Menuye donuluyor.")
-                                    logged_in = False
-                                    session = requests.Session()
-                                    break # Break inner loop to re-evaluate login state
+                                logging.error("ViewState alinamadi. Oturum hatasi olabilir. Menuye donuluyor.")
+                                logged_in = False
+                                session = reset_portal_session(session)
+                                break # Break inner loop to re-evaluate login state
 
                             if exit_requested: break # Check flag before potentially long AJAX call
 
@@ -1223,28 +4712,28 @@ if __name__ == "__main__":
                                 logging.error("Oturumun suresi dolmus gibi gorunuyor. Yeniden giris denenecek.")
                                 logged_in = False
                                 last_view_state = None
-                                session = requests.Session()
+                                session = reset_portal_session(session)
                                 break # Break inner loop to re-login
 
                             if quota_info:
-                                # Quota info received, but we don't display it in fast mode
-                                # quota_value_str = quota_info.get("Toplam Kalan Kota", "N/A")
-                                # logger.info(f"Kalan Kota: {quota_value_str}")
-                                # print() # Add newline after quota info
-                                pass # Explicitly do nothing with the quota info
+                                # Quota info received, but we don't display it in fast mode; it is only recorded
+                                record_quota_sample(quota_info, USERNAME)
                             else:
                                 logging.warning("-> Kota bilgisi (Fast Keep-Alive) alinamadi.")
                                 print() # Add newline even if quota failed
 
                             if new_view_state:
+                                view_states.update(new_view_state)
                                 if new_view_state != last_view_state:
                                     logging.debug("Fast Keep-alive: ViewState guncellendi.")
                                     last_view_state = new_view_state
+                                    save_session_store(session, last_view_state, USERNAME)
                                 else:
                                     logging.debug("Fast Keep-alive: ViewState degismedi.")
                             else:
-                                logging.warning("Fast Keep-alive: AJAX yanitindan yeni ViewState alinamadi. Sonraki kontrol ViewState'i yeniden almayi deneyecek.")
-                                last_view_state = None # Force refresh next time
+                                logging.warning("Fast Keep-alive: AJAX yanitindan yeni ViewState alinamadi. Yenisi arka planda aliniyor.")
+                                last_view_state = None
+                                view_states.invalidate() # Sonraki kontrolden once hazir olur
 
                             last_quota_check_time = current_time
 
@@ -1259,6 +4748,7 @@ if __name__ == "__main__":
                         sleep_duration = max(0.5, FAST_AJAX_INTERVAL - time_since_last_check)
                         logging.debug(f"Fast Keep-alive: Sonraki kontrol icin {sleep_duration:.1f} saniye bekleniyor...")
                         # Updated animated sleep message
+                        sleep_generation = _interrupt_generation
                         interrupted = animated_sleep(sleep_duration, "Sonraki hizli oturum kontrolu bekleniyor...", color=C)
 
                         # Check if sleep was interrupted OR if flag was set during quota check
@@ -1268,12 +4758,77 @@ if __name__ == "__main__":
                             # Reset the flag so the main loop continues instead of exiting
                             exit_requested = False
                             break # Exit inner fast keep-alive loop
+                        if _interrupt_generation != sleep_generation:
+                            last_quota_check_time = 0 # Ag degisti; kalan bekleme atlanir, oturum hemen kontrol edilir
 
                     # After the inner loop breaks
                     if not logged_in: # If loop broke due to session issue, don't log this
                          logging.info("Fast Keep-alive mode stopped (likely session issue). Returning to main loop.")
                          print() # Add newline - This print should be aligned with the logging call above it
 
+                elif choice == '7':
+                    # --- Oturumu Acik Tut Modu (Adaptif) --- #
+                    adaptive_keep_alive = AdaptiveKeepAlive()
+                    logging.info("Adaptif oturumu acik tutma modu baslatiliyor...")
+                    print(f"({Y}Bu moddan cikip menuye donmek icin Ctrl+C tusuna basin{RS})")
+                    print() # Add newline after instruction
+                    while True: # Adaptif oturumu acik tutma dongusu
+                        if exit_requested:
+                            logging.info("Exit requested flag detected during adaptive keep-alive mode.")
+                            break
+
+                        last_view_state = view_states.acquire() # Hazirdaki (gerekirse arka planda alinmis) ViewState
+                        if not last_view_state:
+                            logging.error("ViewState alinamadi. Oturum hatasi olabilir. Menuye donuluyor.")
+                            logged_in = False
+                            session = reset_portal_session(session)
+                            break
+
+                        if exit_requested: break # Check flag before potentially long AJAX call
+
+                        last_activity = last_portal_activity(session) # On yukleme vb. istekler de bosta kalmayi sifirlar
+                        quota_info, new_view_state = get_quota_ajax(session, last_view_state)
+
+                        if exit_requested: break # Check flag immediately after AJAX call
+
+                        if quota_info == "SESSION_EXPIRED":
+                            adaptive_keep_alive.record_expired(last_activity=last_activity)
+                            logging.error("Oturumun suresi dolmus gibi gorunuyor. Yeniden giris denenecek.")
+                            logged_in = False
+                            last_view_state = None
+                            session = reset_portal_session(session)
+                            break # Break inner loop to re-login
+
+                        if quota_info:
+                            adaptive_keep_alive.record_success(last_activity=last_activity)
+                            record_quota_sample(quota_info, USERNAME)
+                            logger.info(f"Kalan Kota: {quota_info.get('Toplam Kalan Kota', 'N/A')}")
+                        else:
+                            logging.warning("-> Kota bilgisi (Adaptif Keep-Alive) alinamadi.")
+
+                        if new_view_state:
+                            last_view_state = new_view_state
+                            view_states.update(new_view_state)
+                            save_session_store(session, last_view_state, USERNAME)
+                        else:
+                            logging.warning("Adaptif keep-alive: AJAX yanitindan yeni ViewState alinamadi. Yenisi arka planda aliniyor.")
+                            last_view_state = None
+                            view_states.invalidate() # Sonraki kontrolden once hazir olur
+
+                        sleep_duration = adaptive_keep_alive.next_interval()
+                        logging.info(f"Adaptif Mod: sonraki kontrol {sleep_duration:.0f} sn sonra.")
+                        print() # Add newline after status
+                        interrupted = animated_sleep(sleep_duration, "Sonraki adaptif oturum kontrolu bekleniyor...", color=C)
+                        if interrupted or exit_requested:
+                            logging.info("Adaptif Oturumu Acik Tut modu Ctrl+C ile durduruldu. Ana menuye donuluyor.")
+                            print() # Add newline before showing menu again
+                            exit_requested = False
+                            break
+
+                    if not logged_in:
+                        logging.info("Adaptive keep-alive mode stopped (likely session issue). Returning to main loop.")
+                        print()
+
                 elif choice == '4': # Was Change Credentials (5)
                     # --- Giris Bilgilerini Degistir (Menu Secenegi) --- #
                     # handle_credential_change adds its own spacing
@@ -1309,7 +4864,7 @@ if __name__ == "__main__":
 
                     logged_in = False
                     last_view_state = None
-                    session = requests.Session()
+                    session = reset_portal_session(session)
                     login_attempts = 0
                     logging.info("Oturum kapatildi. Programdan cikiliyor...")
                     exit_without_logout = True # Prevent finally block from trying logout again
@@ -1323,7 +4878,7 @@ if __name__ == "__main__":
 
                 else: # Corrected indentation
                     # Gecersiz secim durumu
-                    print(f"{R}Gecersiz secim: '{choice}'. Lutfen 1, 2, 3, 4, 5 veya 6 girin.{RS}") # Update error message range
+                    print(f"{R}Gecersiz secim: '{choice}'. Lutfen 1, 2, 3, 4, 5, 6 veya 7 girin.{RS}") # Update error message range
                     animated_interrupted = animated_sleep(1.5, "Hatali secim...", color=R)
                     if animated_interrupted or exit_requested: break
 
@@ -1359,7 +4914,7 @@ if __name__ == "__main__":
                        logging.warning(f"{SESSION_FILE_PATH} dosyasi finalde okunurken hata: {e_final_read}")
 
              if jsessionid_to_logout:
-                 if perform_logout(jsessionid_to_logout):
+                 if not shutdown_logouts({jsessionid_to_logout: mask_username(USERNAME)}):
                      logging.info("Oturum cikista basariyla kapatildi.")
                  else:
                      logging.warning("Oturum cikista kapatilamadi veya durum dogrulanamadi.")
@@ -1368,6 +4923,8 @@ if __name__ == "__main__":
         else:
              if exit_without_logout:
                   logging.info("Program kapatiliyor (Kullanici istegiyle oturum acik birakildi).")
+                  if logged_in and last_view_state:
+                       save_session_store(session, last_view_state, USERNAME, force=True)
              else:
                   logging.info("Program kapatiliyor (Oturum acik degildi veya zaten kapatilmisti).")
 
@@ -0,0 +1,111 @@
+# Testler kyk_wifi_helper'i tools/mock_portal.py uzerinde calistirir. Portal adresi modul
+# yuklenirken okundugu icin portal taklidi, modul import edilmeden once baslatilir.
+# Programin yazdigi calisma dosyalari (log, oturum dosyasi vb.) her test icin gecici bir
+# dizine yonlendirilir.
+#
+#   python -m pytest -q
+from __future__ import annotations
+
+import inspect
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from mock_portal import MockPortal, MockPortalConfig  # noqa: E402
+
+TEST_USERNAME = "12345678901"
+TEST_PASSWORD = "test-password"
+
+# Programin yanina yazdigi dosyalar; her test kendi gecici dizinini kullanir.
+RUNTIME_FILES = {
+    "SESSION_FILE_PATH": "session_info.txt",
+    "SESSION_FILE": "session_info.txt",
+    "SESSION_STORE_PATH": "session_store.json",
+    "KEEPALIVE_PROFILE_PATH": "keepalive_profile.json",
+    "PENDING_LOGOUTS_PATH": "pending_logouts.json",
+    "ACCOUNTS_FILE_PATH": "accounts.txt",
+    "CONTROL_TOKEN_PATH": "control_token.txt",
+    "QUOTA_HISTORY_DIR": "quota_history",
+    "LOG_FILE_PATH": "kyk_login.log",
+}
+
+
+def _swap_log_file(helper, path: Path) -> None:
+    """Point the helper's queued log file writer at path."""
+
+    listener = helper.log_listener
+    if listener is None:
+        return
+    old_handlers = listener.handlers
+    listener.handlers = (helper.build_file_handler(path),)
+    for handler in old_handlers:
+        handler.close()
+
+
+def _redirect_path(helper, monkeypatch, name: str, new_path: Path) -> None:
+    """Point a path constant, and every default argument bound to it, at new_path."""
+
+    old_path = getattr(helper, name)
+    monkeypatch.setattr(helper, name, new_path)
+    functions = []
+    for obj in vars(helper).values():
+        if inspect.isclass(obj) and obj.__module__ == helper.__name__:
+            functions.extend(value for value in vars(obj).values() if inspect.isfunction(value))
+        elif inspect.isfunction(obj):
+            functions.append(obj)
+    for function in map(inspect.unwrap, functions):
+        defaults = function.__defaults__ or ()
+        if any(default is old_path for default in defaults):
+            monkeypatch.setattr(function, "__defaults__", tuple(new_path if d is old_path else d for d in defaults))
+
+
+@pytest.fixture(scope="session")
+def session_log(tmp_path_factory):
+    return tmp_path_factory.mktemp("log") / "kyk_login.log"
+
+
+@pytest.fixture(scope="session")
+def portal():
+    config = MockPortalConfig(accounts={TEST_USERNAME: TEST_PASSWORD}, page_size=16 * 1024, seed=1)
+    with MockPortal(config=config) as mock:
+        yield mock
+
+
+@pytest.fixture(scope="session")
+def helper(portal, session_log):
+    for module in ("requests", "bs4", "dotenv"):
+        pytest.importorskip(module)
+    os.environ["KYK_PORTAL_URL"] = portal.base_url
+    os.environ["KYK_NETWORK_WATCH"] = "0" # Testler gercek ag degisikliklerine tepki vermesin
+    os.environ["KYK_RATE_LIMIT"] = "0" # Paylasilan hiz siniri dosyasina dokunulmaz
+    log_path = REPO_ROOT / "kyk_login.log"
+    log_existed = log_path.exists()
+    import kyk_wifi_helper
+
+    _swap_log_file(kyk_wifi_helper, session_log)
+    if not log_existed and log_path.exists() and log_path.stat().st_size == 0:
+        log_path.unlink() # Modul yuklenirken acilan bos log dosyasi depoda kalmasin
+    return kyk_wifi_helper
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state(request, tmp_path, monkeypatch):
+    """Point every runtime file the helper writes at tmp_path."""
+
+    if "helper" not in request.fixturenames:
+        yield
+        return
+    helper = request.getfixturevalue("helper")
+    for name, file_name in RUNTIME_FILES.items():
+        _redirect_path(helper, monkeypatch, name, tmp_path / file_name)
+    _swap_log_file(helper, tmp_path / "kyk_login.log")
+    monkeypatch.setattr(helper, "PORTAL_BREAKER", helper.CircuitBreaker()) # Onceki testin hatalari devreyi acmasin
+    monkeypatch.setattr(helper, "QUOTA_CACHE", helper.QuotaCache())
+    yield
+    _swap_log_file(helper, request.getfixturevalue("session_log"))
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+
+def test_grows_until_first_expiry_then_bisects(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    assert adaptive.next_interval() == helper.AJAX_INTERVAL
+
+    adaptive.record_success(now=0)
+    adaptive.record_success(now=600)
+    assert adaptive.safe_gap == 600
+    assert adaptive.next_interval() == 900 # 600 * ADAPTIVE_GROWTH_FACTOR
+
+    adaptive.record_expired(now=600 + 1400)
+    assert adaptive.expired_gap == 1400
+    assert adaptive.next_interval() == (600 + 1400) / 2
+
+
+def test_converges_below_the_timeout_with_a_margin(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.safe_gap = 1190
+    adaptive.expired_gap = 1200
+    assert adaptive.next_interval() == 1200 * (1 - helper.ADAPTIVE_SAFETY_MARGIN)
+
+
+def test_early_expiry_is_not_an_idle_timeout(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.record_success(now=0)
+    adaptive.record_success(now=900)
+    adaptive.record_success(now=1000)
+    adaptive.record_expired(now=1100) # Portal yeniden baslatildi; 100 sn bosta kalmak zaman asimi degil
+    assert adaptive.expired_gap is None
+
+
+def test_longer_success_forgets_the_old_timeout(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.expired_gap = 700
+    adaptive.record_success(now=0)
+    adaptive.record_success(now=800)
+    assert adaptive.safe_gap == 800 and adaptive.expired_gap is None
+
+
+def test_profile_survives_restarts(helper, tmp_path):
+    path = tmp_path / "profile.json"
+    adaptive = helper.AdaptiveKeepAlive(path)
+    adaptive.record_success(now=0)
+    adaptive.record_success(now=500)
+    adaptive.record_expired(now=500 + 2000)
+
+    reloaded = helper.AdaptiveKeepAlive(path)
+    assert (reloaded.safe_gap, reloaded.expired_gap) == (500, 2000)
+    path.write_text('{"version": 0, "safe_gap": 1}', encoding="utf-8")
+    assert helper.AdaptiveKeepAlive(path).safe_gap == 0.0
+
+
+def test_interval_stays_within_bounds(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.safe_gap = 10 * helper.ADAPTIVE_MAX_INTERVAL
+    assert adaptive.next_interval() == helper.ADAPTIVE_MAX_INTERVAL
+    adaptive.safe_gap, adaptive.expired_gap = 1, 2
+    assert adaptive.next_interval() == helper.ADAPTIVE_MIN_INTERVAL
+
+
+def test_gap_is_measured_from_the_last_portal_request(helper, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.record_success(now=0)
+    adaptive.record_success(now=1000, last_activity=700) # Arada ViewState on yuklemesi yapildi
+    assert adaptive.safe_gap == 300
+    adaptive.record_expired(now=2500, last_activity=None)
+    assert adaptive.expired_gap == 1500
+
+
+def test_portal_activity_follows_the_session(helper, portal):
+    from conftest import TEST_PASSWORD, TEST_USERNAME
+
+    session = helper.new_portal_session()
+    assert helper.last_portal_activity(session) is None
+    assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+    assert helper.get_initial_viewstate(session)
+    assert helper.last_portal_activity(session) is not None
+    helper.reset_portal_session(session)
+    assert helper.last_portal_activity(session) is None
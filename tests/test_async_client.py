@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import parse_qs
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from conftest import TEST_PASSWORD, TEST_USERNAME  # noqa: E402
+
+PASSWORD = "pw1"
+QUOTA_XML = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<partial-response id="j_id1"><changes>'
+    '<update id="mainPanel:kota"><![CDATA[<table><tbody><tr>'
+    '<td><label class="ui-outputlabel">Toplam Kalan Kota (MB):</label></td>'
+    '<td><label class="ui-outputlabel">1234.50</label></td></tr></tbody></table>]]></update>'
+    '<update id="j_id1:javax.faces.ViewState:0"><![CDATA[{view_state}]]></update>'
+    "</changes></partial-response>"
+)
+
+
+def portal_transport(helper, state):
+    """httpx.MockTransport answering like the four portal endpoints."""
+
+    def handle(request):
+        url = str(request.url)
+        if request.method == "GET" and url == helper.LOGOUT_URL:
+            state["logged_out"] = request.headers.get("Cookie")
+            return httpx.Response(200, text="<p>Basari ile cikis yaptiniz</p>")
+        if request.method == "GET" and url.startswith(helper.LOGIN_URL):
+            return httpx.Response(200, text="<form></form>", headers={"Set-Cookie": "JSESSIONID=ASYNC1; Path=/"})
+        if request.method == "POST" and url == helper.CHECK_URL:
+            form = parse_qs(request.content.decode())
+            location = helper.SUCCESS_URL if form["j_password"] == [PASSWORD] else helper.LOGIN_URL + "?error=1"
+            return httpx.Response(302, headers={"Location": location})
+        if request.method == "GET" and url == helper.SUCCESS_URL:
+            return httpx.Response(200, text='<form><input type="hidden" name="javax.faces.ViewState" value="VS1"/></form>')
+        if request.method == "POST" and url == helper.SUCCESS_URL:
+            if state.get("expired"):
+                return httpx.Response(200, text="<html>login</html>", headers={"Content-Type": "text/html"})
+            return httpx.Response(200, text=QUOTA_XML.format(view_state="VS2"), headers={"Content-Type": "text/xml"})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handle)
+
+
+def run_client(helper, state, scenario):
+    async def main():
+        async with httpx.AsyncClient(transport=portal_transport(helper, state), follow_redirects=True) as client:
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_async_login_viewstate_quota_logout(helper):
+    state = {}
+
+    async def scenario(client):
+        assert await helper.async_login_attempt(client, "11111111111", PASSWORD) is True
+        view_state = await helper.async_get_initial_viewstate(client)
+        quota = await helper.async_get_quota_ajax(client, view_state)
+        logout = await helper.async_perform_logout(client.cookies.get("JSESSIONID"), client)
+        return view_state, quota, logout
+
+    view_state, quota, logout = run_client(helper, state, scenario)
+    assert view_state == "VS1"
+    assert quota == ({"Toplam Kalan Kota": "1234.50 MB"}, "VS2")
+    assert logout is True
+    assert state["logged_out"] == "JSESSIONID=ASYNC1"
+
+
+def test_async_wrong_password_is_a_credential_error(helper):
+    async def scenario(client):
+        return await helper.async_login_attempt(client, "11111111111", "yanlis")
+
+    assert run_client(helper, {}, scenario) == "CREDENTIAL_ERROR"
+
+
+def test_async_html_answer_means_session_expired(helper):
+    async def scenario(client):
+        return await helper.async_get_quota_ajax(client, "VS1")
+
+    assert run_client(helper, {"expired": True}, scenario) == ("SESSION_EXPIRED", None)
+
+
+def test_async_login_skips_unreachable_portal(helper, monkeypatch):
+    monkeypatch.setattr(helper, "portal_reachable", lambda: False)
+    state = {}
+
+    def handle(request):
+        state["requested"] = True
+        return httpx.Response(500)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            return await helper.async_login_attempt(client, "11111111111", PASSWORD)
+
+    assert asyncio.run(main()) is False
+    assert "requested" not in state
+
+
+def test_async_connect_error_is_counted(helper):
+    def handle(request):
+        raise httpx.ConnectError("baglanti reddedildi", request=request)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            return await helper.async_perform_logout("ABC", client)
+
+    before = helper.METRICS.outcomes.get(("logout", "connection_error"), 0)
+    assert asyncio.run(main()) is False
+    assert helper.METRICS.outcomes[("logout", "connection_error")] == before + 1
+
+
+def test_async_logout_keeps_other_session_file(helper, tmp_path):
+    helper.SESSION_FILE_PATH.write_text("OTHER", encoding="utf-8")
+
+    async def scenario(client):
+        return await helper.async_perform_logout("ASYNC1", client)
+
+    assert run_client(helper, {}, scenario) is True
+    assert helper.SESSION_FILE_PATH.read_text(encoding="utf-8") == "OTHER"
+
+
+def run_against_portal(helper, scenario):
+    async def main():
+        async with helper.new_async_client() as client:
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_async_client_against_mock_portal(helper, portal):
+    async def scenario(client):
+        assert await helper.async_login_attempt(client, TEST_USERNAME, TEST_PASSWORD) is True
+        jsessionid = client.cookies.get("JSESSIONID")
+        view_state = await helper.async_get_initial_viewstate(client)
+        assert view_state == portal.lookup(jsessionid).view_state
+        quota_info, next_view_state = await helper.async_get_quota_ajax(client, view_state)
+        assert quota_info["Toplam Kalan Kota"].endswith(" MB")
+        assert next_view_state and next_view_state != view_state
+        assert await helper.async_perform_logout(jsessionid, client) is True
+        return jsessionid
+
+    jsessionid = run_against_portal(helper, scenario)
+    assert portal.lookup(jsessionid) is None
+
+
+def test_async_wrong_password_against_mock_portal(helper, portal):
+    async def scenario(client):
+        return await helper.async_login_attempt(client, TEST_USERNAME, "yanlis")
+
+    assert run_against_portal(helper, scenario) == "CREDENTIAL_ERROR"
+
+
+def test_async_expired_session_against_mock_portal(helper, portal):
+    async def scenario(client):
+        assert await helper.async_login_attempt(client, TEST_USERNAME, TEST_PASSWORD) is True
+        view_state = await helper.async_get_initial_viewstate(client)
+        portal.invalidate(client.cookies.get("JSESSIONID"))
+        return await helper.async_get_quota_ajax(client, view_state)
+
+    assert run_against_portal(helper, scenario) == ("SESSION_EXPIRED", None)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import logging
+import shlex
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("zaman asimi")
+        time.sleep(0.01)
+
+
+def test_parse_alert_thresholds(helper):
+    assert helper.parse_alert_thresholds("500, 1000,abc,-1,500") == (1000.0, 500.0)
+    assert helper.parse_alert_thresholds(None) == ()
+
+
+def test_rate_is_an_ewma_and_ignores_refills(helper):
+    monitor = helper.BurnRateMonitor(time_constant=3600)
+    monitor.observe("u", 10_000, timestamp=0)
+    state = monitor.observe("u", 9_900, timestamp=3600)
+    assert state.rate == pytest.approx(100)
+    assert state.hours_left == pytest.approx(99)
+
+    state = monitor.observe("u", 20_000, timestamp=7200) # Kota yuklendi
+    assert state.rate == pytest.approx(100) and state.last_mb == 20_000
+
+    state = monitor.observe("u", 19_700, timestamp=10800) # Saatte 300 MB
+    assert 100 < state.rate < 300
+
+
+def test_thresholds_fire_once_until_rearmed(helper, caplog):
+    monitor = helper.BurnRateMonitor(mb_thresholds=(1000,))
+    with caplog.at_level(logging.WARNING):
+        for timestamp, quota_mb in enumerate((1500, 900, 800, 1200, 700)):
+            monitor.observe("11111111111", quota_mb, timestamp=timestamp * 60)
+    alerts = [record.getMessage() for record in caplog.records if "Kota uyarisi" in record.getMessage()]
+    assert len(alerts) == 2
+    assert "11111111111" not in " ".join(alerts)
+
+
+def test_command_and_webhook_hooks(helper, tmp_path):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    output = tmp_path / "alert.txt"
+    script = f"import os; open({str(output)!r}, 'w').write(os.environ['KYK_ALERT_EVENT'])"
+    monitor = helper.BurnRateMonitor(
+        mb_thresholds=(1000,),
+        command=f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}",
+        webhook=f"http://127.0.0.1:{server.server_port}/alert",
+    )
+    try:
+        monitor.observe("11111111111", 500, timestamp=0)
+        wait_until(lambda: received and output.exists() and output.read_text())
+    finally:
+        server.shutdown()
+    assert output.read_text() == "remaining_mb"
+    assert received[0]["remaining_mb"] == 500
+    assert received[0]["account"] == helper.mask_username("11111111111")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def breaker(helper, monkeypatch):
+    breaker = helper.CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    monkeypatch.setattr(helper, "PORTAL_BREAKER", breaker)
+    return breaker
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def wait_half_open(breaker):
+    time.sleep(breaker.retry_after() + 0.01)
+    assert breaker.state == "half_open"
+
+
+def test_opens_after_threshold(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_after() > 0
+
+
+def test_half_open_admits_a_single_trial(breaker):
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    assert breaker.allow()
+    assert not breaker.allow() # Deneme suruyor; ikinci istek bekler
+
+
+def test_successful_trial_closes(breaker):
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    assert breaker.allow()
+    breaker.record("success")
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_failed_trial_reopens(breaker):
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    assert breaker.allow()
+    breaker.record("timeout")
+    assert breaker.state == "open"
+
+
+def test_raising_call_releases_the_trial(helper, breaker):
+    @helper.portal_call("quota")
+    def interrupted(session, view_state):
+        raise KeyboardInterrupt
+
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    with pytest.raises(KeyboardInterrupt):
+        interrupted(None, "vs")
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_open_breaker_short_circuits_gated_calls(helper, breaker):
+    calls = []
+
+    @helper.portal_call("quota")
+    def quota(session, view_state):
+        calls.append(view_state)
+        return {"Toplam Kalan Kota": "1 MB"}, "next"
+
+    open_breaker(breaker)
+    assert quota(None, "vs") == helper.circuit_open_result("quota", (None, "vs"))
+    assert calls == []
+
+
+def test_logout_outcomes_do_not_drive_the_breaker(helper, breaker):
+    @helper.portal_call("logout")
+    def logout(jsessionid):
+        return True
+
+    @helper.portal_call("logout")
+    def failed_logout(jsessionid):
+        return False
+
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    assert breaker.allow() # Kota denemesi suruyor
+    assert logout("ABC") is True
+    assert breaker.state == "half_open" # Cikis basarisi devreyi kapatmaz
+    breaker.record("success")
+    for _ in range(breaker.failure_threshold):
+        assert failed_logout("ABC") is False
+    assert breaker.state == "closed"
+
+
+def test_retry_policy_never_undercuts_open_breaker(helper, breaker):
+    policy = helper.RetryPolicy(base=0.001, cap=0.002, breaker=breaker)
+    open_breaker(breaker)
+    assert policy.next_delay() >= breaker.retry_after() - 0.01
+
+
+def test_retry_policy_jitter_stays_within_bounds(helper, breaker):
+    policy = helper.RetryPolicy(base=1.0, cap=8.0, max_attempts=20, breaker=breaker)
+    delays = [policy.next_delay() for _ in range(20)]
+    assert all(1.0 <= delay <= 8.0 for delay in delays)
+    assert policy.exhausted
+    policy.reset()
+    assert policy.attempts == 0 and not policy.exhausted
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from conftest import REPO_ROOT
+
+
+def test_daemon_options(helper):
+    args = helper.parse_cli_args(["--daemon", "--mode", "fast", "--interval", "auto"])
+    assert args.daemon and args.mode == "fast" and args.interval is None
+    assert helper.parse_cli_args(["--daemon", "--interval", "90"]).interval == 90.0
+    with pytest.raises(SystemExit):
+        helper.parse_cli_args(["--interval", "-5"])
+
+
+@pytest.fixture
+def no_stdin(monkeypatch):
+    def fail_input(*args, **kwargs):
+        raise AssertionError("servis modu stdin okumamali")
+
+    monkeypatch.setattr("builtins.input", fail_input)
+
+
+def test_daemon_without_credentials_exits_2(helper, monkeypatch, no_stdin):
+    monkeypatch.delenv("KYK_USERNAME", raising=False)
+    monkeypatch.delenv("KYK_PASSWORD", raising=False)
+    monkeypatch.setattr(helper.dotenv, "load_dotenv", lambda *args, **kwargs: False)
+    assert helper.run_daemon("keepalive", None) == 2
+
+
+def test_daemon_exits_1_on_credential_error(helper, monkeypatch, no_stdin):
+    monkeypatch.setenv("KYK_USERNAME", "11111111111")
+    monkeypatch.setenv("KYK_PASSWORD", "yanlis")
+    monkeypatch.setattr(helper.dotenv, "load_dotenv", lambda *args, **kwargs: False)
+    monkeypatch.setattr(helper, "login_attempt", lambda *args, **kwargs: "CREDENTIAL_ERROR")
+    assert helper.run_daemon("keepalive", 60) == 1
+
+
+@pytest.mark.parametrize("raw, expected", [("", 15.0), ("2.5", 2.5), ("0", 0.0), ("on bes", 15.0), ("nan", 15.0)])
+def test_env_float_falls_back_on_bad_values(helper, monkeypatch, raw, expected):
+    monkeypatch.setenv("KYK_SHUTDOWN_DEADLINE", raw)
+    assert helper.env_float("KYK_SHUTDOWN_DEADLINE", 15.0) == expected
+
+
+def test_help_survives_bad_numeric_env(tmp_path):
+    # Kopya uzerinde calisilir; boylece import sirasinda acilan log dosyasi depoya yazilmaz.
+    shutil.copy(REPO_ROOT / "kyk_wifi_helper.py", tmp_path / "kyk_wifi_helper.py")
+    env = dict(os.environ, KYK_RATE_LIMIT="x", KYK_SHUTDOWN_DEADLINE="", KYK_QUOTA_CACHE_TTL="bir dakika")
+    result = subprocess.run(
+        [sys.executable, "kyk_wifi_helper.py", "--help"], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert "KYK_RATE_LIMIT icin gecersiz deger" in result.stdout
+    assert "KYK_QUOTA_CACHE_TTL icin gecersiz deger" in result.stdout
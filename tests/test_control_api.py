@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def control(helper, monkeypatch):
+    monkeypatch.setenv("KYK_CONTROL_TOKEN", TOKEN)
+    accounts = [helper.AccountState("11111111111", "pw1"), helper.AccountState("22222222222", "pw2")]
+    accounts[0].last_quota = "1.024,00 MB"
+    scheduler = helper.KeepAliveScheduler(accounts)
+    server = helper.ControlServer(scheduler, 0).start()
+    stop = threading.Event()
+
+    def pump():
+        # Zamanlayici thread'i yerine kuyruktaki cagrilari calistirir
+        while not stop.wait(0.01):
+            scheduler._run_calls()
+
+    scheduler.running = True
+    pumper = threading.Thread(target=pump, daemon=True)
+    pumper.start()
+    yield server
+    stop.set()
+    pumper.join()
+    server.stop()
+
+
+def call(server, method, path, token=TOKEN):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", method=method)
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    if method == "POST":
+        request.data = b""
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def test_status_and_quota(control):
+    status, body = call(control, "GET", "/status")
+    assert status == 200
+    data = json.loads(body)
+    assert [account["account"] for account in data["accounts"]] == ["*******1111", "*******2222"]
+    assert data["circuit"] == "closed"
+    status, body = call(control, "GET", "/quota?account=1111")
+    assert status == 200
+    assert json.loads(body)["accounts"] == [
+        {"account": "*******1111", "last_quota": "1.024,00 MB", "remaining_mb": 1024.0, "last_quota_at": None}
+    ]
+
+
+def test_requests_need_the_token(control):
+    assert call(control, "GET", "/status", token=None)[0] == 401
+    assert call(control, "GET", "/status", token="yanlis")[0] == 401
+
+
+def test_unknown_route_and_account(control):
+    assert call(control, "GET", "/nope")[0] == 404
+    assert call(control, "GET", "/status?account=9999")[0] == 404
+
+
+def test_metrics_are_prometheus_text(control):
+    status, body = call(control, "GET", "/metrics")
+    assert status == 200 and "kyk_portal" in body
+
+
+def test_logout_runs_on_the_scheduler(helper, control, monkeypatch):
+    logged_out = []
+    monkeypatch.setattr(helper, "perform_logout", lambda jsessionid, *args, **kwargs: logged_out.append(jsessionid) or True)
+    account = control.scheduler.accounts[1]
+    account.session.cookies.set("JSESSIONID", "abc")
+    account.logged_in = True
+    status, body = call(control, "POST", "/logout?account=2222")
+    assert status == 200
+    assert json.loads(body)["accounts"] == [{"account": "*******2222", "logged_out": True}]
+    assert logged_out == ["abc"]
+    assert account.disabled and not control.scheduler.accounts[0].disabled
+
+
+def test_stopped_scheduler_answers_503(control):
+    control.scheduler.running = False
+    started = time.monotonic()
+    assert call(control, "POST", "/refresh")[0] == 503
+    assert time.monotonic() - started < 2
+    assert call(control, "GET", "/status")[0] == 200 # Bellekteki durum yine okunabilir
+
+
+def test_token_is_generated_into_a_private_file(helper, monkeypatch):
+    monkeypatch.delenv("KYK_CONTROL_TOKEN", raising=False)
+    server = helper.ControlServer(helper.KeepAliveScheduler([helper.AccountState("11111111111", "pw1")]), 0).start()
+    try:
+        path = helper.CONTROL_TOKEN_PATH
+        token = path.read_text(encoding="utf-8").strip()
+        assert token == server.token and len(token) >= 32
+        if os.name == "posix":
+            assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        assert call(server, "GET", "/status", token=None)[0] == 401
+        assert call(server, "GET", "/status", token=token)[0] == 200
+    finally:
+        server.stop()
+    assert helper.load_control_token() == token # Sonraki acilista ayni anahtar kullanilir
+
+
+def test_readable_token_file_is_replaced(helper, monkeypatch):
+    if os.name != "posix":
+        pytest.skip("dosya izinleri yalnizca POSIX'te denetlenir")
+    monkeypatch.delenv("KYK_CONTROL_TOKEN", raising=False)
+    path = helper.CONTROL_TOKEN_PATH
+    path.write_text("herkes-okuyabilir\n", encoding="utf-8")
+    path.chmod(0o644)
+    token = helper.load_control_token()
+    assert token != "herkes-okuyabilir"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
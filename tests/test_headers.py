@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_profiles_are_immutable(helper):
+    for profile in (helper.BASE_HEADERS, helper.LOGIN_GET_HEADERS, helper.LOGIN_POST_HEADERS,
+                    helper.VIEWSTATE_HEADERS, helper.AJAX_HEADERS):
+        with pytest.raises(TypeError):
+            profile["X-Test"] = "1"
+
+
+def test_session_defaults_merge_with_request_profile(helper):
+    session = helper.new_portal_session()
+    request = helper.requests.Request("POST", helper.SUCCESS_URL, headers=helper.AJAX_HEADERS)
+    headers = session.prepare_request(request).headers
+    assert headers["User-Agent"] == helper.USER_AGENT
+    assert headers["Faces-Request"] == "partial/ajax"
+    assert headers["Accept"] == helper.AJAX_HEADERS["Accept"]
+
+
+def test_logout_headers_carry_the_session_cookie(helper):
+    request = helper.requests.Request("GET", helper.LOGOUT_URL, headers=helper.logout_headers("ABC"))
+    headers = helper.new_portal_session().prepare_request(request).headers
+    assert headers["Cookie"] == "JSESSIONID=ABC"
+    assert headers["User-Agent"] == helper.USER_AGENT
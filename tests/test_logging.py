@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+
+import pytest
+
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord("kyk", level, __file__, 1, message, None, None)
+
+
+def test_log_records_reach_the_test_log_file(helper, tmp_path):
+    logging.warning("kuyruk uzerinden yazildi")
+    log_file = tmp_path / "kyk_login.log"
+    deadline = time.monotonic() + 5
+    while "kuyruk uzerinden yazildi" not in (log_file.read_text(encoding="utf-8") if log_file.exists() else ""):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert not (helper.PATHS.base_path / "kyk_login.log").exists()
+
+
+def test_json_lines_formatter(helper):
+    entry = json.loads(helper.JsonLinesFormatter().format(make_record("merhaba")))
+    assert entry["level"] == "INFO" and entry["message"] == "merhaba"
+
+
+@pytest.mark.parametrize(
+    ("rotate", "log_format", "handler_type", "formatter_type"),
+    [
+        ("", "", "RotatingFileHandler", "Formatter"),
+        ("daily", "json", "TimedRotatingFileHandler", "JsonLinesFormatter"),
+    ],
+)
+def test_file_handler_options(helper, tmp_path, monkeypatch, rotate, log_format, handler_type, formatter_type):
+    monkeypatch.setenv("KYK_LOG_ROTATE", rotate)
+    monkeypatch.setenv("KYK_LOG_FORMAT", log_format)
+    handler = helper.build_file_handler(tmp_path / "test.log")
+    try:
+        assert type(handler).__name__ == handler_type
+        assert type(handler.formatter).__name__ == formatter_type
+    finally:
+        handler.close()
+
+
+def test_color_formatter_reuses_level_formatters(helper):
+    formatter = helper.ColorFormatter()
+    cached = dict(formatter._formatters)
+    assert "uyari" in formatter.format(make_record("uyari", logging.WARNING))
+    assert formatter._formatters == cached
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def metrics(helper, monkeypatch):
+    fresh = helper.PortalMetrics()
+    monkeypatch.setattr(helper, "METRICS", fresh)
+    return fresh
+
+
+def test_histogram_buckets_are_cumulative(helper):
+    histogram = helper.Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2]
+    assert histogram.to_dict()["count"] == 3
+
+
+def test_portal_call_counts_outcomes(helper, metrics):
+    results = iter([({"Toplam Kalan Kota": "1 MB"}, "VS"), ("SESSION_EXPIRED", None), (None, "VS")])
+
+    @helper.portal_call("quota")
+    def quota(session, view_state):
+        result = next(results)
+        if result[0] is None:
+            helper.note_outcome("timeout")
+        return result
+
+    @helper.portal_call("login")
+    def login(session):
+        return "CREDENTIAL_ERROR"
+
+    for _ in range(3):
+        quota(None, "VS")
+    login(None)
+    assert metrics.snapshot()["outcomes"] == {
+        "login": {"credential_error": 1},
+        "quota": {"session_expired": 1, "success": 1, "timeout": 1},
+    }
+    assert metrics.histograms[("quota", "total")].count == 3
+
+
+def test_exports(helper, metrics, tmp_path):
+    metrics.observe("quota", "total", 0.2)
+    metrics.count("quota", "success")
+
+    helper.export_metrics(tmp_path / "metrics.prom")
+    text = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+    assert 'kyk_portal_request_seconds_bucket{endpoint="quota",phase="total",le="0.25"} 1' in text
+    assert 'kyk_portal_outcomes_total{endpoint="quota",outcome="success"} 1' in text
+
+    helper.export_metrics(tmp_path / "metrics.json")
+    snapshot = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert snapshot["outcomes"] == {"quota": {"success": 1}}
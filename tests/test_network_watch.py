@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+
+def netlink_message(msg_type, body):
+    return struct.pack("=LHHLL", 16 + len(body), msg_type, 0, 0, 0) + body
+
+
+def link_message(msg_type, flags, change):
+    return netlink_message(msg_type, struct.pack("=BxHiII", 0, 1, 3, flags, change))
+
+
+def address_message(msg_type, scope):
+    return netlink_message(msg_type, struct.pack("=BBBBI", 2, 24, 0, scope, 3))
+
+
+def route_message(msg_type, dst_len, table=254):
+    return netlink_message(msg_type, struct.pack("=BBBBBBBBI", 2, dst_len, 0, 0, table, 3, 0, 1, 0))
+
+
+@pytest.fixture
+def watcher(helper, monkeypatch):
+    watcher = helper.NetworkWatcher() # Baslatilmaz; degisiklikler elle tetiklenir
+    monkeypatch.setattr(helper, "network_watcher", watcher)
+    yield watcher
+    if watcher._socket is not None:
+        watcher._socket.close()
+
+
+def test_relevant_netlink_events(helper):
+    data = b"".join([
+        link_message(16, 0x41, 0x1),
+        address_message(20, 0),
+        address_message(20, 254), # Yerel (host) adresler onemsiz
+        route_message(25, 0),
+        route_message(24, 24), # Varsayilan olmayan rota onemsiz
+    ])
+    assert helper.describe_netlink_events(data) == [
+        "arayuz 3 acik",
+        "arayuz 3 adres eklendi",
+        "varsayilan rota silindi",
+    ]
+
+
+def test_truncated_netlink_data_is_ignored(helper):
+    data = link_message(17, 0, 0)
+    assert helper.describe_netlink_events(data[:-4]) == []
+    assert helper.describe_netlink_events(b"\x00" * 8) == []
+
+
+def test_change_resets_probe_and_breaker(helper, watcher, monkeypatch):
+    monkeypatch.setattr(helper, "_last_probe", helper.ProbeResult("tcp_failed", "test"))
+    for _ in range(helper.PORTAL_BREAKER.failure_threshold):
+        helper.PORTAL_BREAKER.record_failure()
+    assert helper.PORTAL_BREAKER.state == "open"
+    watcher._changed("test")
+    assert helper._last_probe is None
+    assert helper.PORTAL_BREAKER.state == "closed"
+    assert helper.network_generation() == 1
+
+
+def test_change_ends_sleep_early(helper, watcher, monkeypatch):
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    monkeypatch.setattr(helper, "_wakeup_reader", reader)
+    monkeypatch.setattr(helper, "_wakeup_writer", writer)
+    monkeypatch.setattr(helper, "exit_requested", False)
+    timer = threading.Timer(0.1, watcher._changed, args=("test",))
+    timer.start()
+    started = time.monotonic()
+    assert helper.animated_sleep(5, "bekleniyor", spinner=False) is False
+    assert time.monotonic() - started < 2
+    timer.join()
+    reader.close()
+    writer.close()
+
+
+def test_events_without_a_state_change_are_ignored(helper, watcher, monkeypatch):
+    state = {frozenset({("wlan0", "up"), ("default:wlan0", "0101A8C0")})}
+    monkeypatch.setattr(helper, "network_state", lambda: next(iter(state)))
+    watcher._state = helper.network_state()
+    watcher._check("arayuz 3 adres eklendi") # IPv6 adres omru yenilemesi gibi
+    assert helper.network_generation() == 0
+    state.clear()
+    state.add(frozenset({("wlan0", "down")}))
+    watcher._check("arayuz 3 kapali")
+    assert helper.network_generation() == 1
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+
+import pytest
+from conftest import REPO_ROOT, TEST_PASSWORD, TEST_USERNAME
+
+
+@pytest.fixture
+def credentials(helper, monkeypatch):
+    monkeypatch.setenv("KYK_USERNAME", TEST_USERNAME)
+    monkeypatch.setenv("KYK_PASSWORD", TEST_PASSWORD)
+    monkeypatch.setattr(helper.dotenv, "load_dotenv", lambda *args, **kwargs: False)
+
+
+def test_quota_then_logout(helper, portal, credentials, capsys):
+    assert helper.run_quota_once() == 0
+    assert capsys.readouterr().out.strip().endswith(" MB")
+    jsessionid = helper.stored_jsessionid()
+    assert portal.lookup(jsessionid).username == TEST_USERNAME
+
+    assert helper.run_quota_once() == 0 # Kayitli oturum yeniden kullanilir
+    assert helper.stored_jsessionid() == jsessionid
+
+    assert helper.run_logout_once() == 0
+    assert portal.lookup(jsessionid) is None
+
+
+def test_logout_without_a_stored_session(helper):
+    assert helper.run_logout_once() == 1
+
+
+def test_import_does_not_load_heavy_modules(tmp_path):
+    # Kopya uzerinde calisilir; boylece import sirasinda acilan log dosyasi depoya yazilmaz.
+    shutil.copy(REPO_ROOT / "kyk_wifi_helper.py", tmp_path / "kyk_wifi_helper.py")
+    heavy = ("urllib3", "bs4.element", "dotenv.main", "http.server", "http.client", "subprocess", "urllib.request")
+    probe = f"import sys, kyk_wifi_helper; print(sorted(m for m in {heavy!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "[]"
+
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import pytest
+
+
+def quota_response(quota_cell: str, view_state: str = "NEXT") -> bytes:
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<partial-response id="j_id1"><changes>'
+        '<update id="mainPanel:kota"><![CDATA[<table><tbody><tr>'
+        '<td><label class="ui-outputlabel">Toplam Kalan Kota (MB):</label></td>'
+        f'<td><label class="ui-outputlabel">{quota_cell}</label></td></tr></tbody></table>]]></update>'
+        f'<update id="j_id1:javax.faces.ViewState:0"><![CDATA[{view_state}]]></update>'
+        "</changes></partial-response>"
+    ).encode("utf-8")
+
+
+VIEW_STATE = "-123456789:987654321&amp;x"
+
+
+def main_page(view_state: str, page_size: int) -> bytes:
+    """Landing page with the hidden ViewState input in the middle of page_size bytes."""
+
+    form = (
+        '<form id="mainPanel" method="post" action="/"><span id="mainPanel:kota"></span>'
+        '<input type="hidden" name="javax.faces.ViewState" id="j_id1:javax.faces.ViewState:0" '
+        f'value="{view_state}" autocomplete="off"/></form>'
+    )
+    padding = ".x{}" * ((page_size - len(form)) // 8)
+    return f"<!DOCTYPE html><html><head><style>{padding}</style></head><body>{form}<script>//{padding}</script></body></html>".encode("utf-8")
+
+
+@pytest.fixture(scope="module")
+def page():
+    return main_page(VIEW_STATE, 4096)
+
+
+VIEW_EXPIRED_RESPONSE = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<partial-response id="j_id1"><error>'
+    "<error-name>class javax.faces.application.ViewExpiredException</error-name>"
+    "<error-message><![CDATA[View /index.xhtml could not be restored.]]></error-message>"
+    "</error></partial-response>"
+).encode("utf-8")
+
+
+def test_fast_quota_parser(helper):
+    content = quota_response("12345.50")
+    assert helper.fast_parse_quota_response(content) == ({"Toplam Kalan Kota": "12345.50 MB"}, "NEXT")
+    assert helper.parse_quota_response(content, "OLD") == ({"Toplam Kalan Kota": "12345.50 MB"}, "NEXT")
+
+
+@pytest.mark.parametrize("quota_cell", ["12&#46;5", "<span>12.5</span>"])
+def test_fast_path_miss_falls_back_to_beautifulsoup(helper, quota_cell):
+    content = quota_response(quota_cell)
+    assert helper.fast_parse_quota_response(content) is None
+    quota_info, view_state = helper.parse_quota_response(content, "OLD")
+    assert quota_info == {"Toplam Kalan Kota": "12.5 MB"}
+    assert view_state == "NEXT"
+
+
+def test_view_expired_response_has_no_quota(helper):
+    assert helper.fast_parse_quota_response(VIEW_EXPIRED_RESPONSE) is None
+    quota_info, view_state = helper.parse_quota_response(VIEW_EXPIRED_RESPONSE, "OLD")
+    assert quota_info is None and view_state is None
+
+
+def test_scanner_finds_viewstate_at_every_split_point(helper, page):
+    tag_start = page.index(b"javax.faces.ViewState") - 40
+    tag_end = page.index(b">", tag_start + 40) + 1
+    expected = helper.parse_viewstate_html(page.decode("utf-8"))
+    assert expected == "-123456789:987654321&x"
+    for split in range(tag_start - 8, tag_end + 8):
+        scanner = helper.ViewStateScanner()
+        found = scanner.feed(page[:split]) or scanner.feed(page[split:])
+        assert found == expected, f"split at {split}"
+
+
+def test_scanner_byte_by_byte(helper, page):
+    scanner = helper.ViewStateScanner()
+    found = next(filter(None, (scanner.feed(page[i:i + 1]) for i in range(len(page)))))
+    assert found == helper.parse_viewstate_html(page.decode("utf-8"))
+    assert scanner.bytes_read < len(page) # Etiket gorulunce tarama durur
+
+
+def test_scanner_without_viewstate_returns_none(helper):
+    scanner = helper.ViewStateScanner()
+    assert scanner.feed(b"<html><body><input name='other' value='x'/>") is None
+    assert scanner.feed(b"</body></html>") is None
+    assert scanner.text().endswith("</html>")
+
+
+def test_drain_chunks_stops_at_limit(helper):
+    chunks = iter([b"x" * 10] * 5)
+    assert helper.drain_chunks(chunks, limit=100) is True
+    chunks = iter([b"x" * 10] * 5)
+    assert helper.drain_chunks(chunks, limit=25) is False
+    assert len(list(chunks)) == 2
+
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+
+class RecordingAdapter:
+    """Minimal transport adapter that answers every request with a fixed body."""
+
+    def __init__(self, requests_module, body):
+        self.requests = requests_module
+        self.body = body
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        response = self.requests.Response()
+        response.status_code = 200
+        response._content = self.body.encode("utf-8")
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def adapter(helper, monkeypatch):
+    recording = RecordingAdapter(helper.requests, "<p>Basari ile cikis yaptiniz</p>")
+    monkeypatch.setattr(helper, "_portal_adapter", recording)
+    return recording
+
+
+def test_sessions_share_one_pool_but_not_cookies(helper, adapter):
+    first = helper.new_portal_session()
+    second = helper.new_portal_session()
+    assert first.get_adapter(helper.LOGIN_URL) is second.get_adapter(helper.LOGIN_URL) is adapter
+    first.cookies.set("JSESSIONID", "A")
+    assert second.cookies.get("JSESSIONID") is None
+
+
+def test_reset_keeps_the_session_and_its_pool(helper, adapter):
+    account = helper.AccountState(username="11111111111", password="pw1")
+    session = account.session
+    session.cookies.set("JSESSIONID", "A")
+    account.view_state, account.logged_in = "VS", True
+    account.reset_session()
+    assert account.session is session
+    assert session.get_adapter(helper.LOGIN_URL) is adapter
+    assert session.cookies.get("JSESSIONID") is None
+    assert account.view_state is None and not account.logged_in
+
+
+def test_logout_goes_through_the_shared_pool(helper, adapter):
+    assert helper.perform_logout("LOGOUT1") is True
+    [request] = adapter.sent
+    assert request.url == helper.LOGOUT_URL
+    assert request.headers["Cookie"] == "JSESSIONID=LOGOUT1"
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from conftest import TEST_PASSWORD, TEST_USERNAME
+
+
+def login(helper):
+    session = helper.new_portal_session()
+    assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+    return session
+
+
+def test_login_keepalive_logout(helper, portal):
+    session = login(helper)
+    jsessionid = session.cookies.get("JSESSIONID")
+    assert portal.lookup(jsessionid).username == TEST_USERNAME
+
+    view_state = helper.get_initial_viewstate(session)
+    assert view_state == portal.lookup(jsessionid).view_state
+
+    for _ in range(3):
+        quota_info, next_view_state = helper.get_quota_ajax(session, view_state)
+        assert quota_info["Toplam Kalan Kota"].endswith(" MB")
+        assert next_view_state and next_view_state != view_state
+        view_state = next_view_state
+
+    assert helper.perform_logout(jsessionid) is True
+    assert portal.lookup(jsessionid) is None
+
+
+def test_wrong_password_is_a_credential_error(helper):
+    session = helper.new_portal_session()
+    assert helper.login_attempt(session, TEST_USERNAME, "wrong", session_file=None) == "CREDENTIAL_ERROR"
+
+
+def test_expired_session_is_reported(helper, portal):
+    session = login(helper)
+    view_state = helper.get_initial_viewstate(session)
+    portal.invalidate(session.cookies.get("JSESSIONID"))
+    assert helper.get_quota_ajax(session, view_state) == ("SESSION_EXPIRED", None)
+
+
+def test_scheduler_tick_logs_in_and_relogs_after_expiry(helper, portal):
+    account = helper.AccountState(username=TEST_USERNAME, password=TEST_PASSWORD)
+    scheduler = helper.KeepAliveScheduler([account], interval=42)
+
+    assert scheduler.tick(account) == 42
+    assert account.logged_in and account.last_quota.endswith(" MB")
+
+    portal.invalidate(account.session.cookies.get("JSESSIONID"))
+    assert scheduler.tick(account) == 1.0 # Oturum dustu; hemen yeniden giris planlanir
+    assert not account.logged_in
+    assert scheduler.tick(account) == 42
+    assert account.logged_in
+    assert helper.perform_logout(account.session.cookies.get("JSESSIONID")) is True
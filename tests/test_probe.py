@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_probe(helper, monkeypatch):
+    monkeypatch.setattr(helper, "_last_probe", None)
+    monkeypatch.setattr(helper, "PROBE_ENABLED", True)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def captive_server():
+    """Answers the 204 check with the status given in server.status."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.status = 204
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_mock_portal_is_reachable(helper, portal):
+    result = helper.probe_portal(captive_check=False)
+    assert result.status == "ok" and result.portal_reachable
+    assert result.internet is None
+
+
+def test_closed_port_fails_fast(helper, monkeypatch):
+    monkeypatch.setattr(helper, "PORTAL_BASE_URL", f"http://127.0.0.1:{closed_port()}")
+    result = helper.probe_portal(captive_check=False)
+    assert result.status == "tcp_failed"
+    assert result.elapsed < helper.PROBE_TIMEOUT * 3
+
+
+def test_unknown_host_is_a_dns_failure(helper, monkeypatch):
+    monkeypatch.setattr(helper, "PORTAL_BASE_URL", "https://portal.invalid")
+    assert helper.probe_portal(captive_check=False).status == "dns_failed"
+
+
+def test_captive_check(helper, portal, captive_server, monkeypatch):
+    monkeypatch.setattr(helper, "CAPTIVE_CHECK_URL", f"http://127.0.0.1:{captive_server.server_port}/generate_204")
+    assert helper.probe_portal().internet is True
+    captive_server.status = 302 # Baska bir captive portal araya giriyor
+    assert helper.probe_portal().internet is False
+
+
+def test_unreachable_portal_gates_login(helper, monkeypatch):
+    monkeypatch.setattr(helper, "PORTAL_BASE_URL", f"http://127.0.0.1:{closed_port()}")
+    assert helper.portal_reachable() is False
+    assert helper.login_attempt(helper.new_portal_session(), "11111111111", "pw", session_file=None) is False
+
+
+def test_probe_result_is_cached(helper, portal, monkeypatch):
+    calls = []
+    real_probe = helper.probe_portal
+    monkeypatch.setattr(helper, "probe_portal", lambda **kwargs: calls.append(kwargs) or real_probe(**kwargs))
+    assert helper.portal_reachable() and helper.portal_reachable()
+    assert len(calls) == 1
+
+
+def test_login_gate_skips_the_captive_check(helper, portal, monkeypatch):
+    monkeypatch.setattr(helper, "check_captive_portal", lambda *args, **kwargs: pytest.fail("204 kontrolu yapilmamali"))
+    assert helper.portal_reachable() is True
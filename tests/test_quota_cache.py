@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def cache(helper):
+    return helper.QuotaCache(ttl=60)
+
+
+def test_fresh_entry_is_returned(cache):
+    cache.put("a", {"Toplam Kalan Kota": "1 MB"})
+    quota_info, age = cache.get("a")
+    assert quota_info == {"Toplam Kalan Kota": "1 MB"} and age < 1
+    assert cache.get("a", max_age=0) is None
+    assert cache.get("b") is None
+
+
+def test_fetch_uses_the_cache(cache):
+    cache.put("a", {"Toplam Kalan Kota": "1 MB"})
+    assert cache.fetch("a", lambda: pytest.fail("portal istegi gonderilmemeli")) == {"Toplam Kalan Kota": "1 MB"}
+
+
+def test_concurrent_fetches_share_one_load(cache):
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "sonuc"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.fetch("a", loader, timeout=5))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["sonuc"] * 5
+
+
+def test_loader_error_reaches_waiters(cache):
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader():
+        started.set()
+        release.wait(5)
+        raise ValueError("portal hatasi")
+
+    errors = []
+
+    def leader():
+        with pytest.raises(ValueError):
+            cache.fetch("a", loader)
+
+    def waiter():
+        try:
+            cache.fetch("a", loader, timeout=5)
+        except ValueError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=leader)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=waiter)
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join()
+    second.join()
+    assert [str(e) for e in errors] == ["portal hatasi"]
+    assert cache.fetch("a", lambda: "yeniden") == "yeniden" # Hata onbellege alinmaz
+
+
+def test_interrupted_loader_releases_waiters(cache):
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader():
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt
+
+    def leader():
+        with pytest.raises(KeyboardInterrupt):
+            cache.fetch("a", loader)
+
+    errors = []
+
+    def waiter():
+        try:
+            cache.fetch("a", loader)
+        except KeyboardInterrupt as e:
+            errors.append(e)
+
+    first = threading.Thread(target=leader)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=waiter)
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join()
+    second.join(5)
+    assert not second.is_alive() # Zaman asimsiz bekleyen de serbest kalir
+    assert len(errors) == 1
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+
+def test_round_trip_and_window_queries(helper, tmp_path):
+    history = helper.QuotaHistory(tmp_path / "history.bin")
+    samples = [(1_000, 5000), (2_000, 4900), (3_000, 4700), (4_000, 6000), (5_000, 5900)]
+    for timestamp, quota_mb in samples:
+        assert history.append(quota_mb, timestamp)
+
+    reopened = helper.QuotaHistory(tmp_path / "history.bin")
+    assert reopened.samples() == samples
+    assert reopened.latest() == samples[-1]
+    assert reopened.samples(since=2_000, until=4_000) == samples[1:4]
+    # 4700 -> 6000 arasi kota yuklemesi tuketim sayilmaz: (5000-4900) + (4900-4700) + (6000-5900)
+    assert reopened.usage_since(1_500) == 400
+
+
+def test_unchanged_values_are_thinned(helper, tmp_path):
+    history = helper.QuotaHistory(tmp_path / "history.bin")
+    assert history.append(100, 1_000)
+    assert not history.append(100, 1_000 + helper.QUOTA_HISTORY_MIN_INTERVAL - 1)
+    assert history.append(100, 1_000 + helper.QUOTA_HISTORY_MIN_INTERVAL)
+    assert history.append(99, 1_000 + helper.QUOTA_HISTORY_MIN_INTERVAL + 1)
+
+
+def test_out_of_order_timestamps_stay_sorted(helper, tmp_path):
+    history = helper.QuotaHistory(tmp_path / "history.bin")
+    history.append(100, 2_000)
+    history.append(90, 1_000) # Saat geri alindi
+    assert [timestamp for timestamp, _ in history.samples()] == [2_000, 2_000]
+
+
+def test_torn_record_is_overwritten(helper, tmp_path):
+    path = tmp_path / "history.bin"
+    helper.QuotaHistory(path).append(100, 1_000)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03") # Cokme sirasinda yarim kalmis kayit
+    history = helper.QuotaHistory(path)
+    history.append(90, 2_000)
+    assert history.samples() == [(1_000, 100), (2_000, 90)]
+
+
+def test_unknown_file_is_ignored(helper, tmp_path):
+    path = tmp_path / "history.bin"
+    path.write_bytes(b"NOTKYK00" + b"\0" * helper.QUOTA_RECORD.size)
+    assert helper.QuotaHistory(path).samples() == []
+
+
+def test_parse_quota_mb(helper):
+    assert helper.parse_quota_mb("1234 MB") == 1234
+    assert helper.parse_quota_mb("24997.29 MB") == 24997
+    assert helper.parse_quota_mb("1.234,56 MB") == 1235
+    assert helper.parse_quota_mb("N/A") is None
+
+
+def test_samples_go_to_a_hashed_file_per_account(helper):
+    helper.record_quota_sample({"Toplam Kalan Kota": "5000.00 MB"}, "11111111111")
+    helper.record_quota_sample("SESSION_EXPIRED", "11111111111") # Kota olmayan sonuclar yok sayilir
+    [path] = helper.QUOTA_HISTORY_DIR.iterdir()
+    assert "11111111111" not in path.name
+    assert [quota for _, quota in helper.quota_history("11111111111").samples()] == [5000]
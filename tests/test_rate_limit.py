@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+import stat
+import time
+
+import pytest
+
+
+def test_keepalive_leaves_reserve_for_login(helper, tmp_path):
+    limiter = helper.PortalRateLimiter(per_minute=60, burst=3, reserve=1, path=tmp_path / "bucket.bin")
+    assert limiter.delay_for("quota") == 0.0
+    assert limiter.delay_for("quota") == 0.0
+    assert limiter.delay_for("quota") > 0 # Son jeton giris/cikis icin ayrildi
+    assert limiter.delay_for("login") == 0.0
+    assert limiter.delay_for("logout") > 0
+
+
+def test_bucket_is_shared_through_the_state_file(helper, tmp_path):
+    path = tmp_path / "bucket.bin"
+    first = helper.PortalRateLimiter(per_minute=60, burst=2, reserve=0, path=path)
+    second = helper.PortalRateLimiter(per_minute=60, burst=2, reserve=0, path=path)
+    assert first.delay_for("quota") == 0.0
+    assert second.delay_for("quota") == 0.0
+    assert first.delay_for("quota") > 0
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_zero_rate_disables_the_limit(helper, tmp_path):
+    limiter = helper.PortalRateLimiter(per_minute=0, burst=1, path=tmp_path / "bucket.bin")
+    assert all(limiter.delay_for("quota") == 0.0 for _ in range(10))
+
+
+def test_gated_call_waits_for_a_token(helper, tmp_path, monkeypatch):
+    limiter = helper.PortalRateLimiter(per_minute=600, burst=1, reserve=0, path=tmp_path / "bucket.bin")
+    monkeypatch.setattr(helper, "PORTAL_RATE_LIMITER", limiter)
+
+    @helper.portal_call("login")
+    def login(session, username, password, session_file=None):
+        return True
+
+    started = time.monotonic()
+    assert login(None, "u", "p") is True
+    assert login(None, "u", "p") is True
+    assert 0.05 < time.monotonic() - started < 1 # Ikinci cagri bir jeton (0.1 sn) bekler
+
+
+@pytest.mark.skipif(not hasattr(os, "O_NOFOLLOW"), reason="O_NOFOLLOW yok")
+def test_symlinked_state_file_is_refused(helper, tmp_path):
+    target = tmp_path / "target.bin"
+    target.write_bytes(b"")
+    link = tmp_path / "bucket.bin"
+    link.symlink_to(target)
+    limiter = helper.PortalRateLimiter(per_minute=60, burst=2, reserve=0, path=link)
+    assert limiter.delay_for("quota") == 0.0 # Surec ici kovaya duser
+    assert limiter._fd is None
+    assert target.read_bytes() == b""
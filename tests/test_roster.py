@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from conftest import TEST_PASSWORD, TEST_USERNAME
+
+
+def test_csv_with_header_and_skipped_rows(helper, tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(
+        "oda,tc,sifre\n"
+        "101,11111111111,pw1\n"
+        "# yorum satiri\n"
+        "102,22222222222,\n"
+        "103,11111111111,pw3\n"
+        "104,33333333333,pw4\n",
+        encoding="utf-8",
+    )
+    entries, skipped = helper.read_roster(path)
+    assert [(entry.line, entry.username, entry.password) for entry in entries] == [
+        (2, "11111111111", "pw1"),
+        (6, "33333333333", "pw4"),
+    ]
+    assert [(result.line, result.status) for result in skipped] == [(4, "skipped"), (5, "skipped")]
+
+
+def test_csv_without_header(helper, tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("11111111111,pw1\n22222222222,pw2\n", encoding="utf-8")
+    entries, skipped = helper.read_roster(path)
+    assert [entry.username for entry in entries] == ["11111111111", "22222222222"]
+    assert skipped == []
+
+
+def test_toml_accounts(helper, tmp_path):
+    path = tmp_path / "roster.toml"
+    path.write_text(
+        '[[account]]\nusername = "11111111111"\npassword = "pw1"\n\n'
+        '[[account]]\nusername = "22222222222"\n',
+        encoding="utf-8",
+    )
+    entries, skipped = helper.read_roster(path)
+    assert [entry.username for entry in entries] == ["11111111111"]
+    assert [result.line for result in skipped] == [2]
+
+
+@pytest.mark.parametrize("text", ["account = [1, 2]\n", "[[account]\nusername = \n"])
+def test_invalid_toml_is_a_value_error(helper, tmp_path, text):
+    path = tmp_path / "roster.toml"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError):
+        helper.read_roster(path)
+
+
+def test_toml_without_tomllib_is_a_value_error(helper, tmp_path, monkeypatch):
+    path = tmp_path / "roster.toml"
+    path.write_text('[[account]]\nusername = "1"\npassword = "2"\n', encoding="utf-8")
+    monkeypatch.setitem(sys.modules, "tomllib", None) # Python < 3.11
+    with pytest.raises(ValueError, match="3.11"):
+        helper.read_roster(path)
+
+
+def test_merge_keeps_existing_accounts(helper, tmp_path):
+    path = tmp_path / "accounts.txt"
+    path.write_text("# yorum\n11111111111:eski", encoding="utf-8")
+    entries = [helper.RosterEntry(1, "11111111111", "yeni"), helper.RosterEntry(2, "22222222222", "pw2")]
+    assert helper.merge_accounts_file(path, entries) == 1
+    assert path.read_text(encoding="utf-8") == "# yorum\n11111111111:eski\n22222222222:pw2\n"
+
+
+def test_import_against_the_portal(helper, portal, tmp_path):
+    roster = tmp_path / "roster.csv"
+    roster.write_text(f"tc,sifre\n{TEST_USERNAME},{TEST_PASSWORD}\n99999999999,yanlis\n88888888888,\n", encoding="utf-8")
+    accounts = tmp_path / "accounts.txt"
+    report = tmp_path / "rapor.csv"
+    assert helper.run_roster_import(roster, accounts, report, workers=2, rate=0) == 0
+    assert accounts.read_text(encoding="utf-8") == f"{TEST_USERNAME}:{TEST_PASSWORD}\n"
+    rows = [line.split(",")[:3] for line in report.read_text(encoding="utf-8").splitlines()[1:]]
+    assert rows == [
+        ["2", "*******8901", "valid"],
+        ["3", "*******9999", "invalid_credentials"],
+        ["4", "*******8888", "skipped"],
+    ]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import pytest
+
+
+class FakePortal:
+    """Stands in for the portal functions the scheduler calls."""
+
+    def __init__(self, passwords):
+        self.passwords = passwords
+        self.expired = set()
+        self.logged_out = []
+        self.counter = 0
+
+    def login_attempt(self, session, username, password, session_file=None):
+        if self.passwords.get(username) is None:
+            return False # Ag hatasi
+        if self.passwords[username] != password:
+            return "CREDENTIAL_ERROR"
+        self.counter += 1
+        session.cookies.set("JSESSIONID", f"{username}-{self.counter}")
+        return True
+
+    def get_initial_viewstate(self, session):
+        return "vs-0"
+
+    def get_quota_ajax(self, session, view_state):
+        if session.cookies.get("JSESSIONID") in self.expired:
+            return "SESSION_EXPIRED", None
+        return {"Toplam Kalan Kota": "1000.00 MB"}, view_state + "+"
+
+    def perform_logout(self, jsessionid, *args, **kwargs):
+        self.logged_out.append(jsessionid)
+        return True
+
+
+@pytest.fixture
+def fake_portal(helper, monkeypatch):
+    fake = FakePortal({"11111111111": "pw1", "22222222222": "pw2", "33333333333": None})
+    for name in ("login_attempt", "get_initial_viewstate", "get_quota_ajax", "perform_logout"):
+        monkeypatch.setattr(helper, name, getattr(fake, name))
+    return fake
+
+
+def test_load_accounts_skips_bad_and_duplicate_lines(helper, tmp_path):
+    path = tmp_path / "accounts.txt"
+    path.write_text(
+        "# yorum\n11111111111:pw1\n\nbozuk satir\n22222222222:pw2\n11111111111:baska\n33333333333:\n",
+        encoding="utf-8",
+    )
+    accounts = helper.load_accounts(path)
+    assert [(account.username, account.password) for account in accounts] == [
+        ("11111111111", "pw1"),
+        ("22222222222", "pw2"),
+    ]
+
+
+def test_mask_username(helper):
+    assert helper.mask_username("12345678901") == "*******8901"
+    assert helper.mask_username("123") == "***"
+
+
+def test_tick_logs_in_and_keeps_alive(helper, fake_portal):
+    account = helper.AccountState(username="11111111111", password="pw1")
+    scheduler = helper.KeepAliveScheduler([account], interval=42)
+    assert scheduler.tick(account) == 42
+    assert account.logged_in and account.last_quota == "1000.00 MB"
+    assert account.view_state == "vs-0+"
+    assert scheduler.tick(account) == 42
+    assert account.view_state == "vs-0++"
+
+
+def test_tick_relogs_after_session_expiry(helper, fake_portal):
+    account = helper.AccountState(username="11111111111", password="pw1")
+    scheduler = helper.KeepAliveScheduler([account], interval=42)
+    scheduler.tick(account)
+    fake_portal.expired.add(account.session.cookies.get("JSESSIONID"))
+    assert scheduler.tick(account) == 1.0 # Oturum dustu; hemen yeniden giris planlanir
+    assert not account.logged_in
+    assert scheduler.tick(account) == 42
+    assert account.logged_in
+
+
+def test_wrong_password_disables_and_network_error_retries(helper, fake_portal):
+    wrong = helper.AccountState(username="22222222222", password="yanlis")
+    offline = helper.AccountState(username="33333333333", password="pw3")
+    scheduler = helper.KeepAliveScheduler([wrong, offline], interval=42)
+    assert scheduler.tick(wrong) is None
+    assert wrong.disabled
+    delay = scheduler.tick(offline)
+    assert delay is not None and delay > 0
+    assert not offline.logged_in and not offline.disabled
+
+
+def test_shutdown_logs_out_logged_in_accounts(helper, fake_portal):
+    first = helper.AccountState(username="11111111111", password="pw1")
+    second = helper.AccountState(username="22222222222", password="pw2")
+    scheduler = helper.KeepAliveScheduler([first, second], interval=42)
+    scheduler.tick(first)
+    scheduler.shutdown()
+    assert fake_portal.logged_out == ["11111111111-1"]
+    assert not first.logged_in
+
+
+def test_adaptive_scheduler_uses_the_learned_interval(helper, fake_portal, tmp_path):
+    adaptive = helper.AdaptiveKeepAlive(tmp_path / "profile.json")
+    adaptive.safe_gap = 800
+    account = helper.AccountState(username="11111111111", password="pw1")
+    scheduler = helper.KeepAliveScheduler([account], adaptive=adaptive)
+    assert scheduler.tick(account) == adaptive.next_interval() == 1200
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def portal_session(helper):
+    session = helper.requests.Session()
+    session.cookies.set("JSESSIONID", "STORED1", domain="wifi.gsb.gov.tr", path="/")
+    return session
+
+
+def test_round_trip_and_version_check(helper, portal_session):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    stored = helper.load_session_store()
+    assert stored.username_key == helper.username_key("11111111111")
+    assert "11111111111" not in helper.SESSION_STORE_PATH.read_text(encoding="utf-8")
+    assert stored.view_state == "VS1" and stored.jsessionid == "STORED1"
+    assert stored.created_at <= stored.updated_at
+
+    data = json.loads(helper.SESSION_STORE_PATH.read_text(encoding="utf-8"))
+    data["version"] = helper.SESSION_STORE_VERSION + 1
+    helper.SESSION_STORE_PATH.write_text(json.dumps(data), encoding="utf-8")
+    assert helper.load_session_store() is None
+
+
+def test_version_1_store_is_read_and_rewritten_without_the_username(helper, portal_session, monkeypatch):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    data = json.loads(helper.SESSION_STORE_PATH.read_text(encoding="utf-8"))
+    data["version"] = 1
+    data["username"] = "11111111111"
+    del data["username_key"]
+    helper.SESSION_STORE_PATH.write_text(json.dumps(data), encoding="utf-8")
+
+    monkeypatch.setattr(helper, "get_quota_ajax", lambda session, view_state: ({"Toplam Kalan Kota": "10 MB"}, "VS2"))
+    assert helper.resume_stored_session(helper.requests.Session(), "11111111111") == "VS2"
+    data = json.loads(helper.SESSION_STORE_PATH.read_text(encoding="utf-8"))
+    assert data["version"] == helper.SESSION_STORE_VERSION
+    assert "username" not in data and data["username_key"] == helper.username_key("11111111111")
+
+
+def test_atomic_write_leaves_no_temp_files(helper, tmp_path):
+    path = tmp_path / "store.json"
+    helper.atomic_write_text(path, "first")
+    helper.atomic_write_text(path, "second")
+    assert path.read_text(encoding="utf-8") == "second"
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".store.json")] == []
+
+
+def test_clear_only_removes_the_matching_session(helper, portal_session):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    helper.clear_session_store("BASKA")
+    assert helper.SESSION_STORE_PATH.exists()
+    helper.clear_session_store("STORED1")
+    assert not helper.SESSION_STORE_PATH.exists()
+
+
+def test_resume_valid_session_skips_login(helper, portal_session, monkeypatch):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    sent = []
+
+    def fake_quota(session, view_state):
+        sent.append((session.cookies.get("JSESSIONID"), view_state))
+        return {"Toplam Kalan Kota": "10 MB"}, "VS2"
+
+    monkeypatch.setattr(helper, "get_quota_ajax", fake_quota)
+    session = helper.requests.Session()
+    assert helper.resume_stored_session(session, "11111111111") == "VS2"
+    assert sent == [("STORED1", "VS1")]
+    assert helper.load_session_store().view_state == "VS2"
+
+
+def test_resume_expired_session_clears_the_store(helper, portal_session, monkeypatch):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    monkeypatch.setattr(helper, "get_quota_ajax", lambda session, view_state: ("SESSION_EXPIRED", None))
+    session = helper.requests.Session()
+    assert helper.resume_stored_session(session, "11111111111") is None
+    assert session.cookies.get("JSESSIONID") is None
+    assert not helper.SESSION_STORE_PATH.exists()
+
+
+def test_resume_ignores_other_users(helper, portal_session, monkeypatch):
+    helper.save_session_store(portal_session, "VS1", "11111111111", force=True)
+    monkeypatch.setattr(helper, "get_quota_ajax", pytest.fail)
+    assert helper.resume_stored_session(helper.requests.Session(), "22222222222") is None
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import time
+
+from conftest import TEST_PASSWORD, TEST_USERNAME
+
+
+def test_pending_logouts_round_trip(helper, tmp_path):
+    path = tmp_path / "pending_logouts.json"
+    pending = {"ABC": {"label": "123****01", "saved_at": 1.0}}
+    helper.save_pending_logouts(pending, path)
+    assert helper.load_pending_logouts(path) == pending
+    helper.save_pending_logouts({}, path)
+    assert not path.exists()
+
+
+def test_logouts_run_in_parallel_under_one_deadline(helper, monkeypatch):
+    def fake_logout(jsessionid, timeout=helper.LOGOUT_TIMEOUT):
+        if jsessionid == "HANG":
+            time.sleep(5)
+        return jsessionid != "FAIL"
+
+    monkeypatch.setattr(helper, "perform_logout", fake_logout)
+    started = time.monotonic()
+    failed = helper.logout_concurrently({"OK1": "a", "OK2": "b", "FAIL": "c", "HANG": "d"}, deadline=0.5)
+    assert time.monotonic() - started < 2
+    assert sorted(failed) == ["FAIL", "HANG"]
+
+
+def test_real_logout_through_mock_portal(helper, portal):
+    sessions = {}
+    for _ in range(3):
+        session = helper.new_portal_session()
+        assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+        sessions[session.cookies.get("JSESSIONID")] = "test"
+    assert helper.logout_concurrently(sessions, deadline=10) == []
+    assert all(portal.lookup(jsessionid) is None for jsessionid in sessions)
+
+
+def test_failed_logouts_are_retried_on_next_start(helper, portal, monkeypatch):
+    session = helper.new_portal_session()
+    assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+    jsessionid = session.cookies.get("JSESSIONID")
+    real_logout = helper.perform_logout
+    monkeypatch.setattr(helper, "perform_logout", lambda jsessionid, timeout=None: False)
+    assert helper.shutdown_logouts({jsessionid: "test"}, deadline=1) == [jsessionid]
+    assert list(helper.load_pending_logouts()) == [jsessionid]
+    monkeypatch.setattr(helper, "perform_logout", real_logout)
+    monkeypatch.setattr(helper, "_last_probe", None)
+    helper.retry_pending_logouts(deadline=10)
+    assert helper.load_pending_logouts() == {}
+    assert portal.lookup(jsessionid) is None
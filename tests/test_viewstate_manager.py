@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from conftest import TEST_PASSWORD, TEST_USERNAME
+
+
+def logged_in_session(helper):
+    session = helper.new_portal_session()
+    assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+    return session
+
+
+def test_acquire_fetches_once_and_reuses(helper, portal):
+    session = logged_in_session(helper)
+    manager = helper.ViewStateManager(session)
+    view_state = manager.acquire()
+    assert view_state == portal.lookup(session.cookies.get("JSESSIONID")).view_state
+    assert manager.acquire() == view_state
+    assert manager.age is not None and manager.age < 5
+
+
+def test_invalidate_prefetches_in_the_background(helper, portal):
+    session = logged_in_session(helper)
+    manager = helper.ViewStateManager(session)
+    first = manager.acquire()
+    manager.invalidate()
+    assert manager.refresh_in_background().wait(10) # Suren yenilemeye katilir
+    second = manager.acquire()
+    assert second and second != first
+    assert second == portal.lookup(session.cookies.get("JSESSIONID")).view_state
+
+
+def test_stale_view_state_is_refreshed(helper, portal):
+    session = logged_in_session(helper)
+    manager = helper.ViewStateManager(session, max_age=0)
+    first = manager.acquire()
+    manager.refresh_if_stale()
+    manager.refresh_in_background().wait(10)
+    assert manager.acquire() != first
+
+
+def test_view_state_of_an_old_session_is_dropped(helper, portal):
+    session = logged_in_session(helper)
+    manager = helper.ViewStateManager(session)
+    manager.update("OLD")
+    helper.reset_portal_session(session)
+    assert helper.login_attempt(session, TEST_USERNAME, TEST_PASSWORD, session_file=None) is True
+    assert manager.age is None
+    assert manager.acquire() == portal.lookup(session.cookies.get("JSESSIONID")).view_state
+
+
+def test_prefetch_uses_its_own_session_on_the_shared_pool(helper, portal, monkeypatch):
+    session = logged_in_session(helper)
+    manager = helper.ViewStateManager(session)
+    used = []
+    real_get_initial_viewstate = helper.get_initial_viewstate
+
+    def recording_get_initial_viewstate(fetcher):
+        used.append(fetcher)
+        return real_get_initial_viewstate(fetcher)
+
+    monkeypatch.setattr(helper, "get_initial_viewstate", recording_get_initial_viewstate)
+    assert manager.refresh_in_background().wait(10)
+    [fetcher] = used
+    assert fetcher is not session
+    assert fetcher.get_adapter(helper.PORTAL_BASE_URL) is session.get_adapter(helper.PORTAL_BASE_URL)
+    assert fetcher.cookies.get("JSESSIONID") == session.cookies.get("JSESSIONID")
+    assert manager.acquire() == portal.lookup(session.cookies.get("JSESSIONID")).view_state
+    assert helper.last_portal_activity(session) >= helper.last_portal_activity(fetcher)
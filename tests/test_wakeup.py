@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def wakeup_socket(helper, monkeypatch):
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    monkeypatch.setattr(helper, "_wakeup_reader", reader)
+    monkeypatch.setattr(helper, "_wakeup_writer", writer)
+    monkeypatch.setattr(helper, "exit_requested", False)
+    yield
+    reader.close()
+    writer.close()
+
+
+def later(delay, function):
+    timer = threading.Timer(delay, function)
+    timer.start()
+    return timer
+
+
+def test_sleep_runs_until_the_deadline(helper, wakeup_socket):
+    started = time.monotonic()
+    assert helper.animated_sleep(0.2, spinner=False) is False
+    assert time.monotonic() - started >= 0.2
+
+
+def test_wake_sleepers_does_not_end_the_wait(helper, wakeup_socket):
+    later(0.05, helper.wake_sleepers)
+    started = time.monotonic()
+    assert helper.animated_sleep(0.3, spinner=False) is False
+    assert time.monotonic() - started >= 0.3
+
+
+def test_request_exit_interrupts_immediately(helper, wakeup_socket):
+    later(0.05, helper.request_exit)
+    started = time.monotonic()
+    assert helper.animated_sleep(30, spinner=False) is True
+    assert time.monotonic() - started < 5
+    assert helper.animated_sleep(30, spinner=False) is True # Cikis istendiyse hic beklenmez
+
+
+@pytest.fixture
+def no_wakeup_socket(helper, monkeypatch):
+    monkeypatch.setattr(helper, "_wakeup_reader", None)
+    monkeypatch.setattr(helper, "_wakeup_writer", None)
+    monkeypatch.setattr(helper, "exit_requested", False)
+
+
+def test_request_exit_interrupts_without_a_socket(helper, no_wakeup_socket):
+    later(0.05, helper.request_exit)
+    started = time.monotonic()
+    assert helper.animated_sleep(30, spinner=False) is True
+    assert time.monotonic() - started < 2
+
+
+def test_interrupt_sleep_without_a_socket(helper, no_wakeup_socket):
+    later(0.05, helper.interrupt_sleep)
+    started = time.monotonic()
+    helper.wait_for_wakeup(30)
+    assert time.monotonic() - started < 2
+
+
+def test_sleep_without_a_socket_runs_until_the_deadline(helper, no_wakeup_socket):
+    started = time.monotonic()
+    helper.wait_for_wakeup(0.3)
+    assert time.monotonic() - started >= 0.3
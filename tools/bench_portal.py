@@ -0,0 +1,192 @@
+# ================================================
+# =        KYK Wi-Fi Portal Olcum (Benchmark)    =
+# ================================================
+#
+# tools/mock_portal.py uzerinde kyk_wifi_helper'in gercek portal fonksiyonlarini
+# calistirarak giris suresini, keep-alive adimi (tick) basina maliyeti ve yanit
+# basina ayristirma (parse) suresini olcer.
+#
+#   python tools/bench_portal.py --logins 20 --ticks 200 --latency 0.02
+#   python tools/bench_portal.py --json bench_output.txt
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR.parent))
+sys.path.insert(0, str(TOOLS_DIR))
+
+from mock_portal import MockPortal, MockPortalConfig, main_page, new_view_state, quota_partial_response  # noqa: E402
+
+BENCH_USERNAME = "12345678901"
+BENCH_PASSWORD = "bench-password"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Count, mean and percentiles of `samples` (seconds) in milliseconds."""
+
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(samples: List[float], func: Callable, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, object]:
+    config = MockPortalConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        page_size=args.page_kb * 1024,
+        accounts={BENCH_USERNAME: BENCH_PASSWORD},
+        seed=args.seed,
+    )
+    with MockPortal(config=config) as portal:
+        # Portal adresleri import sirasinda okundugu icin modul, sunucu acildiktan sonra yuklenir.
+        os.environ["KYK_PORTAL_URL"] = portal.base_url
+        # Hiz siniri kapatilir: olcum limiter beklemelerini degil portal fonksiyonlarini olcsun ve
+        # calisan gercek bir kopyanin paylasilan jeton kovasini tuketmesin.
+        os.environ["KYK_RATE_LIMIT"] = "0"
+        import kyk_wifi_helper as helper
+
+        logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.CRITICAL)
+        # Cikis islemi gercek session_info.txt dosyasini silmesin.
+        scratch_dir = tempfile.TemporaryDirectory()
+        helper.SESSION_FILE_PATH = Path(scratch_dir.name) / "session_info.txt"
+
+        login_samples: List[float] = []
+        viewstate_samples: List[float] = []
+        logout_samples: List[float] = []
+        session = helper.new_portal_session()
+        for _ in range(args.logins):
+            helper.reset_portal_session(session)
+            if timed(login_samples, helper.login_attempt, session, BENCH_USERNAME, BENCH_PASSWORD, session_file=None) is not True:
+                continue
+            timed(viewstate_samples, helper.get_initial_viewstate, session)
+            jsessionid = session.cookies.get("JSESSIONID")
+            if jsessionid:
+                timed(logout_samples, helper.perform_logout, jsessionid)
+
+        # Keep-alive: tek oturum, her adimda bir AJAX kota istegi (ViewState her seferinde degisir).
+        tick_samples: List[float] = []
+        expired_ticks = 0
+        helper.reset_portal_session(session)
+        view_state = None
+        if helper.login_attempt(session, BENCH_USERNAME, BENCH_PASSWORD, session_file=None) is True:
+            view_state = helper.get_initial_viewstate(session)
+        for _ in range(args.ticks if view_state else 0):
+            quota_info, next_view_state = timed(tick_samples, helper.get_quota_ajax, session, view_state)
+            if quota_info == "SESSION_EXPIRED" or not next_view_state:
+                expired_ticks += 1
+                helper.reset_portal_session(session)
+                if helper.login_attempt(session, BENCH_USERNAME, BENCH_PASSWORD, session_file=None) is True:
+                    next_view_state = helper.get_initial_viewstate(session)
+            view_state = next_view_state or view_state
+
+        # Yanit basina ayristirma: ag olmadan, portal taklidinin urettigi yanitlar uzerinde.
+        parse_samples: List[float] = []
+        scan_samples: List[float] = []
+        responses = [quota_partial_response(20_000 - i, new_view_state()).encode("utf-8") for i in range(64)]
+        page = main_page(new_view_state(), config.page_size).encode("utf-8")
+
+        def scan_page() -> None:
+            scanner = helper.ViewStateScanner()
+            for offset in range(0, len(page), helper.VIEWSTATE_CHUNK_SIZE):
+                if scanner.feed(page[offset:offset + helper.VIEWSTATE_CHUNK_SIZE]):
+                    return
+
+        for i in range(args.parses):
+            timed(parse_samples, helper.parse_quota_response, responses[i % len(responses)], "")
+            timed(scan_samples, scan_page)
+
+        scratch_dir.cleanup()
+        with portal.lock:
+            portal_stats = dict(portal.stats)
+
+    return {
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "failure_rate": args.failure_rate,
+            "page_kb": args.page_kb,
+        },
+        "results": {
+            "login": summarize(login_samples),
+            "initial_viewstate": summarize(viewstate_samples),
+            "logout": summarize(logout_samples),
+            "keepalive_tick": summarize(tick_samples),
+            "quota_parse": summarize(parse_samples),
+            "viewstate_scan": summarize(scan_samples),
+        },
+        "keepalive_relogins": expired_ticks,
+        "portal": portal_stats,
+        "metrics": helper.METRICS.snapshot(),
+    }
+
+
+def format_table(report: Dict[str, object]) -> str:
+    lines = [f"{'olcum':<20}{'n':>6}{'ort ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+    for name, summary in report["results"].items():  # type: ignore[union-attr]
+        if not summary.get("count"):
+            lines.append(f"{name:<20}{0:>6}")
+            continue
+        lines.append(
+            f"{name:<20}{summary['count']:>6}{summary['mean_ms']:>10.3f}"
+            f"{summary['p50_ms']:>10.3f}{summary['p95_ms']:>10.3f}{summary['max_ms']:>10.3f}"
+        )
+    lines.append(f"keep-alive yeniden giris sayisi: {report['keepalive_relogins']}")
+    lines.append(f"portal sayaclari: {json.dumps(report['portal'], sort_keys=True)}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="kyk_wifi_helper portal fonksiyonlari icin uctan uca olcum.")
+    parser.add_argument("--logins", type=int, default=20, help="Giris + ViewState + cikis tekrar sayisi.")
+    parser.add_argument("--ticks", type=int, default=200, help="Keep-alive (AJAX kota) adimi sayisi.")
+    parser.add_argument("--parses", type=int, default=2000, help="Ag olmadan ayristirma tekrar sayisi.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Portal taklidinin yanit gecikmesi (saniye).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Gecikmeye eklenen rastgele pay (saniye).")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="503 donen isteklerin orani (0..1).")
+    parser.add_argument("--page-kb", type=int, default=64, help="Ana sayfanin yaklasik boyutu (KB).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="DOSYA", help="Sonuclari JSON olarak bu dosyaya da yaz.")
+    parser.add_argument("--verbose", action="store_true", help="kyk_wifi_helper loglarini goster.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_benchmarks(args)
+    print(format_table(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+# ================================================
+# =        KYK Wi-Fi Acilis Suresi Olcumu        =
+# ================================================
+#
+# kyk_wifi_helper'in import suresini ve tek seferlik komutlarin acilis maliyetini
+# ayri Python surecleri baslatarak olcer. `-X importtime` ciktisindan en pahali
+# modulleri listeler; boylece lazy import'larin gerilemesi fark edilir.
+# --quota ve --logout tools/mock_portal.py uzerinde calisir. Script gecici bir dizine
+# kopyalanip orada calistirilir; log ve oturum dosyalari depoya yazilmaz.
+#
+#   python tools/bench_startup.py --runs 10
+#   python tools/bench_startup.py --json bench_output.txt
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = TOOLS_DIR.parent
+SCRIPT_PATH = REPO_ROOT / "kyk_wifi_helper.py"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from mock_portal import MockPortal, MockPortalConfig  # noqa: E402
+
+BENCH_USERNAME = "12345678901"
+BENCH_PASSWORD = "bench-password"
+
+# Komutlar, scriptin kopyalandigi gecici dizinde calistirilir.
+SCENARIOS: Dict[str, Sequence[str]] = {
+    "import": ("-c", "import kyk_wifi_helper"),
+    "help": ("kyk_wifi_helper.py", "--help"),
+    "quota": ("kyk_wifi_helper.py", "--quota"), # Ilk calistirma giris yapar, sonrakiler kayitli oturumu kullanir
+    "logout": ("kyk_wifi_helper.py", "--logout"),
+}
+# Olculmeden once calistirilan hazirlik senaryosu: --logout her seferinde acik bir oturum bulmali.
+SCENARIO_SETUP: Dict[str, str] = {"logout": "quota"}
+
+
+def run_once(
+    args: Sequence[str],
+    importtime: bool = False,
+    cwd: Path = REPO_ROOT,
+    env: Optional[Mapping[str, str]] = None,
+) -> Tuple[float, str]:
+    """Run the interpreter once; return the wall time and stderr."""
+
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += list(args)
+    env = dict(env if env is not None else os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} basarisiz oldu ({completed.returncode}):\n{completed.stderr}")
+    return elapsed, completed.stderr
+
+
+def slowest_imports(importtime_output: str, limit: int) -> List[Tuple[str, float]]:
+    """Top-level modules by cumulative import time (ms) from `-X importtime` output."""
+
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:] # Ayirac sonrasindaki bosluk; kalan girinti ic ice import derinligidir
+        if not cumulative.strip().isdigit() or name.startswith(" "):
+            continue
+        imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def python_baseline(runs: int) -> float:
+    return statistics.median(run_once(("-c", "pass"))[0] for _ in range(runs))
+
+
+def run_benchmarks(runs: int, top: int) -> Dict[str, object]:
+    baseline = python_baseline(runs)
+    results: Dict[str, object] = {}
+    config = MockPortalConfig(accounts={BENCH_USERNAME: BENCH_PASSWORD}, seed=1)
+    with MockPortal(config=config) as portal, tempfile.TemporaryDirectory() as work_dir:
+        shutil.copy(SCRIPT_PATH, work_dir)
+        env = dict(
+            os.environ,
+            KYK_PORTAL_URL=portal.base_url,
+            KYK_USERNAME=BENCH_USERNAME,
+            KYK_PASSWORD=BENCH_PASSWORD,
+            KYK_RATE_LIMIT="0", # Calisan gercek bir kopyanin paylasilan jeton kovasina dokunulmaz
+        )
+        for name, args in SCENARIOS.items():
+            samples = []
+            for _ in range(runs):
+                if name in SCENARIO_SETUP:
+                    run_once(SCENARIOS[SCENARIO_SETUP[name]], cwd=Path(work_dir), env=env)
+                samples.append(run_once(args, cwd=Path(work_dir), env=env)[0])
+            results[name] = {
+                "runs": runs,
+                "median_ms": statistics.median(samples) * 1000,
+                "min_ms": min(samples) * 1000,
+                "over_baseline_ms": (statistics.median(samples) - baseline) * 1000,
+            }
+        _, importtime_output = run_once(SCENARIOS["import"], importtime=True, cwd=Path(work_dir), env=env)
+    return {
+        "python_baseline_ms": baseline * 1000,
+        "results": results,
+        "slowest_imports_ms": slowest_imports(importtime_output, top),
+    }
+
+
+def format_report(report: Dict[str, object]) -> str:
+    lines = [f"Python bos acilis: {report['python_baseline_ms']:.1f} ms"]
+    lines.append(f"{'senaryo':<10}{'medyan ms':>12}{'min ms':>10}{'fark ms':>10}")
+    for name, result in report["results"].items():  # type: ignore[union-attr]
+        lines.append(
+            f"{name:<10}{result['median_ms']:>12.1f}{result['min_ms']:>10.1f}{result['over_baseline_ms']:>10.1f}"
+        )
+    lines.append("En pahali importlar (kumulatif ms):")
+    for name, ms in report["slowest_imports_ms"]:  # type: ignore[union-attr]
+        lines.append(f"  {name:<30}{ms:>10.1f}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="kyk_wifi_helper acilis (import) suresi olcumu.")
+    parser.add_argument("--runs", type=int, default=7, help="Her senaryo icin surec sayisi.")
+    parser.add_argument("--top", type=int, default=15, help="Listelenecek en pahali import sayisi.")
+    parser.add_argument("--json", metavar="DOSYA", help="Sonuclari JSON olarak bu dosyaya da yaz.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_benchmarks(args.runs, args.top)
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,425 @@
+# ================================================
+# =        KYK Wi-Fi Yerel Portal Taklidi        =
+# ================================================
+#
+# wifi.gsb.gov.tr portalinin kullandigi protokolu yerel olarak taklit eden kucuk
+# bir HTTP sunucusu. Yalnizca standart kutuphane kullanir.
+#
+#   python tools/mock_portal.py --port 8080 --latency 0.05 --failure-rate 0.1
+#   KYK_PORTAL_URL=http://127.0.0.1:8080 python kyk_wifi_helper.py
+#
+# Desteklenenler: login.html (giris/hata/cikis sayfalari), j_spring_security_check
+# (302 ile SUCCESS_URL'ye yonlendirme), her AJAX isteginde degisen
+# 'j_id1:javax.faces.ViewState:0' iceren JSF partial-response, bosta kalan
+# oturumlarin zaman asimi, gecikme ve hata enjeksiyonu.
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+SESSION_COOKIE = "JSESSIONID"
+VIEWSTATE_FIELD = "javax.faces.ViewState"
+VIEWSTATE_UPDATE_ID = "j_id1:javax.faces.ViewState:0"
+QUOTA_UPDATE_ID = "mainPanel:kota"
+CREDENTIAL_ERROR_MESSAGE = "Hatali kullanici adi veya sifre"
+LOGOUT_MESSAGE = "Basari ile cikis yaptiniz"
+
+
+@dataclass
+class MockPortalConfig:
+    """Behaviour knobs of the mock portal."""
+
+    latency: float = 0.0 # Her yanittan once eklenen sabit gecikme (saniye)
+    jitter: float = 0.0 # Gecikmeye eklenen rastgele pay (0..jitter saniye)
+    failure_rate: float = 0.0 # 503 donen isteklerin orani (0..1)
+    drop_rate: float = 0.0 # Yanit verilmeden kapatilan baglantilarin orani (0..1)
+    idle_timeout: float = 900.0 # Bu kadar sure istek gelmeyen oturum duser (saniye)
+    page_size: int = 64 * 1024 # Ana sayfanin yaklasik boyutu (bayt)
+    quota_mb: float = 25_000.0 # Yeni giris yapan hesabin baslangic kotasi (MB)
+    accounts: Dict[str, str] = field(default_factory=dict) # Bos ise her kullanici kabul edilir
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockSession:
+    """Server-side state of one JSESSIONID."""
+
+    username: Optional[str] = None
+    view_state: Optional[str] = None
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+def new_view_state() -> str:
+    """Random ViewState in the '<long>:<long>' shape Mojarra produces."""
+
+    return f"{secrets.randbits(63) - (1 << 62)}:{secrets.randbits(63) - (1 << 62)}"
+
+
+def login_page(message: str = "") -> str:
+    notice = f'<div class="ui-messages-error"><span>{html.escape(message)}</span></div>' if message else ""
+    return (
+        "<!DOCTYPE html><html><head><title>GSB Wi-Fi</title></head><body>"
+        f"{notice}"
+        '<form id="loginForm" method="post" action="j_spring_security_check">'
+        '<input type="text" name="j_username"/><input type="password" name="j_password"/>'
+        '<input type="submit" name="submit" value="Giris"/></form></body></html>'
+    )
+
+
+def main_page(view_state: str, page_size: int) -> str:
+    """Landing page with the hidden ViewState input, padded to roughly page_size bytes."""
+
+    head = "<!DOCTYPE html><html><head><title>GSB Wi-Fi</title><style>"
+    form = (
+        '</style></head><body><form id="mainPanel" method="post" action="/">'
+        '<span id="mainPanel:kota"></span>'
+        '<button id="mainPanel:kota:j_idt122" name="mainPanel:kota:j_idt122">Kota</button>'
+        f'<input type="hidden" name="{VIEWSTATE_FIELD}" id="{VIEWSTATE_UPDATE_ID}" '
+        f'value="{view_state}" autocomplete="off"/></form><script>'
+    )
+    tail = "</script></body></html>"
+    # Gercek sayfada ViewState input'u sayfanin ortalarinda yer alir; dolgu iki yana bolunur.
+    padding = max(page_size - len(head) - len(form) - len(tail), 0)
+    before = ".x{}" * (padding // 8)
+    after = "//" + "-" * max(padding - len(before) - 2, 0)
+    return f"{head}{before}{form}{after}{tail}"
+
+
+def quota_partial_response(quota_mb: float, view_state: str) -> str:
+    """JSF partial-response carrying the quota table and the rotated ViewState."""
+
+    quota_html = (
+        '<table><tbody><tr><td><label class="ui-outputlabel">Toplam Kalan Kota (MB):</label></td>'
+        f'<td><label class="ui-outputlabel">{quota_mb:.2f}</label></td></tr></tbody></table>'
+    )
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<partial-response id="j_id1"><changes>'
+        f'<update id="{QUOTA_UPDATE_ID}"><![CDATA[{quota_html}]]></update>'
+        f'<update id="{VIEWSTATE_UPDATE_ID}"><![CDATA[{view_state}]]></update>'
+        "</changes></partial-response>"
+    )
+
+
+def view_expired_response() -> str:
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<partial-response id="j_id1"><error>'
+        "<error-name>class javax.faces.application.ViewExpiredException</error-name>"
+        "<error-message><![CDATA[viewId:/index.xhtml - View /index.xhtml could not be restored.]]></error-message>"
+        "</error></partial-response>"
+    )
+
+
+class MockPortal:
+    """In-process mock of the GSB Wi-Fi portal; start() returns the base URL."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockPortalConfig] = None) -> None:
+        self.config = config or MockPortalConfig()
+        self.random = random.Random(self.config.seed)
+        self.sessions: Dict[str, MockSession] = {}
+        self.quotas: Dict[str, float] = {}
+        self.stats: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), MockPortalHandler)
+        self.server.daemon_threads = True
+        self.server.portal = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockPortal":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def expire_all(self) -> None:
+        """Drop every server-side session, as if the idle timeout had passed for all of them."""
+
+        with self.lock:
+            self.sessions.clear()
+
+    # --- Oturum yonetimi --- #
+    def lookup(self, session_id: Optional[str]) -> Optional[MockSession]:
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.last_seen > self.config.idle_timeout:
+                del self.sessions[session_id]
+                self.stats["expired"] = self.stats.get("expired", 0) + 1
+                return None
+            session.last_seen = now
+            return session
+
+    def create_session(self, username: Optional[str] = None) -> Tuple[str, MockSession]:
+        session_id = secrets.token_hex(16).upper()
+        session = MockSession(username=username, view_state=new_view_state() if username else None)
+        with self.lock:
+            self.sessions[session_id] = session
+        return session_id, session
+
+    def invalidate(self, session_id: Optional[str]) -> bool:
+        with self.lock:
+            return self.sessions.pop(session_id or "", None) is not None
+
+    def check_credentials(self, username: str, password: str) -> bool:
+        if not username or not password:
+            return False
+        if not self.config.accounts:
+            return True
+        return self.config.accounts.get(username) == password
+
+    def consume_quota(self, username: str) -> float:
+        with self.lock:
+            remaining = self.quotas.get(username, self.config.quota_mb)
+            remaining = max(remaining - self.random.uniform(0.0, 5.0), 0.0)
+            self.quotas[username] = remaining
+            return remaining
+
+    def rotate_view_state(self, session: MockSession) -> str:
+        with self.lock:
+            session.view_state = new_view_state()
+            return session.view_state
+
+    # --- Hata enjeksiyonu --- #
+    def injected_fault(self) -> Optional[str]:
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.config.drop_rate:
+            return "drop"
+        if roll < self.config.drop_rate + self.config.failure_rate:
+            return "error"
+        return None
+
+    def delay(self) -> float:
+        with self.lock:
+            return self.config.latency + (self.random.uniform(0.0, self.config.jitter) if self.config.jitter else 0.0)
+
+
+class MockPortalHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the login/ViewState/AJAX/logout flow."""
+
+    protocol_version = "HTTP/1.1" # Baglantilar istemci havuzunda tekrar kullanilabilsin
+    server_version = "Apache-Coyote/1.1"
+    sys_version = ""
+
+    @property
+    def portal(self) -> MockPortal:
+        return self.server.portal  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    # --- Yardimcilar --- #
+    def _session_id(self) -> Optional[str]:
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        morsel = cookie.get(SESSION_COOKIE)
+        return morsel.value if morsel else None
+
+    def _read_form(self) -> Dict[str, str]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", errors="replace") if length else ""
+        return {key: values[0] for key, values in parse_qs(body, keep_blank_values=True).items()}
+
+    def _send(
+        self,
+        status: int,
+        body: str = "",
+        content_type: str = "text/html;charset=UTF-8",
+        location: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        if session_id:
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}={session_id}; Path=/; HttpOnly")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _dispatch(self, method: str) -> None:
+        portal = self.portal
+        form = self._read_form() if method == "POST" else {}
+        delay = portal.delay()
+        if delay > 0:
+            time.sleep(delay)
+        fault = portal.injected_fault()
+        if fault == "drop":
+            portal.count("dropped")
+            self.close_connection = True
+            return
+        if fault == "error":
+            portal.count("injected_errors")
+            self._send(503, "<html><body>Service Unavailable</body></html>")
+            return
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        if url.path == "/login.html" and method == "GET":
+            self._login_page(query)
+        elif url.path == "/j_spring_security_check" and method == "POST":
+            self._login(form)
+        elif url.path == "/" and method == "GET":
+            self._main_page()
+        elif url.path == "/" and method == "POST":
+            self._ajax(form)
+        elif url.path == "/__mock__/stats" and method == "GET":
+            with portal.lock:
+                stats = dict(portal.stats, active_sessions=len(portal.sessions))
+            self._send(200, json.dumps(stats), content_type="application/json")
+        else:
+            self._send(404, "<html><body>Not Found</body></html>")
+
+    # --- Portal uclari --- #
+    def _login_page(self, query: Dict[str, list]) -> None:
+        portal = self.portal
+        session_id = self._session_id()
+        if "logout" in query:
+            portal.count("logouts" if portal.invalidate(session_id) else "logouts_unknown")
+            new_id, _ = portal.create_session()
+            self._send(200, login_page(LOGOUT_MESSAGE), session_id=new_id)
+            return
+        message = CREDENTIAL_ERROR_MESSAGE if "error" in query else ""
+        if portal.lookup(session_id) is None:
+            session_id, _ = portal.create_session()
+            self._send(200, login_page(message), session_id=session_id)
+        else:
+            self._send(200, login_page(message))
+
+    def _login(self, form: Dict[str, str]) -> None:
+        portal = self.portal
+        username = form.get("j_username", "")
+        if not portal.check_credentials(username, form.get("j_password", "")):
+            portal.count("login_failures")
+            self._send(302, location=f"{portal.base_url}/login.html?error")
+            return
+        # Spring Security basarili giriste oturum kimligini yeniler (session fixation korumasi).
+        portal.invalidate(self._session_id())
+        session_id, _ = portal.create_session(username)
+        portal.count("logins")
+        self._send(302, location=f"{portal.base_url}/", session_id=session_id)
+
+    def _main_page(self) -> None:
+        portal = self.portal
+        session = portal.lookup(self._session_id())
+        if session is None or session.username is None:
+            self._send(302, location=f"{portal.base_url}/login.html")
+            return
+        portal.count("page_views")
+        view_state = portal.rotate_view_state(session)
+        self._send(200, main_page(view_state, portal.config.page_size))
+
+    def _ajax(self, form: Dict[str, str]) -> None:
+        portal = self.portal
+        session = portal.lookup(self._session_id())
+        if session is None or session.username is None:
+            # Suresi dolan oturumdaki AJAX istegi giris sayfasina yonlendirilir (HTML doner).
+            portal.count("ajax_unauthenticated")
+            self._send(302, location=f"{portal.base_url}/login.html")
+            return
+        if form.get(VIEWSTATE_FIELD) != session.view_state:
+            portal.count("view_expired")
+            self._send(200, view_expired_response(), content_type="text/xml;charset=UTF-8")
+            return
+        portal.count("quota_requests")
+        remaining = portal.consume_quota(session.username)
+        view_state = portal.rotate_view_state(session)
+        self._send(200, quota_partial_response(remaining, view_state), content_type="text/xml;charset=UTF-8")
+
+
+def parse_account(value: str) -> Tuple[str, str]:
+    username, sep, password = value.partition(":")
+    if not sep or not username or not password:
+        raise argparse.ArgumentTypeError("Hesap 'kullanici:sifre' biciminde olmali.")
+    return username, password
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Yerel GSB Wi-Fi portal taklidi (test ve olcum icin).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Her yanit icin sabit gecikme (saniye).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Gecikmeye eklenen rastgele pay (saniye).")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="503 donen isteklerin orani (0..1).")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Yanitsiz kapatilan baglantilarin orani (0..1).")
+    parser.add_argument("--idle-timeout", type=float, default=900.0, help="Oturum zaman asimi (saniye).")
+    parser.add_argument("--page-kb", type=int, default=64, help="Ana sayfanin yaklasik boyutu (KB).")
+    parser.add_argument("--account", action="append", type=parse_account, default=[], metavar="KULLANICI:SIFRE",
+                        help="Kabul edilecek hesap (birden cok verilebilir). Verilmezse her hesap kabul edilir.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Her istegi konsola yaz.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    config = MockPortalConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        drop_rate=args.drop_rate,
+        idle_timeout=args.idle_timeout,
+        page_size=args.page_kb * 1024,
+        accounts=dict(args.account),
+        seed=args.seed,
+    )
+    portal = MockPortal(args.host, args.port, config)
+    portal.server.verbose = args.verbose  # type: ignore[attr-defined]
+    print(f"Portal taklidi calisiyor: {portal.base_url}")
+    print(f"Kullanim: KYK_PORTAL_URL={portal.base_url} python kyk_wifi_helper.py")
+    try:
+        portal.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())